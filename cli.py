@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cli.py - Entrada no interactiva para trabajos programados (cron)
+
+Solo importa el motor que necesita el comando elegido: backtrader, pandas y
+numpy se cargan al ejecutar el primer backtest, no al arrancar.
+
+Uso:
+    python cli.py backtest --data EURUSD5.csv
+    python cli.py backtest --data EURUSD5.csv --set ema1_period=8 --set expiry_minutes=30
+    python cli.py backtest --config runs.json --json resultados.json --timing
+    python cli.py backtest --config runs.json --fleet
+    python cli.py search --data EURUSD5.csv --combinations 200 --output top.json
+    python cli.py search --data EURUSD5.csv --combinations 200 --sampling sobol
+    python cli.py search --data EURUSD5.csv --genetic --population 40 --generations 15
+
+Formato de --config (JSON):
+    {
+        "data": "EURUSD5.csv",
+        "low_memory": false,
+        "runs": [
+            {"name": "conservadora", "params": {"ema1_period": 13, "expiry_minutes": 60}},
+            {"name": "agresiva", "params": {"ema1_period": 8, "expiry_minutes": 30}}
+        ]
+    }
+"""
+
+import time
+
+_T0 = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+
+
+class Timer:
+    """Marcas de tiempo desde el arranque del proceso"""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.marks = []
+
+    def mark(self, label: str):
+        self.marks.append((label, time.perf_counter() - _T0))
+
+    def report(self):
+        if not self.enabled:
+            return
+        print("\n⏱️ TIEMPOS DESDE EL ARRANQUE:", file=sys.stderr)
+        for label, elapsed in self.marks:
+            print(f"   {label:<28} {elapsed * 1000:9.1f} ms", file=sys.stderr)
+
+
+def _parse_value(text: str):
+    """Convertir el valor de --set al tipo más específico posible"""
+    lowered = text.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            continue
+    return text
+
+
+def _parse_overrides(items) -> dict:
+    params = {}
+    for item in items or []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise SystemExit(f"❌ --set espera clave=valor, recibido: {item}")
+        params[key.strip()] = _parse_value(value.strip())
+    return params
+
+
+def _load_config(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FeedCache:
+    """Carga cada archivo de datos una sola vez por proceso"""
+
+    def __init__(self, low_memory: bool = False, timeframe=None):
+        self.low_memory = low_memory
+        self.timeframe = timeframe
+        self.feeds = {}
+
+    def get(self, filename: str):
+        if filename not in self.feeds:
+            if self.timeframe:
+                # Temporalidad construida desde el archivo base (cacheada en disco)
+                from timeframes import TimeframePyramid
+
+                pyramid = TimeframePyramid(filename, timeframes=(self.timeframe,))
+                self.feeds[filename] = pyramid.feed(self.timeframe)
+            else:
+                from default import load_data, load_data_stream
+
+                loader = load_data_stream if self.low_memory else load_data
+                self.feeds[filename] = loader(filename)
+        return self.feeds[filename]
+
+
+def _fine_settlement(filename, data_feed, timeframe=None):
+    """Precios de liquidación M1/ticks para las señales de data_feed (o None)"""
+    if not filename:
+        return None
+    from settlement import FineSettlementPrices, feed_timestamps, infer_bar_minutes
+
+    signal_minutes = timeframe or infer_bar_minutes(feed_timestamps(data_feed))
+    return FineSettlementPrices.from_file(filename, signal_bar_minutes=signal_minutes)
+
+
+def _strategy_class(vectorized: bool):
+    """Estrategia a usar: SuperTrend y señales en bloque (--vectorized) o la original"""
+    if not vectorized:
+        return None
+    from default import VectorizedBinaryOptionsStrategy
+
+    return VectorizedBinaryOptionsStrategy
+
+
+def _summary(result: dict) -> dict:
+    summary = {key: value for key, value in result.items() if key != 'trade_log'}
+    for key in ('daily_pnl', 'daily_trades', 'daily_wins'):
+        if key in summary:
+            # JSON solo admite claves de texto
+            summary[key] = {str(day): value for day, value in summary[key].items()}
+    if 'outcomes' in summary:
+        # Secuencia ganado/perdido como texto '1011...'
+        summary['outcomes'] = ''.join('1' if won else '0' for won in summary['outcomes'])
+    return summary
+
+
+def cmd_backtest(args, timer: Timer) -> int:
+    config = _load_config(args.config) if args.config else {}
+    data_file = args.data or config.get('data')
+    if not data_file:
+        print("❌ Falta el archivo de datos (--data o 'data' en la configuración)")
+        return 2
+
+    low_memory = args.low_memory or config.get('low_memory', False)
+    runs = config.get('runs') or [{'name': 'default', 'params': {}}]
+    overrides = _parse_overrides(args.set)
+
+    feeds = FeedCache(low_memory, args.timeframe or config.get('timeframe'))
+    data_feed = feeds.get(data_file)
+    timer.mark('datos cargados')
+    if data_feed is None:
+        return 1
+
+    from default import print_results, run_single_backtest
+
+    fine_file = args.settle_with or config.get('settle_with')
+    fine = _fine_settlement(fine_file, data_feed, feeds.timeframe)
+    strategy_class = _strategy_class(args.vectorized or config.get('vectorized', False))
+
+    planned = []
+    for run in runs:
+        params = dict(run.get('params', {}), **overrides)
+        feed = feeds.get(run['data']) if 'data' in run else data_feed
+        if fine is not None and feed is data_feed:
+            params['fine_settlement'] = fine
+        planned.append((feed, params))
+
+    fleet_results = {}
+    if args.fleet or config.get('fleet', False):
+        # Una pasada de Cerebro por archivo de datos para todas sus configuraciones
+        from fleet import FleetRunner, print_fleet_stats
+
+        by_feed = {}
+        for n, (feed, _) in enumerate(planned):
+            by_feed.setdefault(id(feed), []).append(n)
+        for indexes in by_feed.values():
+            runner = FleetRunner(planned[indexes[0]][0], exactbars=1 if low_memory else 0,
+                                 strategy_class=strategy_class)
+            group_results = runner.run([planned[n][1] for n in indexes])
+            fleet_results.update(zip(indexes, group_results))
+            print_fleet_stats(runner.stats)
+        timer.mark('flota completada')
+
+    outputs = []
+    for n, run in enumerate(runs):
+        feed, params = planned[n]
+        if n in fleet_results:
+            result = fleet_results[n]
+        else:
+            result = run_single_backtest(feed, exactbars=1 if low_memory else 0,
+                                         strategy_class=strategy_class, **params)
+            timer.mark(f"resultado #{n + 1} ({run.get('name', n + 1)})")
+
+        if not args.quiet:
+            print(f"\n▶️ {run.get('name', f'run {n + 1}')}")
+            print_results(result)
+        if args.plot and result:
+            from report_plot import price_arrays, render_report
+
+            stem, extension = os.path.splitext(args.plot)
+            filename = args.plot if len(runs) == 1 else f"{stem}_{n + 1}{extension}"
+            render_report(*price_arrays(feed), result.get('trade_log'), filename=filename,
+                          title=f"{os.path.basename(data_file)} - {run.get('name', n + 1)}")
+            timer.mark(f"gráfico #{n + 1}")
+        outputs.append({'name': run.get('name', n + 1), 'params': params,
+                        'result': _summary(result) if result else None})
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(outputs, f, indent=2, ensure_ascii=False, default=str)
+        print(f"💾 Resultados guardados en: {args.json}")
+
+    return 0 if all(o['result'] for o in outputs) else 1
+
+
+def cmd_search(args, timer: Timer) -> int:
+    config = _load_config(args.config) if args.config else {}
+    options = dict(config.get('search', {}))
+    data_file = args.data or config.get('data')
+    if not data_file:
+        print("❌ Falta el archivo de datos (--data o 'data' en la configuración)")
+        return 2
+
+    for key in ('combinations', 'min_trades', 'min_win_rate', 'top'):
+        value = getattr(args, key)
+        if value is not None:
+            options[key] = value
+    low_memory = args.low_memory or config.get('low_memory', False)
+    if args.settlement_index and low_memory:
+        # El índice necesita todos los timestamps (PandasData); el streaming no los tiene
+        print("❌ --settlement-index no es compatible con --low-memory")
+        return 2
+    if (args.genetic or options.get('genetic')) and (args.outcomes or options.get('outcomes')):
+        # GeneticParameterSearch no registra outcomes: el archivo nunca se escribiría
+        print("❌ --outcomes no es compatible con --genetic")
+        return 2
+
+    timeframe = args.timeframe or config.get('timeframe')
+    data_feed = FeedCache(low_memory, timeframe).get(data_file)
+    timer.mark('datos cargados')
+    if data_feed is None:
+        return 1
+    fine = _fine_settlement(args.settle_with or config.get('settle_with'), data_feed, timeframe)
+
+    from telemetry import open_telemetry
+
+    telemetry = open_telemetry(args.telemetry or config.get('telemetry'), args.telemetry_interval)
+    search_kwargs = dict(max_top_results=options.get('top', 10), low_memory=low_memory,
+                         use_settlement_index=args.settlement_index, fine_settlement=fine,
+                         strategy_class=_strategy_class(args.vectorized or
+                                                        config.get('vectorized', False)))
+
+    stability = args.stability or options.get('stability', False)
+    if stability:
+        search_kwargs['objectives'] = ('stability',)
+    outcomes_file = args.outcomes or options.get('outcomes')
+    if args.genetic or options.get('genetic'):
+        from genetic_search import GeneticParameterSearch
+
+        optimizer = GeneticParameterSearch(data_feed, **search_kwargs)
+        results = optimizer.run_genetic_search(
+            population_size=args.population or options.get('population', 30),
+            generations=args.generations or options.get('generations', 10),
+            min_trades=options.get('min_trades', 10),
+            min_win_rate=options.get('min_win_rate', 50.0),
+            workers=args.workers or options.get('workers'),
+            seed=args.seed if args.seed is not None else options.get('seed'),
+            patience=options.get('patience'),
+            verbose=args.verbose,
+            telemetry=telemetry,
+        )
+    else:
+        from shearch import OptimizedParameterSearch
+
+        scheduled = args.scheduled or options.get('scheduled', False)
+        if outcomes_file:
+            from repricing import OutcomeStore
+
+            search_kwargs['outcome_store'] = OutcomeStore()
+        if stability:
+            from stability import StabilityStore, feed_day_range
+
+            search_kwargs['stability_store'] = StabilityStore(feed_day_range(data_feed))
+        search_options = dict(
+            max_combinations=options.get('combinations', 50),
+            min_trades=options.get('min_trades', 10),
+            min_win_rate=options.get('min_win_rate', 50.0),
+            verbose=args.verbose,
+            telemetry=telemetry,
+            sampling=args.sampling or options.get('sampling', 'random'),
+            seed=args.seed if args.seed is not None else options.get('seed'),
+        )
+        if scheduled:
+            from scheduling import ScheduledParameterSearch
+
+            optimizer = ScheduledParameterSearch(data_feed, **search_kwargs)
+            results = optimizer.run_scheduled_search(
+                workers=args.workers or options.get('workers', 1), **search_options)
+        else:
+            optimizer = OptimizedParameterSearch(data_feed, **search_kwargs)
+            results = optimizer.run_optimized_search(**search_options)
+    timer.mark('búsqueda completada')
+
+    output = args.output or config.get('output')
+    if results and output:
+        optimizer.save_optimized_results(results, output)
+    if results and getattr(optimizer, 'stability_store', None) is not None:
+        optimizer.run_stability_analysis(top_n=options.get('top', 5))
+        timer.mark('estabilidad calculada')
+    if results and (args.session_sweep or options.get('session_sweep')) and \
+            hasattr(optimizer, 'run_session_sweep'):
+        optimizer.run_session_sweep(top_n=options.get('session_top', 3),
+                                    min_trades=options.get('min_trades', 10))
+        timer.mark('sesiones barridas')
+    store = getattr(optimizer, 'outcome_store', None)
+    if store is not None and len(store):
+        store.save(outcomes_file)
+        print(f"💾 Resultados de {len(store)} combinaciones guardados en {outcomes_file}")
+    return 0 if results else 1
+
+
+def cmd_reprice(args, timer: Timer) -> int:
+    from repricing import OutcomeStore, parse_grid, print_store_repricing
+
+    try:
+        store = OutcomeStore.load(args.outcomes)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ No se pudo leer {args.outcomes}: {e}")
+        return 1
+    timer.mark('resultados cargados')
+    if not len(store):
+        print("❌ El archivo no contiene combinaciones")
+        return 1
+
+    print_store_repricing(store, parse_grid(args.payouts), stake=args.stake, top=args.top)
+    timer.mark('re-valoración completada')
+    return 0
+
+
+def cmd_ingest(args, timer: Timer) -> int:
+    from ingest import (DEFAULT_DATETIME_FORMAT, find_data_files, ingest_files,
+                        print_ingest_summary, save_index)
+
+    files = find_data_files(args.paths)
+    if not files:
+        print("❌ No se encontraron archivos de datos")
+        return 1
+
+    start = time.perf_counter()
+    entries = ingest_files(files, workers=args.workers, use_threads=args.threads,
+                           datetime_format=args.format or DEFAULT_DATETIME_FORMAT,
+                           repair=args.repair, force=args.force, verbose=not args.quiet)
+    print_ingest_summary(entries, time.perf_counter() - start)
+    timer.mark('ingesta completada')
+    if args.index:
+        save_index(entries, args.index)
+    return 0 if all(e['status'] not in ('invalid', 'error') for e in entries) else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Backtesting de opciones binarias sin menú interactivo")
+    parser.add_argument('--timing', action='store_true',
+                        help="Mostrar tiempos desde el arranque (stderr)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_bt = sub.add_parser('backtest', help="Ejecutar uno o varios backtests")
+    p_bt.add_argument('--data', help="Archivo CSV (separado por tabs)")
+    p_bt.add_argument('--config', help="Archivo JSON con 'data' y lista de 'runs'")
+    p_bt.add_argument('--set', action='append', metavar='CLAVE=VALOR',
+                      help="Sobrescribir un parámetro de la estrategia (repetible)")
+    p_bt.add_argument('--json', help="Guardar resultados en JSON")
+    p_bt.add_argument('--low-memory', action='store_true')
+    p_bt.add_argument('--timeframe', type=int, metavar='MINUTOS',
+                      help="Agregar el archivo base a esta temporalidad (cache en disco)")
+    p_bt.add_argument('--settle-with', metavar='ARCHIVO_M1',
+                      help="Liquidar con precios de este archivo de mayor resolución")
+    p_bt.add_argument('--vectorized', action='store_true',
+                      help="SuperTrend y señales en bloque (mismos trades, ~1.2x)")
+    p_bt.add_argument('--fleet', action='store_true',
+                      help="Ejecutar todos los runs en una sola pasada (indicadores compartidos)")
+    p_bt.add_argument('--plot', metavar='ARCHIVO',
+                      help="Gráfico reducido de precio, trades y equity (.png, .svg o .html)")
+    p_bt.add_argument('--quiet', action='store_true', help="No imprimir resultados")
+    p_bt.set_defaults(handler=cmd_backtest)
+
+    p_search = sub.add_parser('search', help="Búsqueda optimizada de parámetros")
+    p_search.add_argument('--data')
+    p_search.add_argument('--config', help="Archivo JSON con 'data' y sección 'search'")
+    p_search.add_argument('--combinations', type=int)
+    p_search.add_argument('--min-trades', type=int)
+    p_search.add_argument('--min-win-rate', type=float)
+    p_search.add_argument('--top', type=int)
+    p_search.add_argument('--output', help="Guardar los mejores resultados en JSON")
+    p_search.add_argument('--telemetry', help="Archivo JSONL o udp://host:puerto")
+    p_search.add_argument('--telemetry-interval', type=float, default=10.0)
+    p_search.add_argument('--low-memory', action='store_true')
+    p_search.add_argument('--timeframe', type=int, metavar='MINUTOS',
+                          help="Agregar el archivo base a esta temporalidad (cache en disco)")
+    p_search.add_argument('--settlement-index', action='store_true',
+                          help="Liquidar con el índice precalculado (no con --low-memory)")
+    p_search.add_argument('--settle-with', metavar='ARCHIVO_M1',
+                          help="Liquidar con precios de este archivo de mayor resolución")
+    p_search.add_argument('--vectorized', action='store_true',
+                          help="SuperTrend y señales en bloque (mismos trades, ~1.2x)")
+    p_search.add_argument('--genetic', action='store_true',
+                          help="Búsqueda evolutiva en lugar de muestreo de la grilla")
+    p_search.add_argument('--population', type=int, help="Tamaño de población (--genetic)")
+    p_search.add_argument('--generations', type=int, help="Generaciones (--genetic)")
+    p_search.add_argument('--workers', type=int, help="Procesos (--genetic / --scheduled)")
+    p_search.add_argument('--scheduled', action='store_true',
+                          help="Agrupar combinaciones por indicador y ejecutarlas en flotas")
+    p_search.add_argument('--sampling', choices=('random', 'sobol', 'lhs'),
+                          help="Muestreo de la grilla (default: random)")
+    p_search.add_argument('--seed', type=int, help="Semilla del muestreo o de --genetic")
+    p_search.add_argument('--outcomes', metavar='ARCHIVO_NPZ',
+                          help="Guardar la secuencia ganado/perdido de cada combinación "
+                               "(para 'reprice'; no con --genetic)")
+    p_search.add_argument('--stability', action='store_true',
+                          help="Rankear también por estabilidad y analizar ventanas de "
+                               "30/90/180 días del top")
+    p_search.add_argument('--session-sweep', action='store_true',
+                          help="Barrer ventanas de sesión (hora de inicio/fin) del top 3 "
+                               "con un backtest de candidatos por combinación")
+    p_search.add_argument('--verbose', action='store_true')
+    p_search.set_defaults(handler=cmd_search)
+
+    p_reprice = sub.add_parser('reprice', help="Re-valorar resultados guardados con otros payouts")
+    p_reprice.add_argument('--outcomes', required=True, metavar='ARCHIVO_NPZ',
+                           help="Archivo generado con 'search --outcomes'")
+    p_reprice.add_argument('--payouts', default='0.6:0.9:0.05',
+                           help="Lista '0.7,0.8' o rango 'inicio:fin:paso' (default: 0.6:0.9:0.05)")
+    p_reprice.add_argument('--stake', type=float, default=1.0)
+    p_reprice.add_argument('--top', type=int, default=5)
+    p_reprice.set_defaults(handler=cmd_reprice)
+
+    p_ingest = sub.add_parser('ingest', help="Validar, indexar y cachear muchos archivos de datos")
+    p_ingest.add_argument('paths', nargs='+', help="Archivos, directorios o patrones glob")
+    p_ingest.add_argument('--workers', type=int, help="Procesos (default: CPUs)")
+    p_ingest.add_argument('--threads', action='store_true', help="Hilos en lugar de procesos")
+    p_ingest.add_argument('--format', help="Formato de fecha fijo (default: %%Y-%%m-%%d %%H:%%M:%%S)")
+    p_ingest.add_argument('--repair', action='store_true',
+                          help="Ordenar y descartar filas malas y duplicados en lugar de rechazar")
+    p_ingest.add_argument('--force', action='store_true', help="Reconstruir caches al día")
+    p_ingest.add_argument('--index', help="Guardar el índice de huecos/duplicados en JSON")
+    p_ingest.add_argument('--quiet', action='store_true')
+    p_ingest.set_defaults(handler=cmd_ingest)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    timer = Timer(args.timing)
+    timer.mark('argumentos')
+    try:
+        return args.handler(args, timer)
+    finally:
+        timer.report()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
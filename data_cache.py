@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+data_cache.py - Cache binario de datos OHLCV para los backtests
+
+Formato: un directorio "<archivo>.cache/" junto al CSV con un .npy por columna
+(datetime en int64 ns, open/high/low/close/volume en float64) y un meta.json.
+Los .npy se pueden abrir con np.load(mmap_mode='r'), así que los arrays se
+leen sin parsear y sin copiarlos a memoria.
+
+Si el CSV crece por el final (exportaciones que se van agregando), solo se
+parsean los bytes nuevos y se agregan al cache.
+"""
+
+import io
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+CACHE_VERSION = 1
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+CSV_NAMES = ['datetime', 'open', 'high', 'low', 'close', 'volume']
+
+
+def cache_dir_for(filename: str) -> str:
+    """Directorio de cache asociado a un archivo de datos"""
+    return f"{filename}.cache"
+
+
+def parse_csv(source, datetime_format: Optional[str] = None,
+              errors: str = 'raise') -> Dict[str, np.ndarray]:
+    """
+    Parsear un CSV separado por tabs en el formato de load_data.
+    Con datetime_format fijo se evita la inferencia de pandas (mucho más rápido).
+    errors='coerce': las filas ilegibles quedan como NaT (int64 mínimo) / NaN en
+    lugar de abortar, y las que traen campos de más se saltan en silencio
+    (ingest.overlong_lines las ubica).
+    """
+    import pandas as pd
+
+    df = pd.read_csv(source, names=CSV_NAMES, sep='\t',
+                     on_bad_lines='error' if errors == 'raise' else 'skip')
+    timestamps = pd.to_datetime(df['datetime'], format=datetime_format, errors=errors)
+    arrays = {'datetime': np.asarray(timestamps.values, dtype='datetime64[ns]').view(np.int64)}
+    for column in COLUMNS:
+        values = df[column] if errors == 'raise' else pd.to_numeric(df[column], errors=errors)
+        arrays[column] = values.to_numpy(dtype=np.float64)
+    return arrays
+
+
+def write_cache(arrays: Dict[str, np.ndarray], cache_dir: str, meta: Optional[Dict] = None):
+    """Escribir los arrays y el meta.json (el meta se escribe al final)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    for column in ('datetime',) + COLUMNS:
+        tmp_path = os.path.join(cache_dir, f"{column}.tmp.npy")
+        np.save(tmp_path, np.ascontiguousarray(arrays[column]))
+        os.replace(tmp_path, os.path.join(cache_dir, f"{column}.npy"))
+
+    timestamps = arrays['datetime']
+    full_meta = {
+        'version': CACHE_VERSION,
+        'rows': int(len(timestamps)),
+        'first': int(timestamps[0]) if len(timestamps) else None,
+        'last': int(timestamps[-1]) if len(timestamps) else None,
+    }
+    full_meta.update(meta or {})
+    tmp_meta = os.path.join(cache_dir, 'meta.json.tmp')
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump(full_meta, f, indent=2)
+    os.replace(tmp_meta, os.path.join(cache_dir, 'meta.json'))
+
+
+def read_meta(cache_dir: str) -> Optional[Dict]:
+    path = os.path.join(cache_dir, 'meta.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        meta = json.load(f)
+    return meta if meta.get('version') == CACHE_VERSION else None
+
+
+def read_cache(cache_dir: str, mmap: bool = False) -> Dict[str, np.ndarray]:
+    """Leer los arrays de un cache (mmap=True: mapeados en memoria, solo lectura)"""
+    mode = 'r' if mmap else None
+    return {column: np.load(os.path.join(cache_dir, f"{column}.npy"), mmap_mode=mode)
+            for column in ('datetime',) + COLUMNS}
+
+
+def _source_signature(filename: str) -> Dict:
+    stat = os.stat(filename)
+    return {'source': os.path.abspath(filename), 'source_size': stat.st_size,
+            'source_mtime': stat.st_mtime}
+
+
+def _append_tail(filename: str, cache_dir: str, meta: Dict,
+                 datetime_format: Optional[str]) -> Optional[Dict[str, np.ndarray]]:
+    """Parsear solo lo agregado al CSV desde la última vez (None si no aplica)"""
+    with open(filename, 'rb') as f:
+        f.seek(meta['source_size'])
+        tail = f.read()
+    if not tail.strip():
+        return None
+
+    try:
+        new_arrays = parse_csv(io.BytesIO(tail), datetime_format)
+    except (ValueError, TypeError):
+        # La cola empieza a mitad de línea o trae filas ilegibles: reconstruir
+        return None
+    if len(new_arrays['datetime']) == 0 or new_arrays['datetime'][0] <= meta['last']:
+        return None  # No es un simple agregado al final: reconstruir
+
+    old_arrays = read_cache(cache_dir)
+    return {column: np.concatenate([old_arrays[column], new_arrays[column]])
+            for column in old_arrays}
+
+
+def repair_note(meta: Optional[Dict]) -> Optional[str]:
+    """Aviso para caches escritos por ingest.py --repair (None si es el CSV tal cual)"""
+    if not meta or not meta.get('repaired'):
+        return None
+    return (f"⚠️ Cache reparado por ingest --repair: {meta.get('dropped_rows', 0)} filas "
+            f"descartadas, ordenado y sin duplicados (no es el CSV tal cual)")
+
+
+def cache_is_fresh(filename: str, cache_dir: Optional[str] = None) -> bool:
+    """El cache existe y corresponde al tamaño y mtime actuales del archivo"""
+    meta = read_meta(cache_dir or cache_dir_for(filename))
+    signature = _source_signature(filename)
+    return bool(meta) and meta.get('source_size') == signature['source_size'] \
+        and meta.get('source_mtime') == signature['source_mtime']
+
+
+def load_fresh_frame(filename: str):
+    """
+    DataFrame desde el cache si está al día (escrito por ingest.py, timeframes o
+    load_cached_data); None si hay que parsear el CSV. No crea ni actualiza caches.
+    Si el cache fue reparado (ingest --repair) se avisa: no son las filas del CSV.
+    """
+    cache_dir = cache_dir_for(filename)
+    if not cache_is_fresh(filename, cache_dir):
+        return None
+    note = repair_note(read_meta(cache_dir))
+    if note:
+        print(note)
+    return arrays_to_frame(read_cache(cache_dir))
+
+
+def load_arrays(filename: str, cache_dir: Optional[str] = None,
+                datetime_format: Optional[str] = None,
+                mmap: bool = False) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Obtener los arrays de un archivo de datos usando el cache cuando es válido.
+    Retorna (arrays, meta). Si el archivo creció por el final, se agrega solo la cola.
+    Los caches reparados (ingest --repair) se usan igual, con aviso.
+    """
+    cache_dir = cache_dir or cache_dir_for(filename)
+    signature = _source_signature(filename)
+    meta = read_meta(cache_dir)
+
+    if cache_is_fresh(filename, cache_dir):
+        note = repair_note(meta)
+        if note:
+            print(note)
+        return read_cache(cache_dir, mmap=mmap), meta
+
+    arrays = None
+    if meta and meta.get('rows') and signature['source_size'] > meta.get('source_size', 0):
+        arrays = _append_tail(filename, cache_dir, meta, datetime_format)
+        if arrays is not None:
+            print(f"➕ Cache actualizado: {len(arrays['datetime']) - meta['rows']} velas nuevas")
+            # La cola se agrega a las filas reparadas: el cache sigue siendo reparado
+            signature.update({key: meta[key] for key in ('repaired', 'dropped_rows')
+                              if key in meta})
+            note = repair_note(meta)
+            if note:
+                print(note)
+
+    if arrays is None:
+        arrays = parse_csv(filename, datetime_format)
+
+    write_cache(arrays, cache_dir, signature)
+    meta = read_meta(cache_dir)
+    if mmap:
+        arrays = read_cache(cache_dir, mmap=True)
+    return arrays, meta
+
+
+def arrays_to_frame(arrays: Dict[str, np.ndarray]):
+    """DataFrame indexado por fecha, como el que produce load_data"""
+    import pandas as pd
+
+    index = pd.DatetimeIndex(np.asarray(arrays['datetime']).view('datetime64[ns]'),
+                             name='datetime')
+    return pd.DataFrame({column: np.asarray(arrays[column]) for column in COLUMNS},
+                        index=index)
+
+
+def arrays_to_feed(arrays: Dict[str, np.ndarray]):
+    """Feed de backtrader listo para run_single_backtest"""
+    import backtrader as bt
+
+    return bt.feeds.PandasData(dataname=arrays_to_frame(arrays))
+
+
+def load_cached_data(filename: str, datetime_format: Optional[str] = None):
+    """Equivalente a load_data, pero usando el cache binario"""
+    if not os.path.exists(filename):
+        print(f"❌ Archivo no encontrado: {filename}")
+        return None
+
+    try:
+        import backtrader as bt
+        
+        arrays, meta = load_arrays(filename, datetime_format=datetime_format)
+        frame = arrays_to_frame(arrays)
+        print(f"✅ Datos cargados: {len(frame)} velas (cache)")
+        print(f"📅 Periodo: {frame.index.min()} a {frame.index.max()}")
+        return bt.feeds.PandasData(dataname=frame)
+    except Exception as e:
+        print(f"❌ Error cargando datos: {str(e)}")
+        return None
@@ -1,10 +1,8 @@
 # default.py - Versión corregida
 import backtrader as bt
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import itertools
-from collections import defaultdict
+from collections import defaultdict, deque
 import os
 
 # Indicador SuperTrend personalizado
@@ -18,6 +16,13 @@ class SuperTrend(bt.Indicator):
     def __init__(self):
         self.atr = bt.indicators.ATR(self.data, period=self.params.period)
         self.hl_avg = (self.data.high + self.data.low) / 2.0
+    
+    def qbuffer(self, savemem=0):
+        super(SuperTrend, self).qbuffer(savemem=savemem)
+        # next() lee el valor anterior de sus propias líneas ([-1]), por lo que
+        # en modo de memoria reducida (exactbars) necesitan al menos 2 posiciones
+        for line in self.lines:
+            line.minbuffer(2)
         
     def next(self):
         # Verificar que tenemos suficientes datos
@@ -62,7 +67,58 @@ class SuperTrend(bt.Indicator):
                 prev_signal_bars = self.lines.signal_bars[-1] if len(self.lines.signal_bars) > 1 else 0
                 self.lines.signal_bars[0] = prev_signal_bars + 1 if prev_signal_bars < 999 else 999
 
+class BatchSuperTrend(SuperTrend):
+    """
+    SuperTrend con once(): en modo runonce recorre los arrays de ATR, (H+L)/2 y
+    cierre en un solo bucle, en lugar de una llamada a next() por barra a través
+    de los accesores de líneas. Mismos valores que SuperTrend (con exactbars,
+    sin runonce, se usa el next() heredado).
+    """
+
+    def once(self, start, end):
+        atr = self.atr.array
+        hl_avg = self.hl_avg.array
+        close = self.data.close.array
+        supertrend = self.lines.supertrend.array
+        trend = self.lines.trend.array
+        signal_bars = self.lines.signal_bars.array
+        multiplier = self.params.multiplier
+
+        nan = float('nan')
+        prev_supertrend = supertrend[start - 1] if start > 0 else nan
+        prev_trend = trend[start - 1] if start > 0 else nan
+        prev_signal_bars = signal_bars[start - 1] if start > 0 else nan
+        for i in range(start, end):
+            upper_band = hl_avg[i] + multiplier * atr[i]
+            lower_band = hl_avg[i] - multiplier * atr[i]
+
+            # Mismas ramas que SuperTrend.next (incluido min/max con NaN en la primera barra)
+            if prev_trend == 1:
+                if close[i] <= lower_band:
+                    current_supertrend, current_trend = upper_band, -1
+                else:
+                    current_supertrend, current_trend = max(lower_band, prev_supertrend), 1
+            else:
+                if close[i] >= upper_band:
+                    current_supertrend, current_trend = lower_band, 1
+                else:
+                    current_supertrend, current_trend = min(upper_band, prev_supertrend), -1
+
+            if prev_trend != current_trend:
+                current_signal_bars = 1
+            else:
+                current_signal_bars = prev_signal_bars + 1 if prev_signal_bars < 999 else 999
+
+            supertrend[i] = current_supertrend
+            trend[i] = current_trend
+            signal_bars[i] = current_signal_bars
+            prev_supertrend, prev_trend, prev_signal_bars = \
+                current_supertrend, current_trend, current_signal_bars
+
 class BinaryOptionsStrategy(bt.Strategy):
+    # Implementación del SuperTrend (VectorizedBinaryOptionsStrategy usa BatchSuperTrend)
+    supertrend_class = SuperTrend
+    
     params = (
         # Parámetros de EMAs
         ('ema1_period', 13),
@@ -96,6 +152,23 @@ class BinaryOptionsStrategy(bt.Strategy):
         ('timezone_offset', -4),
         ('enable_time_filter', False),
         
+        # Índice de liquidación precalculado (ver settlement.py): array con la
+        # barra de salida de cada barra de entrada. None = comparar datetimes
+        ('settlement_index', None),
+        
+        # Precios de liquidación de alta resolución (settlement.FineSettlementPrices):
+        # las señales usan esta vela, pero el precio de salida sale de M1/ticks.
+        # Si no hay dato fino después de la expiración se usa el cierre de la vela
+        ('fine_settlement', None),
+        
+        # Guardar cada trade en trade_log (la búsqueda ligera lo desactiva:
+        # BinaryOptionsAnalyzer calcula sus métricas en streaming)
+        ('keep_trade_log', True),
+        
+        # Dict compartido entre estrategias del mismo Cerebro (ver fleet.py): los
+        # indicadores con iguales parámetros se crean una sola vez para toda la flota
+        ('indicator_cache', None),
+        
         # Debug
         ('debug', False),
     )
@@ -111,21 +184,30 @@ class BinaryOptionsStrategy(bt.Strategy):
         
         # Indicadores técnicos
         try:
-            self.ema1 = bt.indicators.EMA(self.data.close, period=self.params.ema1_period)
-            
-            self.supertrend = SuperTrend(self.data, 
-                                       period=self.params.st_period,
-                                       multiplier=self.params.st_multiplier)
-            
-            self.adx = bt.indicators.ADX(self.data, period=self.params.adx_period)
-            self.rsi = bt.indicators.RSI(self.data.close, period=self.params.rsi_period)
+            self.ema1 = self._indicator(
+                ('ema', self.params.ema1_period),
+                lambda: bt.indicators.EMA(self.data.close, period=self.params.ema1_period))
+            
+            self.supertrend = self._indicator(
+                (self.supertrend_class.__name__, self.params.st_period, self.params.st_multiplier),
+                lambda: self.supertrend_class(self.data, 
+                                              period=self.params.st_period,
+                                              multiplier=self.params.st_multiplier))
+            
+            self.adx = self._indicator(
+                ('adx', self.params.adx_period),
+                lambda: bt.indicators.ADX(self.data, period=self.params.adx_period))
+            self.rsi = self._indicator(
+                ('rsi', self.params.rsi_period),
+                lambda: bt.indicators.RSI(self.data.close, period=self.params.rsi_period))
             
         except Exception as e:
             print(f"❌ Error inicializando indicadores: {e}")
             raise
         
-        # Control de trades
-        self.pending_trades = []
+        # Control de trades (en orden de entrada, que con settlement_index es
+        # también el orden de la barra de salida)
+        self.pending_trades = deque()
         self.last_trade_time = None
         self.daily_trades = defaultdict(int)
         
@@ -138,6 +220,31 @@ class BinaryOptionsStrategy(bt.Strategy):
         # Log de trades
         self.trade_log = []
 
+    def _indicator(self, key, factory):
+        """
+        Crear un indicador o reutilizar el de otra estrategia de la flota.
+        El indicador compartido lo calcula la estrategia que lo creó (se ejecuta
+        antes en cada barra), así que aquí solo se ajusta el mínimo de barras.
+        """
+        cache = self.params.indicator_cache
+        if cache is None:
+            return factory()
+        
+        key = (id(self.data),) + key
+        if key in cache:
+            indicator = cache[key]
+            # next() se llama antes del minperiod de los indicadores prestados
+            self.min_bars_needed = max(self.min_bars_needed, indicator._minperiod)
+            return indicator
+        
+        indicator = cache[key] = factory()
+        return indicator
+    
+    def start(self):
+        # Analizadores que reciben cada liquidación (métricas en streaming)
+        self._settlement_listeners = [analyzer for analyzer in self.analyzers
+                                      if hasattr(analyzer, 'notify_settlement')]
+    
     def is_trading_time(self, current_time):
         """Verificar si la hora actual está dentro del horario de trading"""
         if not self.params.enable_time_filter:
@@ -287,6 +394,16 @@ class BinaryOptionsStrategy(bt.Strategy):
                 'amount': self.params.trade_amount
             }
             
+            if self.params.settlement_index is not None:
+                # Posición de la barra de liquidación, resuelta una sola vez
+                trade_info['exit_bar'] = int(self.params.settlement_index[len(self.data) - 1])
+            
+            if self.params.fine_settlement is not None:
+                # Una búsqueda binaria por trade en los datos de alta resolución
+                fine_exit = self.params.fine_settlement.lookup(expiry_time)
+                if fine_exit is not None:
+                    trade_info['exit_time'], trade_info['exit_price'] = fine_exit
+            
             self.pending_trades.append(trade_info)
             self.last_trade_time = entry_time
             self.daily_trades[entry_time.date()] += 1
@@ -302,8 +419,16 @@ class BinaryOptionsStrategy(bt.Strategy):
     
     def check_expired_trades(self, current_time):
         """Verificar trades que han expirado y calcular resultados"""
-        expired_trades = []
+        if self.params.settlement_index is not None:
+            # El índice es monótono: solo puede haber expirado el frente de la cola
+            pending_trades = self.pending_trades
+            if pending_trades:
+                current_bar = len(self.data) - 1
+                while pending_trades and pending_trades[0]['exit_bar'] <= current_bar:
+                    self.settle_trade(pending_trades.popleft(), current_time)
+            return
         
+        expired_trades = []
         for trade in self.pending_trades:
             if current_time >= trade['expiry_time']:
                 expired_trades.append(trade)
@@ -315,7 +440,8 @@ class BinaryOptionsStrategy(bt.Strategy):
     def settle_trade(self, trade, current_time):
         """Liquidar trade expirado"""
         try:
-            current_price = self.data.close[0]
+            current_price = trade.get('exit_price', self.data.close[0])
+            current_time = trade.get('exit_time', current_time)
             entry_price = trade['entry_price']
             trade_type = trade['type']
             amount = trade['amount']
@@ -337,17 +463,21 @@ class BinaryOptionsStrategy(bt.Strategy):
             self.total_pnl += pnl
             self.total_trades += 1
             
+            for listener in self._settlement_listeners:
+                listener.notify_settlement(pnl, won, current_time)
+            
             # Guardar en log
-            trade_result = {
-                'entry_time': trade['entry_time'],
-                'expiry_time': current_time,
-                'type': trade_type,
-                'entry_price': entry_price,
-                'exit_price': current_price,
-                'result': 'WIN' if won else 'LOSS',
-                'pnl': pnl
-            }
-            self.trade_log.append(trade_result)
+            if self.params.keep_trade_log:
+                trade_result = {
+                    'entry_time': trade['entry_time'],
+                    'expiry_time': current_time,
+                    'type': trade_type,
+                    'entry_price': entry_price,
+                    'exit_price': current_price,
+                    'result': 'WIN' if won else 'LOSS',
+                    'pnl': pnl
+                }
+                self.trade_log.append(trade_result)
             
             # Log del resultado
             if self.params.debug:
@@ -359,12 +489,155 @@ class BinaryOptionsStrategy(bt.Strategy):
             if self.params.debug:
                 print(f"❌ Error en settle_trade: {e}")
 
+class VectorizedBinaryOptionsStrategy(BinaryOptionsStrategy):
+    """
+    Variante de BinaryOptionsStrategy con las condiciones CALL/PUT declaradas como
+    expresiones de líneas de backtrader. En modo runonce se calculan en bloque para
+    toda la serie antes de recorrer las barras; next() solo maneja la parte con
+    estado (límite diario, espaciado, expiración y liquidación). SuperTrend se
+    calcula con BatchSuperTrend.
+    Produce los mismos trades que BinaryOptionsStrategy. La ganancia es modesta
+    (~1.15-1.25x en parity.py --synthetic 2): la lectura del feed barra a barra
+    (PandasData._load) no cambia y es más de la mitad del tiempo del backtest.
+    """
+    
+    supertrend_class = BatchSuperTrend
+    
+    def __init__(self):
+        super(VectorizedBinaryOptionsStrategy, self).__init__()
+        
+        # Condiciones comunes: SuperTrend con las velas de retraso requeridas y ADX fuerte
+        st_ready = self.supertrend.signal_bars >= self.params.supertrend_delay_bars
+        strong_trend = self.adx > self.params.adx_threshold
+        
+        self.call_signal = bt.And(self.data.close > self.ema1,
+                                  self.supertrend.trend == 1,
+                                  st_ready, strong_trend,
+                                  self.rsi < self.params.rsi_overbought)
+        self.put_signal = bt.And(self.data.close < self.ema1,
+                                 self.supertrend.trend == -1,
+                                 st_ready, strong_trend,
+                                 self.rsi > self.params.rsi_oversold)
+    
+    def check_call_conditions(self):
+        return bool(self.call_signal[0])
+    
+    def check_put_conditions(self):
+        return bool(self.put_signal[0])
+    
+    def next(self):
+        if len(self.data) < self.min_bars_needed:
+            return
+        
+        is_call = self.call_signal[0]
+        is_put = not is_call and self.put_signal[0]
+        
+        # Sin trades abiertos ni señal no hay nada que hacer en esta barra
+        if not (is_call or is_put or self.pending_trades):
+            return
+        
+        current_time = self.data.datetime.datetime(0)
+        if self.pending_trades:
+            self.check_expired_trades(current_time)
+        
+        if not (is_call or is_put):
+            return
+        if not self.is_trading_time(current_time):
+            return
+        if self.should_skip_trade(current_time, current_time.date()):
+            return
+        
+        self.enter_binary_trade('CALL' if is_call else 'PUT', current_time)
+
 class BinaryOptionsAnalyzer(bt.Analyzer):
-    """Analizador personalizado para métricas de opciones binarias"""
+    """
+    Analizador personalizado para métricas de opciones binarias.
+    Las métricas de riesgo se actualizan en O(1) por trade liquidado
+    (notify_settlement), sin necesidad de conservar el trade_log.
+    """
     
     def __init__(self):
         self.results = {}
         
+        # Curva de equity (P&L acumulado desde 0)
+        self.equity = 0.0
+        self.peak_equity = 0.0
+        self.max_drawdown = 0.0
+        
+        # Rachas
+        self.current_losing_streak = 0
+        self.max_losing_streak = 0
+        self.current_winning_streak = 0
+        self.max_winning_streak = 0
+        
+        # P&L, trades y ganados por día de liquidación (ver stability.py)
+        self.daily_pnl = defaultdict(float)
+        self.daily_trades = defaultdict(int)
+        self.daily_wins = defaultdict(int)
+        
+        # Media y varianza del P&L por trade (Welford) para la expectativa
+        self.settled_count = 0
+        self.pnl_mean = 0.0
+        self.pnl_m2 = 0.0
+        
+        # Secuencia compacta de resultados (1 = ganado) en orden de liquidación,
+        # suficiente para re-valorar payouts y stakes sin backtest (ver repricing.py)
+        self.outcomes = bytearray()
+    
+    def notify_settlement(self, pnl, won, settle_time):
+        """Actualizar las métricas con un trade liquidado"""
+        self.equity += pnl
+        if self.equity > self.peak_equity:
+            self.peak_equity = self.equity
+        drawdown = self.peak_equity - self.equity
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+        
+        if won:
+            self.current_winning_streak += 1
+            self.current_losing_streak = 0
+            if self.current_winning_streak > self.max_winning_streak:
+                self.max_winning_streak = self.current_winning_streak
+        else:
+            self.current_losing_streak += 1
+            self.current_winning_streak = 0
+            if self.current_losing_streak > self.max_losing_streak:
+                self.max_losing_streak = self.current_losing_streak
+        
+        day = settle_time.date()
+        self.daily_pnl[day] += pnl
+        self.daily_trades[day] += 1
+        if won:
+            self.daily_wins[day] += 1
+        self.outcomes.append(1 if won else 0)
+        
+        self.settled_count += 1
+        delta = pnl - self.pnl_mean
+        self.pnl_mean += delta / self.settled_count
+        self.pnl_m2 += delta * (pnl - self.pnl_mean)
+    
+    def streaming_metrics(self):
+        """Métricas de riesgo acumuladas hasta ahora"""
+        count = self.settled_count
+        pnl_std = (self.pnl_m2 / (count - 1)) ** 0.5 if count > 1 else 0.0
+        daily_values = list(self.daily_pnl.values())
+        return {
+            'max_drawdown': self.max_drawdown,
+            'peak_equity': self.peak_equity,
+            'max_losing_streak': self.max_losing_streak,
+            'max_winning_streak': self.max_winning_streak,
+            'expectancy': self.pnl_mean,
+            'expectancy_stderr': pnl_std / count ** 0.5 if count > 0 else 0.0,
+            'pnl_std': pnl_std,
+            'trading_days': len(daily_values),
+            'best_day_pnl': max(daily_values) if daily_values else 0.0,
+            'worst_day_pnl': min(daily_values) if daily_values else 0.0,
+            'daily_pnl': dict(self.daily_pnl),
+            'daily_trades': dict(self.daily_trades),
+            'daily_wins': dict(self.daily_wins),
+            'outcomes': bytes(self.outcomes),
+        }
+        
     def stop(self):
         strategy = self.strategy
         
@@ -389,6 +662,7 @@ class BinaryOptionsAnalyzer(bt.Analyzer):
                 'profit_factor': profit_factor,
                 'trade_log': strategy.trade_log
             }
+            self.results.update(self.streaming_metrics())
         else:
             # Retornar estructura vacía pero válida
             self.results = {
@@ -401,6 +675,7 @@ class BinaryOptionsAnalyzer(bt.Analyzer):
                 'profit_factor': 0,
                 'trade_log': []
             }
+            self.results.update(self.streaming_metrics())
 
 def load_data(filename):
     """Cargar datos desde CSV"""
@@ -408,15 +683,23 @@ def load_data(filename):
         print(f"❌ Archivo no encontrado: {filename}")
         return None
     
+    # pandas solo se importa al cargar datos (arranque rápido en la CLI)
+    import pandas as pd
+    from data_cache import load_fresh_frame
+    
     try:
-        df = pd.read_csv(filename, 
-                        names=['datetime', 'open', 'high', 'low', 'close', 'volume'],
-                        sep='\t')
-        
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        df.set_index('datetime', inplace=True)
-        
-        print(f"✅ Datos cargados: {len(df)} velas")
+        # Cache binario al día (python ingest.py): sin parsear el CSV
+        df = load_fresh_frame(filename)
+        source = " (cache)" if df is not None else ""
+        if df is None:
+            df = pd.read_csv(filename, 
+                            names=['datetime', 'open', 'high', 'low', 'close', 'volume'],
+                            sep='\t')
+            
+            df['datetime'] = pd.to_datetime(df['datetime'])
+            df.set_index('datetime', inplace=True)
+        
+        print(f"✅ Datos cargados: {len(df)} velas{source}")
         print(f"📅 Periodo: {df.index.min()} a {df.index.max()}")
         
         return bt.feeds.PandasData(dataname=df)
@@ -424,15 +707,43 @@ def load_data(filename):
         print(f"❌ Error cargando datos: {str(e)}")
         return None
 
-def run_single_backtest(data_feed, **params):
-    """Ejecutar un backtest con parámetros específicos"""
+def load_data_stream(filename, dtformat='%Y-%m-%d %H:%M:%S'):
+    """
+    Crear un feed que lee el CSV directamente del disco, sin DataFrame.
+    Pensado para el modo de memoria reducida (exactbars=1) con historiales muy largos:
+    el archivo se vuelve a leer en cada backtest, pero la memoria no crece con su tamaño.
+    """
+    if not os.path.exists(filename):
+        print(f"❌ Archivo no encontrado: {filename}")
+        return None
+    
+    return bt.feeds.GenericCSVData(
+        dataname=filename,
+        separator='\t',
+        headers=False,
+        dtformat=dtformat,
+        datetime=0, time=-1,
+        open=1, high=2, low=3, close=4, volume=5,
+        openinterest=-1,
+        timeframe=bt.TimeFrame.Minutes,
+    )
+
+def run_single_backtest(data_feed, exactbars=0, strategy_class=None, **params):
+    """
+    Ejecutar un backtest con parámetros específicos.
+    exactbars=1 activa el modo de memoria reducida de backtrader: cada línea guarda solo
+    las barras que necesita su lookback (más lento, sin runonce ni gráficos).
+    strategy_class: BinaryOptionsStrategy por defecto; VectorizedBinaryOptionsStrategy
+    calcula SuperTrend y las señales en bloque (mismos trades, ~1.2x: la lectura
+    del feed por barra sigue dominando).
+    """
     try:
-        cerebro = bt.Cerebro()
+        cerebro = bt.Cerebro(exactbars=exactbars)
         cerebro.broker.setcash(100.0) 
         cerebro.adddata(data_feed)
         
         # Agregar estrategia con parámetros
-        cerebro.addstrategy(BinaryOptionsStrategy, **params)
+        cerebro.addstrategy(strategy_class or BinaryOptionsStrategy, **params)
         cerebro.addanalyzer(BinaryOptionsAnalyzer, _name='binary_analyzer')
         
         # Ejecutar
@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+distributed_search.py - Búsqueda distribuida coordinador/workers
+
+El coordinador divide el espacio de parámetros en "leases" (lotes de
+combinaciones) y los sirve por un socket TCP local o por una cola en un
+directorio compartido. Los workers toman leases, ejecutan los backtests y
+devuelven resultados compactos. Si un worker muere, su lease expira y se
+vuelve a emitir.
+
+Uso:
+    python distributed_search.py coordinator --bind 127.0.0.1:5555 --combinations 500
+    python distributed_search.py worker --data EURUSD5.csv --connect 127.0.0.1:5555
+
+    python distributed_search.py coordinator --queue-dir /mnt/shared/queue
+    python distributed_search.py worker --data EURUSD5.csv --queue-dir /mnt/shared/queue
+
+    python distributed_search.py local --data EURUSD5.csv --workers 4
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from shearch import OptimizedParameterSearch
+
+# Métricas que viajan del worker al coordinador (sin trade_log)
+COMPACT_FIELDS = ('total_trades', 'winning_trades', 'losing_trades', 'win_rate',
+                  'total_pnl', 'avg_pnl_per_trade', 'profit_factor', 'max_drawdown',
+                  'max_losing_streak', 'max_winning_streak', 'expectancy', 'worst_day_pnl',
+                  'stability')
+
+
+def compact_result(result: Optional[Dict]) -> Optional[Dict]:
+    """Reducir un resultado de backtest a las métricas esenciales"""
+    if not result:
+        return None
+    return {key: result[key] for key in COMPACT_FIELDS if key in result}
+
+
+class SearchCoordinator:
+    """Reparte leases de combinaciones y consolida los resultados"""
+
+    def __init__(self, search: OptimizedParameterSearch, param_sets: List[Dict],
+                 lease_size: int = 10, lease_timeout: float = 300.0,
+                 min_trades: int = 10, min_win_rate: float = 50.0):
+        self.search = search
+        self.lease_timeout = lease_timeout
+        self.min_trades = min_trades
+        self.min_win_rate = min_win_rate
+
+        # Cada lease es una lista de (combination_id, params)
+        self.leases: Dict[int, List[Tuple[int, Dict]]] = {}
+        for start in range(0, len(param_sets), lease_size):
+            lease_id = len(self.leases) + 1
+            self.leases[lease_id] = [(start + i + 1, params) for i, params
+                                     in enumerate(param_sets[start:start + lease_size])]
+
+        self.pending = deque(self.leases.keys())
+        self.active: Dict[int, Tuple[str, float]] = {}  # lease_id -> (worker, deadline)
+        self.completed = set()
+        self.reissued_count = 0
+        self.early_stop_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def filters(self) -> Dict:
+        """
+        Datos que viajan con cada lease: filtros (solo para la telemetría del
+        worker) y cada cuánto enviar heartbeats para que el lease no expire
+        """
+        return {'min_trades': self.min_trades, 'min_win_rate': self.min_win_rate,
+                'heartbeat_interval': max(0.1, self.lease_timeout / 3)}
+
+    @property
+    def finished(self) -> bool:
+        return len(self.completed) == len(self.leases)
+
+    def _reap_expired(self):
+        """Devolver a la cola los leases cuyo worker no respondió a tiempo"""
+        now = time.monotonic()
+        for lease_id, (worker, deadline) in list(self.active.items()):
+            if now >= deadline:
+                del self.active[lease_id]
+                self.pending.appendleft(lease_id)
+                self.reissued_count += 1
+                print(f"♻️ Lease {lease_id} expirado ({worker}), se re-emite")
+
+    def acquire(self, worker: str) -> Dict:
+        """Asignar el siguiente lease disponible a un worker"""
+        with self.lock:
+            self._reap_expired()
+            while self.pending:
+                lease_id = self.pending.popleft()
+                if lease_id in self.completed:
+                    continue
+                self.active[lease_id] = (worker, time.monotonic() + self.lease_timeout)
+                return {'status': 'lease', 'lease_id': lease_id,
+                        'items': self.leases[lease_id], **self.filters}
+
+            if self.finished:
+                return {'status': 'done'}
+            # Quedan leases activos que podrían expirar
+            return {'status': 'wait', 'retry_after': min(1.0, self.lease_timeout / 10)}
+
+    def heartbeat(self, lease_id: int, worker: str) -> bool:
+        """Extender el plazo de un lease en curso"""
+        with self.lock:
+            holder = self.active.get(lease_id)
+            if holder is None or holder[0] != worker:
+                return False
+            self.active[lease_id] = (worker, time.monotonic() + self.lease_timeout)
+            return True
+
+    def complete(self, lease_id: int, results: List) -> bool:
+        """Registrar los resultados de un lease (los duplicados se ignoran)"""
+        with self.lock:
+            if lease_id in self.completed or lease_id not in self.leases:
+                return False
+
+            params_by_id = dict(self.leases[lease_id])
+            for combo_id, result in results:
+                self.search.total_tested += 1
+                if not result:
+                    continue
+                opt_result = self.search._register_result(
+                    result, params_by_id[combo_id], combo_id,
+                    self.min_trades, self.min_win_rate
+                )
+                if opt_result is None:
+                    self.early_stop_count += 1
+
+            self.completed.add(lease_id)
+            self.active.pop(lease_id, None)
+
+            done = len(self.completed)
+            total = len(self.leases)
+            if done == total or done % max(1, total // 10) == 0:
+                print(f"⚡ Leases: {done}/{total} | "
+                      f"Válidos: {self.search.valid_count}/{self.search.total_tested} | "
+                      f"Re-emitidos: {self.reissued_count}")
+            return True
+
+
+# ---------------------------------------------------------------------------
+# Transporte TCP (JSON por líneas)
+# ---------------------------------------------------------------------------
+
+class _CoordinatorHandler(socketserver.StreamRequestHandler):
+    """Atiende peticiones JSON de un worker, una por línea"""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op = request.get('op')
+                if op == 'acquire':
+                    response = coordinator.acquire(request.get('worker', '?'))
+                elif op == 'heartbeat':
+                    response = {'ok': coordinator.heartbeat(request['lease_id'],
+                                                            request.get('worker', '?'))}
+                elif op == 'complete':
+                    response = {'ok': coordinator.complete(request['lease_id'],
+                                                           request['results'])}
+                else:
+                    response = {'error': f"operación desconocida: {op}"}
+            except Exception as e:
+                response = {'error': str(e)}
+
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class _CoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve_tcp(coordinator: SearchCoordinator, host: str = '127.0.0.1',
+              port: int = 5555, poll_interval: float = 0.5):
+    """Servir leases por TCP hasta que todos estén completos"""
+    with _CoordinatorServer((host, port), _CoordinatorHandler) as server:
+        server.coordinator = coordinator
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        print(f"📡 Coordinador escuchando en {host}:{server.server_address[1]}")
+
+        while not coordinator.finished:
+            time.sleep(poll_interval)
+            with coordinator.lock:
+                coordinator._reap_expired()
+
+        # Dar tiempo a los workers en espera para recibir el estado 'done'
+        time.sleep(max(poll_interval, 2.0))
+        server.shutdown()
+
+
+class TCPWorkerClient:
+    """Cliente de un worker contra el coordinador TCP"""
+
+    def __init__(self, host: str, port: int, timeout: float = 30.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.stream = self.sock.makefile('rwb')
+        # El hilo de heartbeats comparte la conexión con el worker
+        self.lock = threading.Lock()
+
+    def _call(self, request: Dict) -> Dict:
+        with self.lock:
+            self.stream.write((json.dumps(request) + '\n').encode('utf-8'))
+            self.stream.flush()
+            line = self.stream.readline()
+        if not line:
+            raise ConnectionError("El coordinador cerró la conexión")
+        return json.loads(line)
+
+    def acquire(self, worker: str) -> Dict:
+        return self._call({'op': 'acquire', 'worker': worker})
+
+    def heartbeat(self, lease_id: int, worker: str):
+        self._call({'op': 'heartbeat', 'lease_id': lease_id, 'worker': worker})
+
+    def complete(self, lease_id: int, worker: str, results: List):
+        self._call({'op': 'complete', 'lease_id': lease_id, 'worker': worker,
+                    'results': results})
+
+    def close(self):
+        try:
+            self.stream.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Transporte por directorio compartido
+# ---------------------------------------------------------------------------
+
+class DirectoryQueue:
+    """
+    Cola de leases sobre un directorio compartido.
+
+    pending/   leases sin asignar
+    claimed/   leases tomados (rename atómico; el mtime es el heartbeat)
+    results/   resultados publicados por los workers
+    DONE       marca de finalización
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.pending_dir = os.path.join(root, 'pending')
+        self.claimed_dir = os.path.join(root, 'claimed')
+        self.results_dir = os.path.join(root, 'results')
+        self.done_marker = os.path.join(root, 'DONE')
+        for path in (self.pending_dir, self.claimed_dir, self.results_dir):
+            os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def _lease_name(lease_id: int) -> str:
+        return f"lease_{lease_id:06d}.json"
+
+    @staticmethod
+    def _lease_id(filename: str) -> int:
+        return int(filename.split('.')[0].split('_')[1])
+
+    def _write_atomic(self, path: str, payload: Dict):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    # --- lado coordinador ---
+
+    def reset(self):
+        """Vaciar la cola de ejecuciones anteriores"""
+        if os.path.exists(self.done_marker):
+            os.remove(self.done_marker)
+        for path in (self.pending_dir, self.claimed_dir, self.results_dir):
+            for filename in os.listdir(path):
+                os.remove(os.path.join(path, filename))
+
+    def publish(self, coordinator: SearchCoordinator):
+        """Escribir todos los leases en pending/"""
+        self.reset()
+        for lease_id, items in coordinator.leases.items():
+            self._write_atomic(os.path.join(self.pending_dir, self._lease_name(lease_id)),
+                               {'lease_id': lease_id, 'items': items,
+                                **coordinator.filters})
+        coordinator.pending.clear()
+
+    def collect(self, coordinator: SearchCoordinator):
+        """Consumir resultados publicados y re-emitir leases expirados"""
+        for filename in sorted(os.listdir(self.results_dir)):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(self.results_dir, filename)
+            with open(path, encoding='utf-8') as f:
+                payload = json.load(f)
+            coordinator.complete(payload['lease_id'], payload['results'])
+            os.remove(path)
+
+        # Un lease re-emitido cuyo resultado original llegó después sigue en pending/
+        for filename in os.listdir(self.pending_dir):
+            if filename.endswith('.json') and self._lease_id(filename) in coordinator.completed:
+                try:
+                    os.remove(os.path.join(self.pending_dir, filename))
+                except FileNotFoundError:
+                    continue  # Un worker lo tomó entretanto
+
+        now = time.time()
+        for filename in os.listdir(self.claimed_dir):
+            path = os.path.join(self.claimed_dir, filename)
+            lease_id = self._lease_id(filename)
+            try:
+                if lease_id in coordinator.completed:
+                    os.remove(path)
+                elif now - os.path.getmtime(path) >= coordinator.lease_timeout:
+                    os.replace(path, os.path.join(self.pending_dir,
+                                                  self._lease_name(lease_id)))
+                    coordinator.reissued_count += 1
+                    print(f"♻️ Lease {lease_id} expirado, se re-emite")
+            except FileNotFoundError:
+                continue  # El worker lo movió entretanto
+
+    def serve(self, coordinator: SearchCoordinator, poll_interval: float = 0.5):
+        """Publicar leases y esperar a que todos estén completos"""
+        self.publish(coordinator)
+        print(f"📂 Cola publicada en {self.root} ({len(coordinator.leases)} leases)")
+        while not coordinator.finished:
+            time.sleep(poll_interval)
+            self.collect(coordinator)
+        with open(self.done_marker, 'w') as f:
+            f.write(str(time.time()))
+
+    # --- lado worker ---
+
+    def acquire(self, worker: str) -> Dict:
+        for filename in sorted(os.listdir(self.pending_dir)):
+            if not filename.endswith('.json'):
+                continue
+            claimed_path = os.path.join(self.claimed_dir, f"{filename[:-5]}.{worker}.json")
+            try:
+                os.rename(os.path.join(self.pending_dir, filename), claimed_path)
+            except FileNotFoundError:
+                continue  # Otro worker lo tomó primero
+            os.utime(claimed_path)
+            with open(claimed_path, encoding='utf-8') as f:
+                payload = json.load(f)
+            payload['status'] = 'lease'
+            return payload
+
+        if os.path.exists(self.done_marker):
+            return {'status': 'done'}
+        return {'status': 'wait', 'retry_after': 1.0}
+
+    def heartbeat(self, lease_id: int, worker: str):
+        claimed_path = os.path.join(self.claimed_dir,
+                                    f"{self._lease_name(lease_id)[:-5]}.{worker}.json")
+        try:
+            os.utime(claimed_path)
+        except FileNotFoundError:
+            pass  # Re-emitido; el coordinador ignorará el duplicado
+
+    def complete(self, lease_id: int, worker: str, results: List):
+        self._write_atomic(os.path.join(self.results_dir,
+                                        f"{self._lease_name(lease_id)[:-5]}.{worker}.json"),
+                           {'lease_id': lease_id, 'worker': worker, 'results': results})
+
+    def close(self):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def _telemetry_status(result: Optional[Dict], lease: Dict) -> str:
+    if not result:
+        return 'empty'
+    if (result['total_trades'] < lease.get('min_trades', 0) or
+            result['win_rate'] < lease.get('min_win_rate', 0)):
+        return 'early_stop'
+    return 'valid'
+
+
+class LeaseHeartbeat:
+    """
+    Hilo que extiende el lease mientras el worker lo procesa, para que un
+    backtest más largo que lease_timeout no haga re-emitir el lease en curso
+    """
+
+    def __init__(self, transport, lease_id: int, worker: str, interval: float):
+        self.transport = transport
+        self.lease_id = lease_id
+        self.worker = worker
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       name=f"heartbeat-{lease_id}")
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.transport.heartbeat(self.lease_id, self.worker)
+            except OSError as e:
+                print(f"⚠️ Worker {self.worker}: heartbeat del lease {self.lease_id} "
+                      f"fallido ({e})")
+                return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_worker(data_file: str, transport, worker_id: Optional[str] = None,
+               max_idle: float = 600.0, low_memory: bool = False, telemetry=None):
+    """
+    Tomar leases, ejecutar backtests y devolver resultados compactos.
+    telemetry: TelemetrySink opcional con el rendimiento de este worker
+    """
+    from default import load_data, load_data_stream
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    data_feed = load_data_stream(data_file) if low_memory else load_data(data_file)
+    if data_feed is None:
+        return 0
+
+    search = OptimizedParameterSearch(data_feed, low_memory=low_memory)
+    processed = 0
+    if telemetry:
+        telemetry.start(data_file=data_file)
+    idle_since = time.monotonic()
+
+    try:
+        while True:
+            try:
+                response = transport.acquire(worker_id)
+            except OSError as e:
+                # El coordinador terminó o se cayó
+                print(f"⚠️ Worker {worker_id}: coordinador no disponible ({e})")
+                break
+            status = response.get('status')
+
+            if status == 'done':
+                break
+            if status == 'wait':
+                if time.monotonic() - idle_since > max_idle:
+                    print(f"⚠️ Worker {worker_id}: sin trabajo durante {max_idle:.0f}s")
+                    break
+                time.sleep(response.get('retry_after', 1.0))
+                continue
+            if status != 'lease':
+                raise RuntimeError(f"Respuesta inesperada del coordinador: {response}")
+
+            lease_id = response['lease_id']
+            results = []
+            with LeaseHeartbeat(transport, lease_id, worker_id,
+                                response.get('heartbeat_interval', 10.0)):
+                for combo_id, params in response['items']:
+                    combo_start = time.perf_counter()
+                    status = 'error'
+                    try:
+                        result = compact_result(search._run_lightweight_backtest(params))
+                        status = _telemetry_status(result, response)
+                    except Exception as e:
+                        print(f"❌ Worker {worker_id}: error en #{combo_id}: {e}")
+                        result = None
+                    results.append([combo_id, result])
+                    if telemetry:
+                        telemetry.record(time.perf_counter() - combo_start, status,
+                                         bars=search._bars_processed())
+
+            try:
+                transport.complete(lease_id, worker_id, results)
+            except OSError as e:
+                print(f"⚠️ Worker {worker_id}: no se pudo entregar el lease {lease_id} ({e})")
+                break
+            processed += len(results)
+            idle_since = time.monotonic()
+    finally:
+        transport.close()
+        if telemetry:
+            telemetry.close()
+
+    print(f"✅ Worker {worker_id}: {processed} combinaciones procesadas")
+    return processed
+
+
+def _parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _make_worker_transport(connect: Optional[str], queue_dir: Optional[str]):
+    if queue_dir:
+        return DirectoryQueue(queue_dir)
+    host, port = _parse_address(connect or '127.0.0.1:5555')
+    # El coordinador puede tardar en arrancar
+    for _ in range(30):
+        try:
+            return TCPWorkerClient(host, port)
+        except OSError:
+            time.sleep(1.0)
+    return TCPWorkerClient(host, port)
+
+
+def _worker_process(data_file: str, connect: Optional[str], queue_dir: Optional[str],
+                    worker_id: str, telemetry_target: Optional[str] = None,
+                    telemetry_interval: float = 10.0, low_memory: bool = False):
+    from telemetry import open_telemetry
+
+    telemetry = open_telemetry(telemetry_target, telemetry_interval, worker_id)
+    run_worker(data_file, _make_worker_transport(connect, queue_dir), worker_id,
+               low_memory=low_memory, telemetry=telemetry)
+
+
+# ---------------------------------------------------------------------------
+# Punto de entrada
+# ---------------------------------------------------------------------------
+
+def run_coordinator(param_sets: List[Dict], bind: Optional[str] = None,
+                    queue_dir: Optional[str] = None, lease_size: int = 10,
+                    lease_timeout: float = 300.0, min_trades: int = 10,
+                    min_win_rate: float = 50.0, max_top_results: int = 10,
+                    output: Optional[str] = None) -> Dict:
+    """Coordinar la búsqueda y mostrar los mejores resultados"""
+    search = OptimizedParameterSearch(None, max_top_results=max_top_results)
+    coordinator = SearchCoordinator(search, param_sets, lease_size, lease_timeout,
+                                    min_trades, min_win_rate)
+    print(f"🧪 {len(param_sets)} combinaciones en {len(coordinator.leases)} leases")
+
+    start_time = time.monotonic()
+    if queue_dir:
+        DirectoryQueue(queue_dir).serve(coordinator)
+    else:
+        host, port = _parse_address(bind or '127.0.0.1:5555')
+        serve_tcp(coordinator, host, port)
+
+    elapsed = time.monotonic() - start_time
+    print(f"\n✅ Búsqueda distribuida completada en {elapsed:.1f} segundos")
+    print(f"📊 Combinaciones válidas: {search.valid_count}/{search.total_tested}")
+    print(f"⏭️ Descartadas por evaluación temprana: {coordinator.early_stop_count}")
+    print(f"♻️ Leases re-emitidos: {coordinator.reissued_count}")
+
+    if search.valid_count == 0:
+        print("❌ No se encontraron configuraciones válidas")
+        return {}
+
+    results = search._show_optimized_results()
+    if output:
+        search.save_optimized_results(results, output)
+    return results
+
+
+def run_local_cluster(data_file: str, workers: int = 4, max_combinations: int = 50,
+                      queue_dir: Optional[str] = None, port: int = 5555,
+                      telemetry_target: Optional[str] = None,
+                      telemetry_interval: float = 10.0, low_memory: bool = False,
+                      **kwargs) -> Dict:
+    """Coordinador y varios procesos worker en la misma máquina (pruebas)"""
+    import multiprocessing
+
+    param_sets = OptimizedParameterSearch(None).generate_smart_combinations(max_combinations)
+    connect = f"127.0.0.1:{port}"
+    if queue_dir:
+        DirectoryQueue(queue_dir).reset()
+    processes = [
+        multiprocessing.Process(target=_worker_process,
+                                args=(data_file, connect, queue_dir, f"local-{n + 1}",
+                                      telemetry_target, telemetry_interval, low_memory))
+        for n in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        return run_coordinator(param_sets, bind=connect, queue_dir=queue_dir, **kwargs)
+    finally:
+        for process in processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda distribuida de parámetros")
+    sub = parser.add_subparsers(dest='role', required=True)
+
+    def add_common(p):
+        p.add_argument('--queue-dir', help="Directorio compartido (en lugar de TCP)")
+        p.add_argument('--combinations', type=int, default=50)
+        p.add_argument('--lease-size', type=int, default=10)
+        p.add_argument('--lease-timeout', type=float, default=300.0)
+        p.add_argument('--min-trades', type=int, default=10)
+        p.add_argument('--min-win-rate', type=float, default=50.0)
+        p.add_argument('--top', type=int, default=10)
+        p.add_argument('--output', help="Archivo JSON para guardar resultados")
+
+    p_coord = sub.add_parser('coordinator', help="Servir leases y consolidar resultados")
+    p_coord.add_argument('--bind', default='127.0.0.1:5555')
+    add_common(p_coord)
+
+    p_worker = sub.add_parser('worker', help="Procesar leases del coordinador")
+    p_worker.add_argument('--data', required=True)
+    p_worker.add_argument('--connect', default='127.0.0.1:5555')
+    p_worker.add_argument('--queue-dir')
+    p_worker.add_argument('--worker-id')
+    p_worker.add_argument('--low-memory', action='store_true',
+                          help="Leer el CSV en streaming con buffers acotados (exactbars=1)")
+    p_worker.add_argument('--telemetry', help="Archivo JSONL o udp://host:puerto")
+    p_worker.add_argument('--telemetry-interval', type=float, default=10.0)
+
+    p_local = sub.add_parser('local', help="Coordinador + N workers en esta máquina")
+    p_local.add_argument('--data', required=True)
+    p_local.add_argument('--workers', type=int, default=4)
+    p_local.add_argument('--port', type=int, default=5555)
+    p_local.add_argument('--low-memory', action='store_true',
+                         help="Workers con CSV en streaming y buffers acotados (exactbars=1)")
+    p_local.add_argument('--telemetry', help="Archivo JSONL o udp://host:puerto")
+    p_local.add_argument('--telemetry-interval', type=float, default=10.0)
+    add_common(p_local)
+
+    args = parser.parse_args()
+
+    if args.role == 'worker':
+        from telemetry import open_telemetry
+
+        telemetry = open_telemetry(args.telemetry, args.telemetry_interval, args.worker_id)
+        run_worker(args.data, _make_worker_transport(args.connect, args.queue_dir),
+                   args.worker_id, low_memory=args.low_memory, telemetry=telemetry)
+        return
+
+    options = dict(lease_size=args.lease_size, lease_timeout=args.lease_timeout,
+                   min_trades=args.min_trades, min_win_rate=args.min_win_rate,
+                   max_top_results=args.top, output=args.output)
+    if args.role == 'coordinator':
+        param_sets = OptimizedParameterSearch(None).generate_smart_combinations(
+            args.combinations)
+        run_coordinator(param_sets, bind=args.bind, queue_dir=args.queue_dir, **options)
+    else:
+        run_local_cluster(args.data, workers=args.workers,
+                          max_combinations=args.combinations,
+                          queue_dir=args.queue_dir, port=args.port,
+                          telemetry_target=args.telemetry,
+                          telemetry_interval=args.telemetry_interval,
+                          low_memory=args.low_memory, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fleet.py - Flota de estrategias en una sola pasada de Cerebro
+
+run_single_backtest crea un Cerebro (broker, precarga del feed, bucle de
+barras) por configuración. La flota agrega todas las configuraciones como
+estrategias del mismo Cerebro: el feed se recorre una vez para todas, cada
+estrategia tiene su propio BinaryOptionsAnalyzer y los indicadores con los
+mismos parámetros (EMA, SuperTrend, ADX, RSI) se crean una sola vez y se
+comparten a través del parámetro indicator_cache (salvo con exactbars=1, donde
+cada estrategia mantiene sus propios indicadores).
+
+Uso:
+    runner = FleetRunner(data_feed)
+    results = runner.run([{'ema1_period': 8}, {'ema1_period': 13, 'expiry_minutes': 30}])
+    print(runner.stats)
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import backtrader as bt
+
+from default import BinaryOptionsAnalyzer, BinaryOptionsStrategy
+
+# Indicadores por estrategia (EMA, SuperTrend, ADX, RSI)
+INDICATORS_PER_STRATEGY = 4
+
+
+class FleetRunner:
+    """Ejecuta muchas configuraciones de la estrategia en un único Cerebro"""
+
+    def __init__(self, data_feed, exactbars: int = 0, strategy_class=None,
+                 share_indicators: bool = True, analyzers: Sequence[Tuple] = ()):
+        self.data_feed = data_feed
+        self.exactbars = exactbars
+        self.strategy_class = strategy_class or BinaryOptionsStrategy
+        self.share_indicators = share_indicators
+        # Analizadores adicionales (clase, kwargs) para cada estrategia de la flota
+        self.analyzers = analyzers
+        self.strategies: List = []
+        self.stats: Dict = {}
+
+    def run(self, configs: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Resultados de cada configuración, en el mismo orden que configs
+        (mismo formato que run_single_backtest). Un error en cualquier
+        estrategia detiene la pasada completa y todas retornan None.
+        """
+        if not configs:
+            return []
+
+        start = time.perf_counter()
+        # Con exactbars=1 los buffers acotados de un indicador compartido no sirven
+        # a las demás estrategias (ADX termina dividiendo por cero): sin compartir
+        share = self.share_indicators and self.exactbars < 1
+        indicator_cache = {} if share else None
+
+        try:
+            # Sin observadores estándar: las métricas salen del analizador de cada estrategia
+            cerebro = bt.Cerebro(exactbars=self.exactbars, stdstats=False)
+            cerebro.broker.setcash(100.0)
+            cerebro.adddata(self.data_feed)
+            for params in configs:
+                cerebro.addstrategy(self.strategy_class, indicator_cache=indicator_cache,
+                                    **params)
+            cerebro.addanalyzer(BinaryOptionsAnalyzer, _name='binary_analyzer')
+            for analyzer_class, kwargs in self.analyzers:
+                cerebro.addanalyzer(analyzer_class, **kwargs)
+
+            strategies = self.strategies = cerebro.run()
+        except Exception as e:
+            print(f"❌ Error en la flota: {e}")
+            return [None] * len(configs)
+
+        results = []
+        for strategy in strategies:
+            analyzer = strategy.analyzers.binary_analyzer
+            results.append(getattr(analyzer, 'results', None))
+
+        requested = len(configs) * INDICATORS_PER_STRATEGY
+        created = len(indicator_cache) if indicator_cache is not None else requested
+        self.stats = {
+            'strategies': len(configs),
+            'indicators_requested': requested,
+            'indicators_created': created,
+            'seconds': time.perf_counter() - start,
+        }
+        return results
+
+
+def run_fleet(data_feed, configs: List[Dict], exactbars: int = 0, strategy_class=None,
+              share_indicators: bool = True) -> List[Optional[Dict]]:
+    """Atajo de FleetRunner(...).run(configs)"""
+    return FleetRunner(data_feed, exactbars, strategy_class, share_indicators).run(configs)
+
+
+def print_fleet_stats(stats: Dict):
+    if not stats:
+        return
+    print(f"🚢 Flota: {stats['strategies']} estrategias en una pasada | "
+          f"indicadores: {stats['indicators_created']}/{stats['indicators_requested']} "
+          f"creados | {stats['seconds']:.1f}s")
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+genetic_search.py - Búsqueda evolutiva de parámetros con evaluación en paralelo
+
+Para espacios de parámetros mucho mayores que la grilla de
+define_parameter_ranges (multiplicador continuo, periodos amplios) se evoluciona
+una población de diccionarios de parámetros:
+
+- Población inicial: las configuraciones de _generate_promising_base más
+  individuos aleatorios del espacio GENE_SPACE.
+- Selección por torneo, cruce uniforme y mutación gaussiana por gen.
+- Elitismo: los mejores pasan intactos a la siguiente generación; todo
+  resultado que supera los filtros se registra en el TopResultsTracker.
+- Cada generación se evalúa en paralelo con un pool de procesos; cada proceso
+  construye su feed una sola vez (initializer) y los individuos repetidos se
+  toman de un cache en lugar de volver a ejecutar el backtest.
+
+Uso:
+    python genetic_search.py --data EURUSD5.csv --population 40 --generations 15 --workers 4
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from distributed_search import compact_result
+from shearch import OptimizedParameterSearch, OptimizedResult
+
+# Espacio de búsqueda: ('int', min, max) | ('float', min, max, paso) | ('choice', [valores])
+GENE_SPACE = {
+    'ema1_period': ('int', 3, 50),
+    'st_period': ('int', 5, 40),
+    'st_multiplier': ('float', 1.0, 5.0, 0.05),
+    'adx_period': ('int', 7, 35),
+    'adx_threshold': ('int', 15, 40),
+    'rsi_period': ('int', 5, 30),
+    'rsi_oversold': ('int', 20, 40),
+    'rsi_overbought': ('int', 60, 80),
+    'supertrend_delay_bars': ('int', 1, 8),
+    'expiry_minutes': ('choice', [15, 30, 45, 60, 90, 120]),
+    'max_trades_per_day': ('int', 4, 20),
+    'min_time_between_trades': ('int', 1, 15),
+}
+
+# Aptitud de los individuos que no superan los filtros o fallan
+INVALID_PENALTY = 1.0
+ERROR_FITNESS = -2.0
+
+# Estado de cada proceso del pool (lo crea _init_worker)
+_WORKER_SEARCH: Optional[OptimizedParameterSearch] = None
+
+
+def feed_spec(data_feed) -> Tuple[str, object]:
+    """
+    Descripción serializable del feed para reconstruirlo en otro proceso:
+    el DataFrame de un PandasData o la ruta de un GenericCSVData.
+    """
+    dataname = data_feed.p.dataname
+    if isinstance(dataname, str):
+        return 'csv', dataname
+    return 'frame', dataname
+
+
+def feed_from_spec(spec: Tuple[str, object]):
+    kind, payload = spec
+    if kind == 'csv':
+        from default import load_data_stream
+
+        return load_data_stream(payload)
+    import backtrader as bt
+
+    return bt.feeds.PandasData(dataname=payload)
+
+
+def _init_worker(spec: Tuple[str, object], search_kwargs: Dict):
+    """Initializer del pool: el feed se construye una vez por proceso"""
+    global _WORKER_SEARCH
+    _WORKER_SEARCH = OptimizedParameterSearch(feed_from_spec(spec), **search_kwargs)
+
+
+def _evaluate_in_worker(params: Dict) -> Tuple[Optional[Dict], float]:
+    return evaluate_params(_WORKER_SEARCH, params)
+
+
+def evaluate_params(search: OptimizedParameterSearch, params: Dict) -> Tuple[Optional[Dict], float]:
+    """Backtest ligero de un individuo: (resultado compacto o None, duración)"""
+    start = time.perf_counter()
+    try:
+        result = compact_result(search._run_lightweight_backtest(params))
+    except Exception:
+        result = None
+    return result, time.perf_counter() - start
+
+
+def _individual_key(params: Dict) -> Tuple:
+    return tuple(sorted(params.items()))
+
+
+class GeneticParameterSearch(OptimizedParameterSearch):
+    """Optimizador evolutivo sobre el diccionario de parámetros de la estrategia"""
+
+    def __init__(self, data_feed, max_top_results: int = 10, low_memory: bool = False,
+                 use_settlement_index: bool = False, fine_settlement=None,
+                 objectives: Tuple[str, ...] = (), strategy_class=None,
+                 gene_space: Optional[Dict] = None):
+        super().__init__(data_feed, max_top_results=max_top_results, low_memory=low_memory,
+                         use_settlement_index=use_settlement_index,
+                         fine_settlement=fine_settlement, objectives=objectives,
+                         strategy_class=strategy_class)
+        self.gene_space = gene_space or GENE_SPACE
+        self.rng = random.Random()
+        self.cache: Dict[Tuple, Tuple[int, Optional[Dict], float]] = {}
+        self.history: List[Dict] = []
+        self._search_kwargs = {'low_memory': low_memory,
+                               'use_settlement_index': use_settlement_index,
+                               'fine_settlement': fine_settlement,
+                               'strategy_class': strategy_class}
+
+    # ------------------------------------------------------------------
+    # Operadores genéticos
+    # ------------------------------------------------------------------
+
+    def _snap(self, name: str, value):
+        """Llevar un valor al espacio del gen (rango, paso o valor permitido)"""
+        gene = self.gene_space[name]
+        if gene[0] == 'choice':
+            return min(gene[1], key=lambda choice: abs(choice - value))
+        low, high = gene[1], gene[2]
+        value = min(max(value, low), high)
+        if gene[0] == 'int':
+            return int(round(value))
+        step = gene[3]
+        return round(low + round((value - low) / step) * step, 6)
+
+    def random_individual(self) -> Dict:
+        params = {}
+        for name, gene in self.gene_space.items():
+            if gene[0] == 'choice':
+                params[name] = self.rng.choice(gene[1])
+            elif gene[0] == 'int':
+                params[name] = self.rng.randint(gene[1], gene[2])
+            else:
+                params[name] = self._snap(name, self.rng.uniform(gene[1], gene[2]))
+        return params
+
+    def initial_population(self, size: int) -> List[Dict]:
+        """Configuraciones prometedoras (ajustadas al espacio) + aleatorias, sin repetir"""
+        population, seen = [], set()
+        candidates = [{name: self._snap(name, base[name]) for name in self.gene_space if name in base}
+                      for base in self._generate_promising_base()]
+        attempts = 0
+        while len(population) < size and attempts < size * 50:
+            individual = candidates.pop(0) if candidates else self.random_individual()
+            # Completar genes que la configuración base no define
+            for name in self.gene_space:
+                if name not in individual:
+                    individual[name] = self.random_individual()[name]
+            key = _individual_key(individual)
+            if key not in seen:
+                seen.add(key)
+                population.append(individual)
+            attempts += 1
+        return population
+
+    def tournament(self, scored: List[Tuple[float, Dict]], size: int) -> Dict:
+        contenders = self.rng.sample(scored, min(size, len(scored)))
+        return max(contenders, key=lambda item: item[0])[1]
+
+    def crossover(self, parent_a: Dict, parent_b: Dict) -> Dict:
+        """Cruce uniforme: cada gen se hereda de uno de los dos padres"""
+        return {name: parent_a[name] if self.rng.random() < 0.5 else parent_b[name]
+                for name in self.gene_space}
+
+    def mutate(self, individual: Dict, rate: float, scale: float = 0.15) -> Dict:
+        """Mutación gaussiana (sigma = scale * rango); genes 'choice' saltan a un vecino"""
+        mutated = dict(individual)
+        for name, gene in self.gene_space.items():
+            if self.rng.random() >= rate:
+                continue
+            if gene[0] == 'choice':
+                choices = gene[1]
+                position = choices.index(mutated[name]) if mutated[name] in choices else 0
+                position += self.rng.choice((-1, 1))
+                mutated[name] = choices[min(max(position, 0), len(choices) - 1)]
+            else:
+                sigma = max((gene[2] - gene[1]) * scale, 1 if gene[0] == 'int' else gene[3])
+                mutated[name] = self._snap(name, mutated[name] + self.rng.gauss(0, sigma))
+        return mutated
+
+    # ------------------------------------------------------------------
+    # Evaluación
+    # ------------------------------------------------------------------
+
+    def _fitness(self, result: Optional[Dict], params: Dict, combo_id: int,
+                 min_trades: int, min_win_rate: float) -> Tuple[float, str]:
+        """(aptitud, status): score combinado, penalizado si no supera los filtros"""
+        if not result:
+            return ERROR_FITNESS, 'error'
+        opt_result = self._register_result(result, params, combo_id, min_trades, min_win_rate)
+        if opt_result is not None:
+            return opt_result.score(), 'valid'
+        # Conserva el gradiente del score para que la población pueda salir de la zona inválida
+        return OptimizedResult(result, params, combo_id).score() - INVALID_PENALTY, 'early_stop'
+
+    def _evaluate_population(self, population: List[Dict], executor, workers: int,
+                             min_trades: int, min_win_rate: float,
+                             telemetry=None) -> Tuple[List[Tuple[float, Dict]], int]:
+        """Evaluar solo los individuos nuevos; retorna ([(aptitud, params)], evaluados)"""
+        pending, pending_keys = [], set()
+        for params in population:
+            key = _individual_key(params)
+            if key not in self.cache and key not in pending_keys:
+                pending_keys.add(key)
+                pending.append((key, params))
+
+        if executor is None:
+            outcomes = (evaluate_params(self, params) for _, params in pending)
+        else:
+            chunksize = max(1, len(pending) // (workers * 4))
+            outcomes = executor.map(_evaluate_in_worker, [p for _, p in pending],
+                                    chunksize=chunksize)
+
+        for (key, params), (result, duration) in zip(pending, outcomes):
+            combo_id = len(self.cache) + 1
+            self.total_tested += 1
+            fitness, status = self._fitness(result, params, combo_id, min_trades, min_win_rate)
+            self.cache[key] = (combo_id, result, fitness)
+            if telemetry:
+                telemetry.record(duration, status, bars=self._bars_processed(),
+                                 score=fitness if status == 'valid' else None)
+
+        scored = [(self.cache[_individual_key(params)][2], params) for params in population]
+        return scored, len(pending)
+
+    # ------------------------------------------------------------------
+    # Bucle evolutivo
+    # ------------------------------------------------------------------
+
+    def run_genetic_search(self, population_size: int = 30, generations: int = 10,
+                           min_trades: int = 10, min_win_rate: float = 50.0,
+                           workers: Optional[int] = None, seed: Optional[int] = None,
+                           elite: int = 2, tournament_size: int = 3,
+                           crossover_rate: float = 0.8, mutation_rate: float = 0.2,
+                           patience: Optional[int] = None, verbose: bool = False,
+                           telemetry=None) -> Dict:
+        """
+        Evolucionar la población y mostrar los mejores resultados.
+        workers: procesos para evaluar cada generación (None = CPUs, 1 = sin pool).
+        patience: detener si el mejor no mejora en esa cantidad de generaciones.
+        """
+        print("\n" + "=" * 60)
+        print("🧬 BÚSQUEDA EVOLUTIVA DE PARÁMETROS")
+        print("=" * 60)
+
+        self.rng.seed(seed)
+        workers = workers or os.cpu_count() or 1
+        population_size = max(population_size, elite + 2)
+        population = self.initial_population(population_size)
+
+        print(f"👥 Población: {len(population)} | Generaciones: {generations} | "
+              f"Procesos: {workers}")
+        print(f"📈 Filtros: Min trades={min_trades}, Min win rate={min_win_rate}%")
+        if telemetry:
+            telemetry.start(total=population_size * generations, min_trades=min_trades,
+                            min_win_rate=min_win_rate, mode='genetic')
+
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(feed_spec(self.data_feed), self._search_kwargs))
+
+        start_time = time.perf_counter()
+        best_fitness, stale = float('-inf'), 0
+        try:
+            for generation in range(1, generations + 1):
+                gen_start = time.perf_counter()
+                scored, evaluated = self._evaluate_population(population, executor, workers,
+                                                              min_trades, min_win_rate, telemetry)
+                scored.sort(key=lambda item: item[0], reverse=True)
+                gen_elapsed = time.perf_counter() - gen_start
+
+                fitnesses = [fitness for fitness, _ in scored]
+                improved = fitnesses[0] > best_fitness + 1e-9
+                best_fitness = max(best_fitness, fitnesses[0])
+                stale = 0 if improved else stale + 1
+                stats = {
+                    'generation': generation,
+                    'best': fitnesses[0],
+                    'mean': sum(fitnesses) / len(fitnesses),
+                    'best_so_far': best_fitness,
+                    'evaluated': evaluated,
+                    'cached': len(population) - evaluated,
+                    'diversity': len({_individual_key(p) for _, p in scored}) / len(scored),
+                    'valid': self.valid_count,
+                    'seconds': gen_elapsed,
+                    'evals_per_sec': evaluated / gen_elapsed if gen_elapsed > 0 else 0.0,
+                }
+                self.history.append(stats)
+                print(f"🧬 Gen {generation:>3} | mejor: {stats['best']:.3f} | "
+                      f"media: {stats['mean']:.3f} | evaluados: {evaluated} "
+                      f"(cache: {stats['cached']}) | diversidad: {stats['diversity']:.0%} | "
+                      f"{stats['evals_per_sec']:.1f} eval/s")
+                if verbose:
+                    print(f"     👑 {scored[0][1]}")
+
+                if patience and stale >= patience:
+                    print(f"⏹️ Sin mejora en {patience} generaciones: convergencia")
+                    break
+                if generation == generations:
+                    break
+
+                # Nueva generación: élite intacta + hijos por torneo, cruce y mutación
+                next_population = [dict(params) for _, params in scored[:elite]]
+                seen = {_individual_key(p) for p in next_population}
+                attempts = 0
+                while len(next_population) < population_size:
+                    parent_a = self.tournament(scored, tournament_size)
+                    if self.rng.random() < crossover_rate:
+                        child = self.crossover(parent_a, self.tournament(scored, tournament_size))
+                    else:
+                        child = dict(parent_a)
+                    child = self.mutate(child, mutation_rate)
+                    key = _individual_key(child)
+                    attempts += 1
+                    # Evitar duplicados dentro de la generación (con tope de intentos)
+                    if key in seen and attempts < population_size * 20:
+                        continue
+                    seen.add(key)
+                    next_population.append(child)
+                population = next_population
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if telemetry:
+                telemetry.close()
+
+        elapsed_total = time.perf_counter() - start_time
+        print(f"\n✅ Búsqueda evolutiva completada en {elapsed_total:.1f} segundos")
+        print(f"📊 Individuos evaluados: {len(self.cache)} | válidos: {self.valid_count}")
+
+        if self.valid_count > 0:
+            return self._show_optimized_results()
+        print("❌ No se encontraron configuraciones válidas")
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Búsqueda evolutiva de parámetros")
+    parser.add_argument('--data', default='EURUSD5.csv')
+    parser.add_argument('--population', type=int, default=30)
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--workers', type=int, help="Procesos (default: CPUs)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--elite', type=int, default=2)
+    parser.add_argument('--mutation-rate', type=float, default=0.2)
+    parser.add_argument('--patience', type=int)
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--min-win-rate', type=float, default=50.0)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help="Guardar los mejores resultados en JSON")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    from default import load_data
+
+    data_feed = load_data(args.data)
+    if data_feed is None:
+        return 1
+
+    optimizer = GeneticParameterSearch(data_feed, max_top_results=args.top)
+    results = optimizer.run_genetic_search(
+        population_size=args.population, generations=args.generations,
+        min_trades=args.min_trades, min_win_rate=args.min_win_rate,
+        workers=args.workers, seed=args.seed, elite=args.elite,
+        mutation_rate=args.mutation_rate, patience=args.patience, verbose=args.verbose)
+    if results and args.output:
+        optimizer.save_optimized_results(results, args.output)
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ingest.py - Ingesta masiva de archivos de datos al cache binario
+
+Para directorios con cientos de exportaciones del broker (formato de
+load_data, separadas por tabs) cargar uno por uno con inferencia de fechas
+lleva minutos y las filas malas aparecen recién en medio de un backtest.
+Aquí cada archivo:
+
+1. Se parsea con un formato de fecha fijo (sin inferencia) en un pool de
+   procesos (o hilos); las filas ilegibles se marcan en lugar de abortar.
+2. Se valida: timestamps estrictamente crecientes, duplicados, desorden y
+   precios inválidos (NaN, <= 0, high < low).
+3. Se indexa: huecos dentro de la sesión, cortes de sesión y fines de semana,
+   según el intervalo de barra dominante del archivo.
+4. Se escribe al cache binario de data_cache (.cache/ junto al CSV). Mientras
+   el CSV no cambie, load_data (y con ella cli backtest/search, default y
+   shearch) lee ese cache en lugar de parsear, igual que timeframes y
+   settlement; load_data_stream (--low-memory) sigue leyendo el CSV. Un archivo
+   inválido no se cachea, salvo con repair=True (ordena y descarta filas malas
+   y duplicados: los backtests ven la versión reparada, con un aviso al cargarla).
+
+Memoria acotada: cada worker escribe su cache y devuelve solo el índice, y
+nunca hay más de max_in_flight archivos en proceso a la vez. Los archivos
+cuyo cache ya está al día solo se indexan (leídos con mmap).
+
+Uso:
+    python ingest.py datos/ --workers 4 --index datos/ingest_index.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor,
+                                wait)
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from data_cache import (
+    CSV_NAMES,
+    _source_signature,
+    cache_dir_for,
+    parse_csv,
+    read_cache,
+    read_meta,
+    write_cache,
+)
+
+DEFAULT_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DATA_EXTENSIONS = ('.csv', '.txt', '.tsv')
+
+# Huecos desde esta duración (sin cruzar un sábado) se cuentan como corte de sesión
+SESSION_BREAK_MINUTES = 60
+# Entradas listadas por categoría en el índice (los totales siempre son exactos)
+MAX_LISTED = 500
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_DAY = 86_400 * NS_PER_SECOND
+NAT = np.iinfo(np.int64).min
+
+
+def find_data_files(paths: Iterable[str]) -> List[str]:
+    """Archivos de datos de una lista de archivos, directorios o patrones glob"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(os.path.join(path, name) for name in os.listdir(path))
+        else:
+            candidates = sorted(glob.glob(path)) or [path]
+        files.extend(f for f in candidates
+                     if os.path.isfile(f) and f.lower().endswith(DATA_EXTENSIONS))
+    return list(dict.fromkeys(files))
+
+
+def _iso(ns: int) -> str:
+    return str(np.datetime64(int(ns), 'ns').astype('datetime64[s]')).replace('T', ' ')
+
+
+def _listed(starts: np.ndarray, ends: Optional[np.ndarray] = None) -> List:
+    starts = starts[:MAX_LISTED]
+    if ends is None:
+        return [_iso(ns) for ns in starts]
+    ends = ends[:MAX_LISTED]
+    return [[_iso(a), _iso(b), round((b - a) / NS_PER_SECOND / 60, 1)]
+            for a, b in zip(starts, ends)]
+
+
+def overlong_lines(filename: str, fields: int = len(CSV_NAMES)) -> List[int]:
+    """
+    Números de línea (desde 1) con más campos que columnas: las que read_csv
+    salta con errors='coerce'. Se cuentan los tabs por línea sobre los bytes del
+    archivo, sin depender del estado global de warnings (seguro entre hilos).
+    """
+    data = np.fromfile(filename, dtype=np.uint8)
+    newlines = np.flatnonzero(data == ord('\n'))
+    tab_lines = np.searchsorted(newlines, np.flatnonzero(data == ord('\t')))
+    tabs_per_line = np.bincount(tab_lines, minlength=len(newlines) + 1)
+    return [int(line) + 1 for line in np.flatnonzero(tabs_per_line > fields - 1)]
+
+
+def parse_file(filename: str, datetime_format: str):
+    """(arrays, líneas saltadas por cantidad de campos incorrecta)"""
+    arrays = parse_csv(filename, datetime_format, errors='coerce')
+    return arrays, overlong_lines(filename)
+
+
+def bad_row_mask(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    """Filas sin fecha o con precios inválidos (NaN, <= 0, high < low)"""
+    prices = np.column_stack([arrays[c] for c in ('open', 'high', 'low', 'close')])
+    return ((arrays['datetime'] == NAT) | np.isnan(prices).any(axis=1) |
+            (prices <= 0).any(axis=1) | (arrays['high'] < arrays['low']) |
+            np.isnan(arrays['volume']))
+
+
+def scan_timestamps(timestamps: np.ndarray,
+                    session_break_minutes: int = SESSION_BREAK_MINUTES) -> Dict:
+    """
+    Índice de un array de timestamps (int64 ns, sin NaT): duplicados, saltos hacia
+    atrás y huecos clasificados en 'gaps' (barras faltantes dentro de la sesión),
+    'session_breaks' (>= session_break_minutes) y 'weekends' (cruzan un sábado).
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    index = {'bar_seconds': None, 'duplicates': 0, 'out_of_order': 0, 'gaps': 0,
+             'session_breaks': 0, 'weekends': 0, 'missing_bars': 0,
+             'listed': {'duplicates': [], 'out_of_order': [], 'gaps': [],
+                        'session_breaks': [], 'weekends': []}}
+    if len(timestamps) < 2:
+        return index
+
+    diffs = np.diff(timestamps)
+    positive = diffs[diffs > 0]
+    if not len(positive):
+        bar = 0
+    else:
+        values, counts = np.unique(positive, return_counts=True)
+        bar = int(values[np.argmax(counts)])  # intervalo dominante
+    index['bar_seconds'] = bar // NS_PER_SECOND
+
+    duplicates = np.flatnonzero(diffs == 0) + 1
+    backwards = np.flatnonzero(diffs < 0) + 1
+    index['duplicates'] = int(len(duplicates))
+    index['out_of_order'] = int(len(backwards))
+    index['listed']['duplicates'] = _listed(timestamps[duplicates])
+    index['listed']['out_of_order'] = _listed(timestamps[backwards])
+
+    holes = np.flatnonzero(diffs > bar) if bar else np.zeros(0, dtype=np.int64)
+    starts, ends = timestamps[holes], timestamps[holes + 1]
+    # Sábados en [día de inicio, día de fin]: el día d (desde 1970-01-01, jueves) es sábado si d % 7 == 2
+    start_day, end_day = starts // NS_PER_DAY, ends // NS_PER_DAY
+    weekend = np.floor_divide(end_day - 2, 7) - np.floor_divide(start_day - 3, 7) > 0
+    session = ~weekend & (ends - starts >= session_break_minutes * 60 * NS_PER_SECOND)
+    gap = ~weekend & ~session
+    for name, mask in (('gaps', gap), ('session_breaks', session), ('weekends', weekend)):
+        index[name] = int(mask.sum())
+        index['listed'][name] = _listed(starts[mask], ends[mask])
+    if bar:
+        index['missing_bars'] = int(((ends[gap] - starts[gap]) // bar - 1).sum())
+    return index
+
+
+def repair_arrays(arrays: Dict[str, np.ndarray], bad: np.ndarray) -> Dict[str, np.ndarray]:
+    """Descartar filas malas, ordenar por fecha y quedarse con la última de cada duplicado"""
+    keep = ~bad
+    arrays = {column: values[keep] for column, values in arrays.items()}
+    order = np.argsort(arrays['datetime'], kind='stable')
+    arrays = {column: values[order] for column, values in arrays.items()}
+    timestamps = arrays['datetime']
+    last_of_each = np.append(timestamps[1:] != timestamps[:-1], True) if len(timestamps) else \
+        np.zeros(0, dtype=bool)
+    return {column: values[last_of_each] for column, values in arrays.items()}
+
+
+def ingest_file(filename: str, datetime_format: str = DEFAULT_DATETIME_FORMAT,
+                repair: bool = False, force: bool = False,
+                session_break_minutes: int = SESSION_BREAK_MINUTES) -> Dict:
+    """
+    Parsear, validar, indexar y cachear un archivo. Retorna solo el resumen
+    (status: 'cached', 'repaired', 'fresh' = cache ya al día, 'invalid' o 'error').
+    """
+    start = time.perf_counter()
+    entry = {'file': filename, 'status': 'error'}
+    try:
+        cache_dir = cache_dir_for(filename)
+        signature = _source_signature(filename)
+        meta = read_meta(cache_dir)
+        if not force and meta and meta.get('source_size') == signature['source_size'] \
+                and meta.get('source_mtime') == signature['source_mtime']:
+            arrays = read_cache(cache_dir, mmap=True)
+            entry.update(status='fresh', bad_rows=0)
+        else:
+            arrays, skipped = parse_file(filename, datetime_format)
+            bad = bad_row_mask(arrays)
+            entry['bad_rows'] = int(bad.sum()) + len(skipped)
+            # Posiciones entre las filas leídas (1 = primera); las saltadas, por línea del archivo
+            entry['listed_bad_rows'] = [int(i) + 1 for i in np.flatnonzero(bad)[:MAX_LISTED]]
+            entry['skipped_lines'] = skipped[:MAX_LISTED]
+            raw_index = scan_timestamps(arrays['datetime'][~bad], session_break_minutes)
+
+            valid = not entry['bad_rows'] and not raw_index['duplicates'] and \
+                not raw_index['out_of_order']
+            if not valid and not repair:
+                entry.update(status='invalid', rows=int(len(bad)), index=raw_index,
+                             seconds=time.perf_counter() - start)
+                return entry
+            repaired = {}
+            if not valid:
+                arrays = repair_arrays(arrays, bad)
+                entry['dropped_rows'] = int(len(bad) - len(arrays['datetime']))
+                # load_data / load_arrays avisan que el cache no es el CSV tal cual
+                repaired = {'repaired': True, 'dropped_rows': entry['dropped_rows']}
+            write_cache(arrays, cache_dir, {**signature, 'datetime_format': datetime_format,
+                                            **repaired})
+            entry['status'] = 'cached' if valid else 'repaired'
+
+        timestamps = np.asarray(arrays['datetime'])
+        entry['rows'] = int(len(timestamps))
+        if len(timestamps):
+            entry['first'], entry['last'] = _iso(timestamps[0]), _iso(timestamps[-1])
+        if 'index' not in entry:
+            entry['index'] = scan_timestamps(timestamps, session_break_minutes)
+    except Exception as e:
+        entry['error'] = str(e)
+    entry['seconds'] = time.perf_counter() - start
+    return entry
+
+
+def ingest_files(files: List[str], workers: Optional[int] = None, use_threads: bool = False,
+                 max_in_flight: Optional[int] = None, datetime_format: str = DEFAULT_DATETIME_FORMAT,
+                 repair: bool = False, force: bool = False,
+                 session_break_minutes: int = SESSION_BREAK_MINUTES,
+                 verbose: bool = True) -> List[Dict]:
+    """
+    Ingerir muchos archivos en paralelo. max_in_flight (default 2 x workers) acota
+    cuántos archivos se procesan a la vez y por lo tanto la memoria máxima.
+    Retorna los resúmenes en el orden de files.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max(max_in_flight or 2 * workers, 1)
+    options = dict(datetime_format=datetime_format, repair=repair, force=force,
+                   session_break_minutes=session_break_minutes)
+    entries: Dict[str, Dict] = {}
+
+    def report(entry: Dict):
+        entries[entry['file']] = entry
+        if verbose:
+            print_ingest_line(entry, len(entries), len(files))
+
+    if workers <= 1:
+        for filename in files:
+            report(ingest_file(filename, **options))
+        return [entries[f] for f in files]
+
+    pool_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    with pool_class(max_workers=workers) as executor:
+        pending = set()
+        for filename in files:
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report(future.result())
+            pending.add(executor.submit(ingest_file, filename, **options))
+        for future in wait(pending).done:
+            report(future.result())
+    return [entries[f] for f in files]
+
+
+def print_ingest_line(entry: Dict, position: int, total: int):
+    icons = {'cached': '✅', 'repaired': '🛠️', 'fresh': '💾', 'invalid': '⚠️', 'error': '❌'}
+    index = entry.get('index') or {}
+    details = (f"{entry.get('rows', 0)} velas | huecos {index.get('gaps', 0)} | "
+               f"cortes {index.get('session_breaks', 0)} | dup {index.get('duplicates', 0)} | "
+               f"desorden {index.get('out_of_order', 0)} | filas malas {entry.get('bad_rows', 0)}")
+    if entry['status'] == 'error':
+        details = entry.get('error', '')
+    print(f"{icons.get(entry['status'], '•')} [{position}/{total}] "
+          f"{os.path.basename(entry['file'])}: {entry['status']} | {details} | "
+          f"{entry.get('seconds', 0.0):.2f}s")
+
+
+def print_ingest_summary(entries: List[Dict], elapsed: float):
+    counts: Dict[str, int] = {}
+    for entry in entries:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    rows = sum(entry.get('rows', 0) for entry in entries if entry['status'] != 'invalid')
+    print("\n" + "=" * 80)
+    print(f"📥 INGESTA: {len(entries)} archivos, {rows} velas en {elapsed:.1f}s "
+          f"({rows / elapsed if elapsed > 0 else 0:.0f} velas/s)")
+    print("=" * 80)
+    print("   " + " | ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+    for entry in entries:
+        if entry['status'] in ('invalid', 'error'):
+            reason = entry.get('error') or "fechas no crecientes o filas malas (usar --repair)"
+            print(f"   ⚠️ {entry['file']}: {reason}")
+
+
+def save_index(entries: List[Dict], filename: str):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'files': entries},
+                  f, indent=2, ensure_ascii=False)
+    print(f"💾 Índice guardado en {filename}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta masiva de archivos de datos al cache binario")
+    parser.add_argument('paths', nargs='+', help="Archivos, directorios o patrones glob")
+    parser.add_argument('--workers', type=int, default=0, help="Procesos (0 = CPUs)")
+    parser.add_argument('--threads', action='store_true', help="Hilos en lugar de procesos")
+    parser.add_argument('--max-in-flight', type=int, help="Archivos en proceso a la vez")
+    parser.add_argument('--format', default=DEFAULT_DATETIME_FORMAT, help="Formato de fecha fijo")
+    parser.add_argument('--repair', action='store_true',
+                        help="Ordenar y descartar filas malas y duplicados en lugar de rechazar")
+    parser.add_argument('--force', action='store_true', help="Reconstruir caches al día")
+    parser.add_argument('--session-break', type=int, default=SESSION_BREAK_MINUTES,
+                        metavar='MINUTOS')
+    parser.add_argument('--index', help="Guardar el índice de huecos/duplicados en JSON")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    files = find_data_files(args.paths)
+    if not files:
+        print("❌ No se encontraron archivos de datos")
+        return 1
+
+    start = time.perf_counter()
+    entries = ingest_files(files, workers=args.workers or None, use_threads=args.threads,
+                           max_in_flight=args.max_in_flight, datetime_format=args.format,
+                           repair=args.repair, force=args.force,
+                           session_break_minutes=args.session_break, verbose=not args.quiet)
+    print_ingest_summary(entries, time.perf_counter() - start)
+    if args.index:
+        save_index(entries, args.index)
+    return 0 if all(e['status'] not in ('invalid', 'error') for e in entries) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
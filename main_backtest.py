@@ -6,8 +6,6 @@ main_backtest.py - Script principal con menú de opciones
 
 import sys
 import os
-from default import main as run_default_backtest
-from shearch import run_parameter_search
 
 def show_menu():
     """Mostrar menú principal"""
@@ -46,6 +44,9 @@ def option_1_default_backtest():
     print("="*50)
     
     try:
+        # Importación diferida: backtrader/pandas se cargan solo al elegir la opción
+        from default import main as run_default_backtest
+        
         # Ejecutar la función principal del archivo default.py
         run_default_backtest()
     except Exception as e:
@@ -61,6 +62,8 @@ def option_2_parameter_search():
     print("="*50)
     
     try:
+        from shearch import run_parameter_search
+        
         # Ejecutar la optimización de parámetros
         optimizer = run_parameter_search()
         return True
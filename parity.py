@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+parity.py - Arnés de paridad entre el backtest de referencia y las rutas aceleradas
+
+Cada optimización (estrategia vectorizada, flota, índice de liquidación,
+modo de memoria reducida...) debe producir exactamente los mismos trades que
+run_single_backtest con BinaryOptionsStrategy. La liquidación fina (M1) cambia
+los precios de salida a propósito: su resultado esperado son los trades de la
+referencia re-liquidados sobre velas M1 sintéticas. Este arnés:
+
+1. Ejecuta la referencia y cada candidata sobre datasets reales y sintéticos
+   (huecos, fines de semana, cambios de régimen) y un conjunto de parámetros
+   muestreado con Sobol.
+2. Compara los trade_log campo a campo (floats con tolerancia).
+3. Si hay diferencias, reporta la primera barra distinta y los valores de los
+   indicadores de cada lado en esa barra.
+4. Mide el tiempo de ambas rutas: el speedup solo se reporta junto con su
+   verificación de paridad.
+
+Uso:
+    python parity.py --data EURUSD5.csv --synthetic 2 --params 8
+    python parity.py --candidates vectorized,fleet --synthetic 3 --bars 8000 --json parity.json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import backtrader as bt
+import numpy as np
+
+from default import (
+    BinaryOptionsStrategy,
+    VectorizedBinaryOptionsStrategy,
+    run_single_backtest,
+)
+from settlement import NS_PER_MINUTE
+
+# Campos del trade_log: exactos y con tolerancia
+EXACT_FIELDS = ('entry_time', 'expiry_time', 'type', 'result')
+FLOAT_FIELDS = ('entry_price', 'exit_price', 'pnl')
+SUMMARY_FIELDS = ('total_trades', 'winning_trades', 'losing_trades', 'total_pnl', 'win_rate')
+
+
+# ----------------------------------------------------------------------
+# Datasets
+# ----------------------------------------------------------------------
+
+def synthetic_frame(bars: int, seed: int, minutes: int = 5, hole_rate: float = 0.02,
+                    start: str = '2024-01-01'):
+    """
+    Velas OHLCV sintéticas con fines de semana, huecos aleatorios y cambios de
+    régimen (tendencia / rango, volatilidad variable) para ejercitar SuperTrend y ADX.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=bars * 2, freq=f'{minutes}min')
+    index = index[index.dayofweek < 5]
+    index = index[rng.random(len(index)) > hole_rate][:bars]
+    n = len(index)
+
+    # Regímenes de 100 a 800 velas con deriva y volatilidad propias
+    drift = np.empty(n)
+    vol = np.empty(n)
+    position = 0
+    while position < n:
+        length = int(rng.integers(100, 800))
+        drift[position:position + length] = rng.choice([-1, 0, 0, 1]) * rng.uniform(0, 0.00012)
+        vol[position:position + length] = rng.uniform(0.0002, 0.0008)
+        position += length
+
+    close = 1.1 + np.cumsum(drift + rng.normal(0, 1, n) * vol)
+    open_ = np.r_[close[0], close[:-1]]
+    spread = rng.random((2, n)) * vol
+    frame = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + spread[0],
+        'low': np.minimum(open_, close) - spread[1],
+        'close': close,
+        'volume': rng.integers(1, 100, n).astype(float),
+    }, index=pd.DatetimeIndex(index, name='datetime'))
+    # Mismo redondeo que los CSV exportados
+    return frame.round(5)
+
+
+def file_frame(filename: str):
+    """DataFrame de un archivo real (a través del cache binario)"""
+    from data_cache import arrays_to_frame, load_arrays
+
+    arrays, _ = load_arrays(filename)
+    return arrays_to_frame(arrays)
+
+
+def fine_frame(frame, seed: int, fine_minutes: int = 1, hole_rate: float = 0.05):
+    """
+    Velas finas sintéticas coherentes con las velas de señal: cada vela se divide
+    en velas de fine_minutes que van de su apertura a su cierre con ruido (la
+    última cierra en el cierre de la vela) y se quitan algunas al azar, así que
+    la vela que liquida no siempre es la última de su vela de señal.
+    Retorna (timestamps int64 ns de apertura, cierres, minutos de la vela de señal).
+    """
+    from settlement import infer_bar_minutes
+
+    rng = np.random.default_rng(seed)
+    timestamps = np.asarray(frame.index.values, dtype='datetime64[ns]').view(np.int64)
+    signal_minutes = infer_bar_minutes(timestamps)
+    steps = max(1, int(signal_minutes // fine_minutes))
+
+    offsets = np.arange(steps) * fine_minutes * NS_PER_MINUTE
+    fine_timestamps = (timestamps[:, None] + offsets).ravel()
+    open_ = frame['open'].to_numpy()[:, None]
+    close = frame['close'].to_numpy()[:, None]
+    fraction = (np.arange(steps) + 1) / steps
+    noise = rng.normal(0, 1, (len(frame), steps)) * (frame['high'] - frame['low']).to_numpy()[:, None]
+    noise[:, -1] = 0
+    fine_close = (open_ + (close - open_) * fraction + noise / 2).ravel().round(5)
+
+    keep = rng.random(len(fine_timestamps)) > hole_rate
+    return fine_timestamps[keep], fine_close[keep], signal_minutes
+
+
+def feed_factory(frame) -> Callable:
+    """Cada ruta recibe un feed nuevo (los feeds no se reutilizan entre modos de exactbars)"""
+    return lambda: bt.feeds.PandasData(dataname=frame)
+
+
+def sample_param_sets(count: int, seed: int) -> List[Dict]:
+    """Parámetros muestreados con Sobol sobre la grilla del optimizador"""
+    from sampling import ParameterSampler
+    from shearch import OptimizedParameterSearch
+
+    search = OptimizedParameterSearch(None)
+    base = search._generate_promising_base()[:1]
+    sampler = ParameterSampler(search.define_parameter_ranges(), 'sobol', seed)
+    return base + sampler.next_batch(count - len(base), base)
+
+
+# ----------------------------------------------------------------------
+# Instantánea de indicadores
+# ----------------------------------------------------------------------
+
+class IndicatorSnapshot(bt.Analyzer):
+    """Valores de los indicadores y del estado de la estrategia en una barra dada"""
+    params = (('when', None),)
+
+    def __init__(self):
+        self.values = None
+
+    def _capture(self):
+        strategy = self.strategy
+        if self.values is not None or strategy.data.datetime.datetime(0) != self.p.when:
+            return
+        current_time = strategy.data.datetime.datetime(0)
+        self.values = {
+            'bar': len(strategy.data) - 1,
+            'close': strategy.data.close[0],
+            'ema1': strategy.ema1[0],
+            'supertrend': strategy.supertrend.supertrend[0],
+            'trend': strategy.supertrend.trend[0],
+            'signal_bars': strategy.supertrend.signal_bars[0],
+            'adx': strategy.adx[0],
+            'rsi': strategy.rsi[0],
+            'call_signal': bool(strategy.check_call_conditions()),
+            'put_signal': bool(strategy.check_put_conditions()),
+            'pending_trades': len(strategy.pending_trades),
+            'daily_trades': strategy.daily_trades[current_time.date()],
+            'last_trade_time': strategy.last_trade_time,
+        }
+
+    def prenext(self):
+        self._capture()
+
+    def next(self):
+        self._capture()
+
+    def get_analysis(self):
+        return self.values
+
+
+# ----------------------------------------------------------------------
+# Rutas de ejecución
+# ----------------------------------------------------------------------
+
+class BacktestPath:
+    """Ruta de referencia: un Cerebro por configuración con BinaryOptionsStrategy"""
+    name = 'reference'
+    strategy_class = BinaryOptionsStrategy
+    exactbars = 0
+
+    def extra_params(self, frame, params: Dict) -> Dict:
+        return {}
+
+    def expected(self, frame, param_sets: List[Dict],
+                 reference_results: List[Optional[Dict]]) -> List[Optional[Dict]]:
+        """Resultados que debe producir esta ruta: los de la referencia, sin cambios"""
+        return reference_results
+
+    def run(self, frame, param_sets: List[Dict]) -> List[Optional[Dict]]:
+        make_feed = feed_factory(frame)
+        return [run_single_backtest(make_feed(), exactbars=self.exactbars,
+                                    strategy_class=self.strategy_class,
+                                    **dict(params, **self.extra_params(frame, params)))
+                for params in param_sets]
+
+    def snapshot(self, frame, params: Dict, when) -> Optional[Dict]:
+        cerebro = bt.Cerebro(exactbars=self.exactbars, stdstats=False)
+        cerebro.adddata(feed_factory(frame)())
+        cerebro.addstrategy(self.strategy_class, **dict(params, **self.extra_params(frame, params)))
+        cerebro.addanalyzer(IndicatorSnapshot, _name='snapshot', when=when)
+        return cerebro.run()[0].analyzers.snapshot.get_analysis()
+
+
+class VectorizedPath(BacktestPath):
+    name = 'vectorized'
+    strategy_class = VectorizedBinaryOptionsStrategy
+
+
+class LowMemoryPath(BacktestPath):
+    name = 'low_memory'
+    exactbars = 1
+
+
+class SettlementIndexPath(BacktestPath):
+    name = 'settlement_index'
+
+    def extra_params(self, frame, params: Dict) -> Dict:
+        from settlement import build_settlement_index
+
+        timestamps = np.asarray(frame.index.values, dtype='datetime64[ns]').view(np.int64)
+        expiry = params.get('expiry_minutes', BinaryOptionsStrategy.params.expiry_minutes)
+        return {'settlement_index': build_settlement_index(timestamps, expiry)}
+
+
+class FineSettlementPath(BacktestPath):
+    """
+    Liquidación con FineSettlementPrices sobre velas M1 sintéticas (fine_frame).
+    Las entradas no dependen de la liquidación, así que lo esperado son los trades
+    de la referencia con la salida recalculada desde la definición: cierre de la
+    primera vela M1 que cierra en o después del cierre de la vela de entrada + expiry.
+    """
+    name = 'fine_settlement'
+    fine_minutes = 1
+
+    def __init__(self):
+        self._frame = None
+        self._fine = None
+
+    def _fine_data(self, frame):
+        # Mismas velas M1 para run, expected y snapshot del mismo dataset
+        if self._frame is not frame:
+            self._frame, self._fine = frame, fine_frame(frame, seed=len(frame),
+                                                        fine_minutes=self.fine_minutes)
+        return self._fine
+
+    def extra_params(self, frame, params: Dict) -> Dict:
+        from settlement import FineSettlementPrices
+
+        timestamps, prices, signal_minutes = self._fine_data(frame)
+        return {'fine_settlement': FineSettlementPrices(timestamps, prices, self.fine_minutes,
+                                                        signal_minutes)}
+
+    def expected(self, frame, param_sets: List[Dict],
+                 reference_results: List[Optional[Dict]]) -> List[Optional[Dict]]:
+        import pandas as pd
+
+        timestamps, prices, signal_minutes = self._fine_data(frame)
+        close_times = timestamps + self.fine_minutes * NS_PER_MINUTE
+        defaults = BinaryOptionsStrategy.params
+
+        expected_results = []
+        for params, result in zip(param_sets, reference_results):
+            if result is None:
+                expected_results.append(None)
+                continue
+            payout = params.get('payout_rate', defaults.payout_rate)
+            amount = params.get('trade_amount', defaults.trade_amount)
+            expiry = params.get('expiry_minutes', defaults.expiry_minutes)
+
+            trade_log = []
+            for trade in result.get('trade_log', []):
+                expiry_close = pd.Timestamp(trade['entry_time']) + \
+                    pd.Timedelta(minutes=signal_minutes + int(expiry))
+                position = int(np.searchsorted(close_times, expiry_close.value, side='left'))
+                if position >= len(close_times):
+                    # Sin dato fino: se liquida con el cierre de la vela de señal
+                    trade_log.append(trade)
+                    continue
+                exit_price = float(prices[position])
+                won = exit_price > trade['entry_price'] if trade['type'] == 'CALL' \
+                    else exit_price < trade['entry_price']
+                trade_log.append(dict(trade,
+                                      expiry_time=pd.Timestamp(int(timestamps[position])).to_pydatetime(),
+                                      exit_price=exit_price,
+                                      result='WIN' if won else 'LOSS',
+                                      pnl=amount * payout if won else -amount))
+
+            winning = sum(1 for trade in trade_log if trade['result'] == 'WIN')
+            total_pnl = 0.0
+            for trade in trade_log:
+                total_pnl += trade['pnl']
+            expected_results.append(dict(
+                result, trade_log=trade_log, winning_trades=winning,
+                losing_trades=len(trade_log) - winning, total_pnl=total_pnl,
+                win_rate=winning / len(trade_log) * 100 if trade_log else result.get('win_rate')))
+        return expected_results
+
+
+class FleetPath(BacktestPath):
+    """Todas las configuraciones en un Cerebro con indicadores compartidos"""
+    name = 'fleet'
+
+    def run(self, frame, param_sets: List[Dict]) -> List[Optional[Dict]]:
+        from fleet import FleetRunner
+
+        return FleetRunner(feed_factory(frame)()).run(param_sets)
+
+    def snapshot(self, frame, params: Dict, when) -> Optional[Dict]:
+        from fleet import FleetRunner
+
+        # La configuración duplicada: la segunda estrategia usa los indicadores prestados
+        runner = FleetRunner(feed_factory(frame)(),
+                             analyzers=[(IndicatorSnapshot, {'_name': 'snapshot', 'when': when})])
+        runner.run([params, params])
+        return runner.strategies[-1].analyzers.snapshot.get_analysis()
+
+
+PATHS = {path.name: path for path in
+         (BacktestPath(), VectorizedPath(), LowMemoryPath(), SettlementIndexPath(),
+          FineSettlementPath(), FleetPath())}
+
+
+# ----------------------------------------------------------------------
+# Comparación
+# ----------------------------------------------------------------------
+
+def _close(a, b, rel_tol: float, abs_tol: float) -> bool:
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=rel_tol, abs_tol=abs_tol)
+
+
+def diff_trade_logs(reference: Sequence[Dict], candidate: Sequence[Dict],
+                    rel_tol: float = 1e-9, abs_tol: float = 1e-9) -> Optional[Dict]:
+    """
+    Primera diferencia entre dos trade_log (None si son equivalentes):
+    índice del trade, campos distintos y barra en la que aparece la divergencia.
+    """
+    for i, (ref, cand) in enumerate(zip(reference, candidate)):
+        fields = [f for f in EXACT_FIELDS if ref.get(f) != cand.get(f)]
+        fields += [f for f in FLOAT_FIELDS if not _close(ref.get(f), cand.get(f), rel_tol, abs_tol)]
+        if fields:
+            if ref['entry_time'] != cand['entry_time']:
+                when = min(ref['entry_time'], cand['entry_time'])
+            else:
+                # Misma entrada: la divergencia aparece en la liquidación
+                when = min(ref['expiry_time'], cand['expiry_time'])
+            return {'trade': i, 'fields': fields, 'when': when,
+                    'reference': ref, 'candidate': cand}
+
+    if len(reference) != len(candidate):
+        i = min(len(reference), len(candidate))
+        extra = reference[i] if len(reference) > i else candidate[i]
+        return {'trade': i, 'fields': ['missing_trade'], 'when': extra['entry_time'],
+                'reference': reference[i] if len(reference) > i else None,
+                'candidate': candidate[i] if len(candidate) > i else None}
+    return None
+
+
+def diff_summaries(reference: Dict, candidate: Dict, rel_tol: float, abs_tol: float) -> List[str]:
+    return [f for f in SUMMARY_FIELDS
+            if not _close(reference.get(f), candidate.get(f), rel_tol, abs_tol)]
+
+
+def compare_path(frame, dataset: str, param_sets: List[Dict], candidate: BacktestPath,
+                 reference_results: List[Optional[Dict]], reference_seconds: float,
+                 rel_tol: float = 1e-9, abs_tol: float = 1e-9) -> Dict:
+    """Ejecutar la candidata, compararla con la referencia y tomar instantáneas si difiere"""
+    start = time.perf_counter()
+    candidate_results = candidate.run(frame, param_sets)
+    seconds = time.perf_counter() - start
+
+    expected_results = candidate.expected(frame, param_sets, reference_results)
+    mismatches = []
+    for n, (params, ref, cand) in enumerate(zip(param_sets, expected_results, candidate_results)):
+        if ref is None or cand is None:
+            if (ref is None) != (cand is None):
+                mismatches.append({'config': n, 'params': params, 'fields': ['failed_run'],
+                                   'reference_failed': ref is None,
+                                   'candidate_failed': cand is None})
+            continue
+
+        diff = diff_trade_logs(ref.get('trade_log', []), cand.get('trade_log', []),
+                               rel_tol, abs_tol)
+        summary_fields = diff_summaries(ref, cand, rel_tol, abs_tol)
+        if diff is None and not summary_fields:
+            continue
+
+        mismatch = {'config': n, 'params': params, 'summary_fields': summary_fields}
+        if diff is not None:
+            when = diff['when']
+            mismatch.update(diff)
+            mismatch['bar'] = int(frame.index.searchsorted(when))
+            mismatch['reference_indicators'] = PATHS['reference'].snapshot(frame, params, when)
+            mismatch['candidate_indicators'] = candidate.snapshot(frame, params, when)
+        mismatches.append(mismatch)
+
+    return {
+        'dataset': dataset,
+        'bars': len(frame),
+        'candidate': candidate.name,
+        'configs': len(param_sets),
+        'trades': sum(len(r.get('trade_log', [])) for r in reference_results if r),
+        'mismatches': mismatches,
+        'reference_seconds': reference_seconds,
+        'candidate_seconds': seconds,
+        'speedup': reference_seconds / seconds if seconds > 0 else float('inf'),
+    }
+
+
+def run_parity(datasets: List[Tuple[str, object]], param_sets: List[Dict],
+               candidates: Sequence[str], rel_tol: float = 1e-9,
+               abs_tol: float = 1e-9) -> List[Dict]:
+    """Referencia una vez por dataset; cada candidata se compara contra ella"""
+    reports = []
+    for dataset, frame in datasets:
+        start = time.perf_counter()
+        reference_results = PATHS['reference'].run(frame, param_sets)
+        reference_seconds = time.perf_counter() - start
+
+        for name in candidates:
+            report = compare_path(frame, dataset, param_sets, PATHS[name], reference_results,
+                                  reference_seconds, rel_tol, abs_tol)
+            reports.append(report)
+            print_parity_line(report)
+    return reports
+
+
+# ----------------------------------------------------------------------
+# Reporte
+# ----------------------------------------------------------------------
+
+def print_parity_line(report: Dict):
+    status = "✅" if not report['mismatches'] else f"❌ {len(report['mismatches'])} difieren"
+    speed = f"{report['speedup']:.2f}x" if not report['mismatches'] else "speedup no válido"
+    print(f"{status} {report['candidate']:<17} {report['dataset']:<22} "
+          f"{report['configs']} configs, {report['trades']} trades | "
+          f"ref {report['reference_seconds']:.1f}s vs {report['candidate_seconds']:.1f}s ({speed})")
+
+
+def _format_indicators(values: Optional[Dict]) -> str:
+    if not values:
+        return "(sin datos en esa barra)"
+    return ", ".join(f"{key}={value:.5f}" if isinstance(value, float) else f"{key}={value}"
+                     for key, value in values.items())
+
+
+def print_parity_report(reports: List[Dict]):
+    """Detalle de la primera diferencia de cada configuración que no coincide"""
+    print("\n" + "=" * 80)
+    print("🔬 PARIDAD REFERENCIA vs RUTAS ACELERADAS")
+    print("=" * 80)
+    for report in reports:
+        print_parity_line(report)
+        for mismatch in report['mismatches']:
+            print(f"   ⚠️ config #{mismatch['config']}: campos {mismatch.get('fields') or []} "
+                  f"resumen {mismatch.get('summary_fields') or []}")
+            if 'when' in mismatch:
+                print(f"      primera barra distinta: #{mismatch['bar']} ({mismatch['when']}), "
+                      f"trade #{mismatch['trade']}")
+                print(f"      ref : {mismatch['reference']}")
+                print(f"      cand: {mismatch['candidate']}")
+                print(f"      indicadores ref : {_format_indicators(mismatch['reference_indicators'])}")
+                print(f"      indicadores cand: {_format_indicators(mismatch['candidate_indicators'])}")
+            print(f"      params: {mismatch['params']}")
+
+    failed = sum(1 for report in reports if report['mismatches'])
+    print(f"\n{'✅ Paridad completa' if not failed else f'❌ {failed} comparaciones con diferencias'}"
+          f" ({len(reports)} comparaciones)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Paridad entre la referencia y las rutas aceleradas")
+    parser.add_argument('--data', action='append', default=[], help="Archivo real (repetible)")
+    parser.add_argument('--synthetic', type=int, default=2, help="Datasets sintéticos")
+    parser.add_argument('--bars', type=int, default=5000, help="Velas por dataset sintético")
+    parser.add_argument('--params', type=int, default=6, help="Configuraciones (Sobol)")
+    parser.add_argument('--candidates', default=','.join(n for n in PATHS if n != 'reference'))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--rel-tol', type=float, default=1e-9)
+    parser.add_argument('--abs-tol', type=float, default=1e-9)
+    parser.add_argument('--json', help="Guardar el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    candidates = [name.strip() for name in args.candidates.split(',') if name.strip()]
+    unknown = [name for name in candidates if name not in PATHS or name == 'reference']
+    if unknown:
+        print(f"❌ Rutas desconocidas: {unknown} (opciones: {', '.join(PATHS)})")
+        return 2
+
+    datasets = [(filename, file_frame(filename)) for filename in args.data]
+    datasets += [(f"sintético-{n + 1} (seed {args.seed + n})",
+                  synthetic_frame(args.bars, seed=args.seed + n))
+                 for n in range(args.synthetic)]
+    param_sets = sample_param_sets(args.params, args.seed)
+
+    reports = run_parity(datasets, param_sets, candidates, args.rel_tol, args.abs_tol)
+    print_parity_report(reports)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False, default=str)
+        print(f"💾 Reporte guardado en: {args.json}")
+    return 0 if all(not report['mismatches'] for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+report_plot.py - Gráfico rápido de precio, trades y equity para corridas largas
+
+cerebro.plot dibuja cada barra y cada línea de indicador: con años de M1 tarda
+minutos y usa gigabytes. Aquí solo se dibuja lo que cabe en los píxeles:
+
+- Precio: min/max por columna de píxel (cada columna conserva su mínimo y su
+  máximo en orden, así que los picos no desaparecen), en O(barras).
+- Equity: LTTB (Largest-Triangle-Three-Buckets), que conserva la forma de la
+  curva con un punto por columna.
+- Trades: los marcadores que caerían en la misma columna se agregan en uno,
+  con tamaño según la cantidad y color según el % ganado (por CALL/PUT).
+
+Salida PNG (matplotlib, backend Agg sin ventana) o SVG/HTML autocontenido sin
+dependencias. Un gráfico de 10M barras se arma en un par de segundos.
+
+Uso:
+    result = run_single_backtest(feed, **params)   # con keep_trade_log=True
+    render_report(*price_arrays(feed), result['trade_log'], filename='reporte.png')
+
+    python report_plot.py --data EURUSD5.csv --output reporte.html
+"""
+
+import argparse
+import html
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_WIDTH = 1600
+DEFAULT_HEIGHT = 900
+# Separación mínima entre marcadores de trades (píxeles)
+MARKER_SPACING = 6
+PLOT_FORMATS = ('png', 'svg', 'html')
+
+
+def _to_ns(times) -> np.ndarray:
+    """Fechas (datetime64, DatetimeIndex, datetimes) a int64 ns"""
+    return np.asarray(times, dtype='datetime64[ns]').view(np.int64)
+
+
+def minmax_indices(values: np.ndarray, columns: int) -> np.ndarray:
+    """
+    Índices del mínimo y el máximo de cada uno de `columns` tramos consecutivos,
+    en orden de aparición (más el primer y el último punto).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= 2 * columns:
+        return np.arange(n)
+    size = -(-n // columns)
+    columns = -(-n // size)
+    # Rellenar el último tramo con su último valor para poder usar reshape
+    padded = np.concatenate([values, np.full(columns * size - n, values[-1])])
+    blocks = padded.reshape(columns, size)
+    offsets = np.arange(columns) * size
+    lows = np.minimum(offsets + blocks.argmin(axis=1), n - 1)
+    highs = np.minimum(offsets + blocks.argmax(axis=1), n - 1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: `threshold` índices que conservan la forma de (x, y)"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        # Punto medio del tramo siguiente (el último tramo mira al último punto)
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[next_start:max(next_stop, next_start + 1)].mean()
+        next_y = y[next_start:max(next_stop, next_start + 1)].mean()
+        # Área del triángulo (previo, candidato, promedio siguiente)
+        areas = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous]) -
+                       (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def equity_from_trade_log(trade_log: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """(tiempos ns, P&L acumulado) en orden de liquidación"""
+    if not trade_log:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    times = _to_ns([trade['expiry_time'] for trade in trade_log])
+    pnl = np.array([trade['pnl'] for trade in trade_log], dtype=np.float64)
+    order = np.argsort(times, kind='stable')
+    return times[order], np.cumsum(pnl[order])
+
+
+def aggregate_trades(trade_log: Sequence[Dict], start_ns: int, end_ns: int,
+                     columns: int) -> List[Dict]:
+    """
+    Agrupar los trades por columna (de entrada) y tipo: un marcador por grupo
+    con cantidad, ganados y precio de entrada medio.
+    """
+    if not trade_log or columns <= 0:
+        return []
+    times = _to_ns([trade['entry_time'] for trade in trade_log])
+    prices = np.array([trade['entry_price'] for trade in trade_log], dtype=np.float64)
+    wins = np.array([trade['result'] == 'WIN' for trade in trade_log])
+    is_call = np.array([trade['type'] == 'CALL' for trade in trade_log])
+
+    span = max(end_ns - start_ns, 1)
+    # En float: (ns * columnas) desborda int64 con varios años de datos
+    column = np.clip(((times - start_ns) / span * columns).astype(np.int64), 0, columns - 1)
+    key = column * 2 + is_call
+    unique_keys, inverse, counts = np.unique(key, return_inverse=True, return_counts=True)
+    win_counts = np.bincount(inverse, weights=wins, minlength=len(unique_keys))
+    price_sums = np.bincount(inverse, weights=prices, minlength=len(unique_keys))
+    time_sums = np.bincount(inverse, weights=(times - start_ns).astype(np.float64),
+                            minlength=len(unique_keys))
+    return [{'time': int(start_ns + time_sums[i] / counts[i]),
+             'price': float(price_sums[i] / counts[i]),
+             'type': 'CALL' if unique_keys[i] % 2 else 'PUT',
+             'count': int(counts[i]), 'wins': int(win_counts[i])}
+            for i in range(len(unique_keys))]
+
+
+def price_arrays(data_feed) -> Tuple[np.ndarray, np.ndarray]:
+    """(tiempos ns, cierres) del DataFrame de un PandasData o del cache de un CSV"""
+    dataname = data_feed.p.dataname
+    if isinstance(dataname, str):
+        from data_cache import load_arrays
+
+        arrays, _ = load_arrays(dataname, mmap=True)
+        return np.asarray(arrays['datetime']), np.asarray(arrays['close'])
+    return _to_ns(dataname.index.values), dataname['close'].to_numpy(dtype=np.float64)
+
+
+def build_report(times, close, trade_log: Optional[Sequence[Dict]] = None,
+                 equity: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                 width: int = DEFAULT_WIDTH) -> Dict:
+    """Series ya reducidas a la resolución del gráfico"""
+    times = _to_ns(times)
+    close = np.asarray(close, dtype=np.float64)
+    columns = max(width, 2)
+
+    price_idx = minmax_indices(close, columns)
+    if equity is None:
+        equity = equity_from_trade_log(trade_log or [])
+    equity_times, equity_values = equity
+    equity_idx = lttb_indices(equity_times, equity_values, columns)
+
+    start_ns = int(times[0]) if len(times) else 0
+    end_ns = int(times[-1]) if len(times) else 1
+    return {
+        'bars': len(close),
+        'trades': len(trade_log or []),
+        'price': (times[price_idx], close[price_idx]),
+        'equity': (np.asarray(equity_times)[equity_idx], np.asarray(equity_values)[equity_idx]),
+        'markers': aggregate_trades(trade_log or [], start_ns, end_ns,
+                                    max(width // MARKER_SPACING, 1)),
+        'range': (start_ns, end_ns),
+    }
+
+
+def _marker_color(marker: Dict) -> str:
+    ratio = marker['wins'] / marker['count']
+    return '#2e7d32' if ratio >= 0.6 else '#c62828' if ratio < 0.4 else '#f9a825'
+
+
+def _marker_size(marker: Dict) -> float:
+    """Lado del marcador en píxeles: crece con log2 de la cantidad, con tope"""
+    return min(4.0 + 2.0 * np.log2(marker['count']), 16.0)
+
+
+def render_png(report: Dict, filename: str, width: int, height: int, title: str):
+    # matplotlib solo se importa al dibujar; Figure + FigureCanvasAgg no abre ventanas
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    dpi = 100
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    FigureCanvasAgg(figure)
+    price_ax, equity_ax = figure.subplots(2, 1, sharex=True,
+                                          gridspec_kw={'height_ratios': [3, 1]})
+
+    times, close = report['price']
+    price_ax.plot(times.view('datetime64[ns]'), close, color='#455a64', linewidth=0.6)
+    for kind, symbol in (('CALL', '^'), ('PUT', 'v')):
+        markers = [m for m in report['markers'] if m['type'] == kind]
+        if markers:
+            price_ax.scatter(np.array([m['time'] for m in markers]).view('datetime64[ns]'),
+                             [m['price'] for m in markers], marker=symbol,
+                             s=[_marker_size(m) ** 2 for m in markers],
+                             c=[_marker_color(m) for m in markers], alpha=0.8, linewidths=0)
+    price_ax.set_title(title)
+    price_ax.grid(alpha=0.2)
+
+    equity_times, equity_values = report['equity']
+    if len(equity_times):
+        equity_ax.plot(equity_times.view('datetime64[ns]'), equity_values,
+                       color='#1565c0', linewidth=0.8)
+        equity_ax.axhline(0, color='#9e9e9e', linewidth=0.5)
+    equity_ax.set_ylabel('P&L')
+    equity_ax.grid(alpha=0.2)
+    figure.autofmt_xdate()
+    figure.tight_layout()
+    figure.savefig(filename, dpi=dpi)
+
+
+def _polyline(xs: np.ndarray, ys: np.ndarray, x_range: Tuple[float, float], box: Tuple) -> str:
+    """Puntos de una polilínea SVG dentro de box = (x, y, ancho, alto)"""
+    if not len(xs):
+        return ''
+    left, top, box_width, box_height = box
+    low, high = float(np.min(ys)), float(np.max(ys))
+    span_y = (high - low) or 1.0
+    span_x = (x_range[1] - x_range[0]) or 1.0
+    px = left + (np.asarray(xs, dtype=np.float64) - x_range[0]) / span_x * box_width
+    py = top + box_height - (np.asarray(ys, dtype=np.float64) - low) / span_y * box_height
+    return ' '.join(f"{a:.1f},{b:.1f}" for a, b in zip(px, py))
+
+
+def render_svg(report: Dict, width: int, height: int, title: str) -> str:
+    margin = 40
+    price_box = (margin, margin, width - 2 * margin, (height - 3 * margin) * 0.75)
+    equity_box = (margin, 2 * margin + price_box[3], width - 2 * margin,
+                  (height - 3 * margin) * 0.25)
+    x_range = tuple(float(v) for v in report['range'])
+    times, close = report['price']
+    equity_times, equity_values = report['equity']
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="12">',
+             '<rect width="100%" height="100%" fill="white"/>',
+             f'<text x="{margin}" y="{margin - 12}" font-size="15">{html.escape(title)}</text>',
+             f'<polyline fill="none" stroke="#455a64" stroke-width="0.7" '
+             f'points="{_polyline(times, close, x_range, price_box)}"/>']
+
+    if len(close):
+        low, high = float(close.min()), float(close.max())
+        span_y = (high - low) or 1.0
+        span_x = (x_range[1] - x_range[0]) or 1.0
+        for marker in report['markers']:
+            cx = price_box[0] + (marker['time'] - x_range[0]) / span_x * price_box[2]
+            cy = price_box[1] + price_box[3] - (marker['price'] - low) / span_y * price_box[3]
+            size = _marker_size(marker)
+            direction = -1 if marker['type'] == 'CALL' else 1
+            points = (f"{cx - size / 2:.1f},{cy - direction * size / 2:.1f} "
+                      f"{cx + size / 2:.1f},{cy - direction * size / 2:.1f} "
+                      f"{cx:.1f},{cy + direction * size / 2:.1f}")
+            label = (f"{marker['type']}: {marker['count']} trades, {marker['wins']} ganados, "
+                     f"{np.datetime64(marker['time'], 'ns').astype('datetime64[m]')}")
+            parts.append(f'<polygon points="{points}" fill="{_marker_color(marker)}" '
+                         f'fill-opacity="0.8"><title>{html.escape(label)}</title></polygon>')
+        parts.append(f'<text x="{width - margin}" y="{margin - 12}" text-anchor="end">'
+                     f'{low:.5f} – {high:.5f}</text>')
+
+    if len(equity_times):
+        parts.append(f'<polyline fill="none" stroke="#1565c0" stroke-width="1" '
+                     f'points="{_polyline(equity_times, equity_values, x_range, equity_box)}"/>')
+        parts.append(f'<text x="{margin}" y="{equity_box[1] - 4}">P&amp;L '
+                     f'{float(equity_values[-1]):.2f}</text>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def render_report(times, close, trade_log: Optional[Sequence[Dict]] = None,
+                  equity: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                  filename: str = 'reporte.png', width: int = DEFAULT_WIDTH,
+                  height: int = DEFAULT_HEIGHT, title: str = 'Backtest') -> Dict:
+    """
+    Dibujar precio, trades agregados y equity. El formato sale de la extensión
+    (.png, .svg o .html). Retorna el reporte reducido (útil para inspeccionar).
+    """
+    start = time.perf_counter()
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension not in PLOT_FORMATS:
+        raise ValueError(f"Formato no soportado: .{extension} (opciones: {', '.join(PLOT_FORMATS)})")
+
+    report = build_report(times, close, trade_log, equity, width)
+    if extension == 'png':
+        render_png(report, filename, width, height, title)
+    else:
+        svg = render_svg(report, width, height, title)
+        if extension == 'html':
+            svg = (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+                   f'<title>{html.escape(title)}</title></head><body>\n{svg}\n</body></html>')
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(svg)
+
+    report['seconds'] = time.perf_counter() - start
+    print(f"🖼️ Gráfico guardado en {filename}: {report['bars']} velas → "
+          f"{len(report['price'][0])} puntos, {report['trades']} trades → "
+          f"{len(report['markers'])} marcadores ({report['seconds']:.2f}s)")
+    return report
+
+
+def main(argv=None):
+    from default import load_data, run_single_backtest
+
+    parser = argparse.ArgumentParser(description="Gráfico reducido de un backtest")
+    parser.add_argument('--data', default='EURUSD5.csv')
+    parser.add_argument('--output', default='reporte.png', help="Archivo .png, .svg o .html")
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH)
+    parser.add_argument('--height', type=int, default=DEFAULT_HEIGHT)
+    args = parser.parse_args(argv)
+
+    data_feed = load_data(args.data)
+    if data_feed is None:
+        return 1
+    result = run_single_backtest(data_feed, debug=False)
+    if not result:
+        return 1
+    times, close = price_arrays(data_feed)
+    render_report(times, close, result.get('trade_log'), filename=args.output,
+                  width=args.width, height=args.height, title=args.data)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+repricing.py - Re-valoración de payouts y gestión de capital sin backtests
+
+payout_rate y trade_amount solo intervienen al liquidar: con la secuencia de
+resultados ganado/perdido de una configuración (results['outcomes'], un byte
+por trade en orden de liquidación) se puede recalcular P&L, curva de equity y
+drawdown para una grilla completa de payouts y reglas de stake, vectorizado
+con NumPy:
+
+- fixed:       stake fijo (el P&L es lineal en el stake)
+- compounding: stake = fracción del balance antes de cada trade
+- martingale:  stake = base * multiplicador^(pérdidas seguidas), volviendo a la
+               base tras ganar o tras max_steps pérdidas seguidas (el stake más
+               alto es base * multiplicador^(max_steps - 1))
+
+Las reglas con estado (compounding, martingale) aplican el stake en orden de
+liquidación, como si cada trade conociera el resultado de los anteriores; con
+trades solapados es una aproximación.
+
+OutcomeStore guarda las secuencias de miles de configuraciones en un .npz
+(bits empaquetados) para responder preguntas de payout en milisegundos.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Elementos float64 por bloque de configuraciones en OutcomeStore.reprice_fixed (~32 MB)
+REPRICE_CHUNK_ELEMENTS = 1 << 22
+
+
+def outcome_array(outcomes) -> np.ndarray:
+    """bytes / bytearray / secuencia de 0-1 → array bool"""
+    if isinstance(outcomes, (bytes, bytearray, memoryview)):
+        return np.frombuffer(bytes(outcomes), dtype=np.uint8).astype(bool)
+    return np.asarray(outcomes, dtype=bool)
+
+
+def _returns(won: np.ndarray, payouts: np.ndarray) -> np.ndarray:
+    """Retorno por unidad apostada: (payouts, trades) con payout si gana y -1 si pierde"""
+    return np.where(won[None, :], payouts[:, None], -1.0)
+
+
+def _curve_metrics(pnl: np.ndarray, balance: float) -> Dict[str, np.ndarray]:
+    """Métricas sobre el último eje de una matriz de P&L por trade"""
+    equity = np.cumsum(pnl, axis=-1)
+    if equity.shape[-1] == 0:
+        zeros = np.zeros(pnl.shape[:-1])
+        return {'total_pnl': zeros, 'max_drawdown': zeros, 'final_balance': zeros + balance,
+                'min_balance': zeros + balance, 'ruined': zeros.astype(bool)}
+    # Pico desde el balance inicial (equity 0), igual que BinaryOptionsAnalyzer
+    peak = np.maximum(np.maximum.accumulate(equity, axis=-1), 0.0)
+    min_equity = np.minimum(equity.min(axis=-1), 0.0)
+    return {
+        'total_pnl': equity[..., -1],
+        'max_drawdown': (peak - equity).max(axis=-1),
+        'final_balance': balance + equity[..., -1],
+        'min_balance': balance + min_equity,
+        'ruined': balance + min_equity <= 0,
+    }
+
+
+def reprice_fixed(outcomes, payouts: Sequence[float], stakes: Sequence[float] = (1.0,),
+                  balance: float = 100.0) -> Dict[str, np.ndarray]:
+    """
+    Stake fijo. Arrays de forma (payouts, stakes). Con el payout y el trade_amount
+    del backtest reproduce total_pnl y max_drawdown de BinaryOptionsAnalyzer.
+    """
+    won = outcome_array(outcomes)
+    payouts = np.asarray(payouts, dtype=np.float64)
+    stakes = np.asarray(stakes, dtype=np.float64)
+    pnl = stakes[None, :, None] * _returns(won, payouts)[:, None, :]
+    metrics = _curve_metrics(pnl, balance)
+    metrics['max_stake'] = np.broadcast_to(stakes[None, :], metrics['total_pnl'].shape)
+    return metrics
+
+
+def reprice_compounding(outcomes, payouts: Sequence[float], fractions: Sequence[float],
+                        balance: float = 100.0) -> Dict[str, np.ndarray]:
+    """Stake = fracción del balance actual. Arrays de forma (payouts, fractions)"""
+    won = outcome_array(outcomes)
+    payouts = np.asarray(payouts, dtype=np.float64)
+    fractions = np.asarray(fractions, dtype=np.float64)
+    growth = 1.0 + fractions[None, :, None] * _returns(won, payouts)[:, None, :]
+    balances = balance * np.cumprod(np.maximum(growth, 0.0), axis=-1)
+    previous = np.concatenate([np.full(balances.shape[:-1] + (1,), balance),
+                               balances[..., :-1]], axis=-1)
+    pnl = balances - previous
+    metrics = _curve_metrics(pnl, balance)
+    metrics['max_stake'] = (fractions[None, :, None] * previous).max(axis=-1) \
+        if pnl.shape[-1] else np.zeros(pnl.shape[:-1])
+    return metrics
+
+
+def loss_streak_before(won: np.ndarray, max_steps: Optional[int] = None) -> np.ndarray:
+    """
+    Pérdidas seguidas antes de cada trade (0 tras una ganancia); con max_steps,
+    el ciclo vuelve a 0 después de max_steps pérdidas seguidas (valores 0..max_steps-1).
+    """
+    won = np.asarray(won, dtype=bool)
+    losses = (~won).astype(np.int64)
+    cumulative = np.cumsum(losses)
+    # Pérdidas acumuladas en la última ganancia (reinicio de la racha)
+    at_last_win = np.maximum.accumulate(np.where(won, cumulative, 0))
+    streak_after = cumulative - at_last_win
+    streak_before = np.concatenate([[0], streak_after[:-1]])
+    if max_steps is not None:
+        if max_steps < 1:
+            raise ValueError("max_steps debe ser >= 1")
+        streak_before = streak_before % max_steps
+    return streak_before
+
+
+def reprice_martingale(outcomes, payouts: Sequence[float], base_stakes: Sequence[float] = (1.0,),
+                       multipliers: Sequence[float] = (2.0,), max_steps: Optional[int] = 4,
+                       balance: float = 100.0) -> Dict[str, np.ndarray]:
+    """Martingala (multiplicador > 1) o anti-martingala (< 1). Forma (payouts, bases, multiplicadores)"""
+    won = outcome_array(outcomes)
+    payouts = np.asarray(payouts, dtype=np.float64)
+    base_stakes = np.asarray(base_stakes, dtype=np.float64)
+    multipliers = np.asarray(multipliers, dtype=np.float64)
+
+    steps = loss_streak_before(won, max_steps)
+    unit_stakes = multipliers[:, None] ** steps[None, :]               # (M, n)
+    stakes = base_stakes[:, None, None] * unit_stakes[None, :, :]     # (B, M, n)
+    pnl = stakes[None, ...] * _returns(won, payouts)[:, None, None, :]
+    metrics = _curve_metrics(pnl, balance)
+    metrics['max_stake'] = np.broadcast_to(stakes.max(axis=-1, initial=0.0)[None, ...],
+                                           metrics['total_pnl'].shape)
+    return metrics
+
+
+def break_even_payout(outcomes) -> float:
+    """Payout mínimo para P&L >= 0 con stake fijo: pérdidas / ganancias"""
+    won = outcome_array(outcomes)
+    wins = int(won.sum())
+    return float('inf') if wins == 0 else (len(won) - wins) / wins
+
+
+class OutcomeStore:
+    """Secuencias de resultados de muchas configuraciones, persistibles en un .npz"""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.params: List[Dict] = []
+        self.sequences: List[np.ndarray] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, combo_id: int, params: Dict, outcomes):
+        self.ids.append(int(combo_id))
+        self.params.append(dict(params))
+        self.sequences.append(outcome_array(outcomes))
+
+    def matrix(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        (configuraciones, max_trades) de retornos unitarios: +1 gana, -1 pierde,
+        0 relleno (el relleno no cambia P&L ni drawdown). start/stop: solo esas filas
+        """
+        sequences = self.sequences[start:stop]
+        width = max((len(seq) for seq in sequences), default=0)
+        signs = np.zeros((len(sequences), width), dtype=np.int8)
+        for row, seq in enumerate(sequences):
+            signs[row, :len(seq)] = np.where(seq, 1, -1)
+        return signs
+
+    def reprice_fixed(self, payouts: Sequence[float], stake: float = 1.0,
+                      balance: float = 100.0) -> Dict[str, np.ndarray]:
+        """
+        Stake fijo para todas las configuraciones: arrays (payouts, configuraciones).
+        Las curvas de equity se arman por bloques de configuraciones para que la
+        memoria no crezca con payouts x configuraciones x trades.
+        """
+        payouts = np.asarray(payouts, dtype=np.float64)
+        count = len(self.sequences)
+        shape = (len(payouts), count)
+        metrics = {key: np.zeros(shape) for key in
+                   ('total_pnl', 'max_drawdown', 'final_balance', 'min_balance')}
+        metrics['ruined'] = np.zeros(shape, dtype=bool)
+
+        width = max((len(seq) for seq in self.sequences), default=0)
+        chunk = max(1, REPRICE_CHUNK_ELEMENTS // max(1, len(payouts) * width))
+        for start in range(0, count, chunk):
+            signs = self.matrix(start, start + chunk)
+            pnl = stake * np.where(signs[None, :, :] > 0, payouts[:, None, None],
+                                   signs[None, :, :].astype(np.float64))
+            for key, values in _curve_metrics(pnl, balance).items():
+                metrics[key][:, start:start + len(signs)] = values
+        return metrics
+
+    def save(self, filename: str):
+        lengths = np.array([len(seq) for seq in self.sequences], dtype=np.int64)
+        flat = np.concatenate(self.sequences) if self.sequences else np.zeros(0, dtype=bool)
+        np.savez_compressed(filename, ids=np.array(self.ids, dtype=np.int64), lengths=lengths,
+                            bits=np.packbits(flat), params=json.dumps(self.params))
+
+    @classmethod
+    def load(cls, filename: str) -> 'OutcomeStore':
+        data = np.load(filename)
+        store = cls()
+        lengths = data['lengths']
+        flat = np.unpackbits(data['bits'], count=int(lengths.sum())).astype(bool)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        store.ids = [int(i) for i in data['ids']]
+        store.params = json.loads(str(data['params']))
+        store.sequences = [flat[offsets[i]:offsets[i + 1]] for i in range(len(lengths))]
+        return store
+
+
+def parse_grid(text: str) -> List[float]:
+    """'0.6:0.9:0.05' (inicio:fin:paso, fin incluido) o '0.7,0.8,0.85'"""
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 10) for i in range(count)]
+    return [float(part) for part in text.split(',') if part.strip()]
+
+
+def print_store_repricing(store: OutcomeStore, payouts: Iterable[float], stake: float = 1.0,
+                          balance: float = 100.0, top: int = 5):
+    """Mejores configuraciones por payout (stake fijo)"""
+    payouts = list(payouts)
+    metrics = store.reprice_fixed(payouts, stake, balance)
+    print("\n" + "=" * 80)
+    print(f"💱 RE-VALORACIÓN DE {len(store)} CONFIGURACIONES (stake ${stake:g})")
+    print("=" * 80)
+    for p, payout in enumerate(payouts):
+        total = metrics['total_pnl'][p]
+        profitable = int(np.count_nonzero(total > 0))
+        print(f"\n💰 Payout {payout:.0%}: {profitable}/{len(store)} configuraciones rentables")
+        for row in np.argsort(-total, kind='stable')[:top]:
+            print(f"   #{store.ids[row]:<5} P&L: ${total[row]:8.2f} | "
+                  f"Max DD: ${metrics['max_drawdown'][p, row]:7.2f} | "
+                  f"trades: {len(store.sequences[row])}")
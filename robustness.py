@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+robustness.py - Análisis de robustez (bootstrap y permutaciones) de las mejores configuraciones
+
+Para cada configuración se toma su secuencia ganado/perdido (la que guarda la
+búsqueda, sin repetir el backtest) y se generan miles de remuestreos con NumPy:
+los de todas las configuraciones forman una matriz (configuraciones x remuestreos)
+que se recorre trade a trade, sin bucles por remuestreo ni por configuración:
+
+- Bootstrap: intervalos de confianza de win rate, P&L total y max drawdown.
+- Test binomial exacto contra el win rate de equilibrio del payout,
+  p0 = 1 / (1 + payout): ¿el win rate observado puede ser suerte?
+- Sign-flip: p-valor del P&L medio contra 0 invirtiendo signos al azar.
+- Permutación del orden: qué tan extremo es el drawdown observado frente a
+  los órdenes posibles de los mismos trades.
+"""
+
+from math import exp, lgamma, log
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def trade_arrays(trade_log: Sequence[Dict]):
+    """(won, pnl) como arrays a partir de un trade_log"""
+    won = np.fromiter((t['result'] == 'WIN' for t in trade_log), dtype=bool,
+                      count=len(trade_log))
+    pnl = np.fromiter((t['pnl'] for t in trade_log), dtype=np.float64, count=len(trade_log))
+    return won, pnl
+
+
+def max_drawdown(pnl: np.ndarray) -> np.ndarray:
+    """Max drawdown de la curva de equity (acumulada desde 0) a lo largo del último eje"""
+    equity = np.cumsum(pnl, axis=-1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=-1), 0.0)
+    return np.max(peak - equity, axis=-1)
+
+
+def binomial_tail(wins: int, trades: int, p0: float) -> float:
+    """P(X >= wins) para X ~ Binomial(trades, p0), exacto en espacio logarítmico"""
+    if trades == 0 or wins <= 0:
+        return 1.0
+    if p0 <= 0:
+        return 0.0
+    if p0 >= 1:
+        return 1.0
+    log_p, log_q = log(p0), log(1 - p0)
+    log_norm = lgamma(trades + 1)
+    terms = [log_norm - lgamma(k + 1) - lgamma(trades - k + 1) + k * log_p + (trades - k) * log_q
+             for k in range(wins, trades + 1)]
+    top = max(terms)
+    return min(1.0, exp(top) * sum(exp(t - top) for t in terms))
+
+
+def outcome_pnl(won: np.ndarray, payout_rate: float, amount: float = 1.0) -> np.ndarray:
+    """P&L de cada trade a partir de la secuencia ganado/perdido (stake fijo)"""
+    return np.where(won, amount * payout_rate, -amount)
+
+
+def _equity_walk(next_wins, win_pnl: np.ndarray, loss_pnl: np.ndarray, counts: np.ndarray,
+                 n_resamples: int):
+    """
+    Recorrer las posiciones de trade con los remuestreos de todas las configuraciones
+    como una sola matriz (configs, n_resamples), sin materializar las secuencias.
+    next_wins(position) da los ganados de esa posición. Las configuraciones con menos
+    trades dan pasos nulos al final (no cambian el P&L ni el drawdown).
+    Retorna (ganados, P&L total, max drawdown).
+    """
+    shape = (len(counts), n_resamples)
+    wins = np.zeros(shape, dtype=np.int64)
+    equity = np.zeros(shape)
+    peak = np.zeros(shape)
+    drawdown = np.zeros(shape)
+    for position in range(int(counts.max())):
+        active = (position < counts)[:, None]
+        won = next_wins(position) & active
+        wins += won
+        equity += np.where(won, win_pnl[:, None], np.where(active, -loss_pnl[:, None], 0.0))
+        np.maximum(peak, equity, out=peak)
+        np.maximum(drawdown, peak - equity, out=drawdown)
+    return wins, equity, drawdown
+
+
+def bootstrap_metrics(counts: np.ndarray, wins: np.ndarray, win_pnl: np.ndarray,
+                      loss_pnl: np.ndarray, n_resamples: int,
+                      rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """
+    Distribuciones bootstrap de win rate (%), P&L total y max drawdown, arrays
+    (configs, n_resamples). Con stake fijo el P&L de un trade depende solo de si
+    ganó, así que sortear un trade con reemplazo es sortear ganado con p = wins / n.
+    """
+    p_win = (wins / counts)[:, None]
+    won, total, drawdown = _equity_walk(
+        lambda position: rng.random((len(counts), n_resamples)) < p_win,
+        win_pnl, loss_pnl, counts, n_resamples)
+    return {'win_rate': won / counts[:, None] * 100,
+            'total_pnl': total,
+            'max_drawdown': drawdown}
+
+
+def sign_flip_pvalue(counts: np.ndarray, wins: np.ndarray, win_pnl: np.ndarray,
+                     loss_pnl: np.ndarray, n_resamples: int,
+                     rng: np.random.Generator) -> np.ndarray:
+    """
+    P(media >= observada) bajo H0 simétrica de media 0 (una cola), por configuración.
+    Invertir signos al azar = Binomial(ganados, 1/2) ganados y Binomial(perdidos, 1/2)
+    perdidos que conservan su signo.
+    """
+    losses = counts - wins
+    observed = wins * win_pnl - losses * loss_pnl
+    kept_wins = rng.binomial(wins[:, None], 0.5, size=(len(counts), n_resamples))
+    kept_losses = rng.binomial(losses[:, None], 0.5, size=(len(counts), n_resamples))
+    flipped = (win_pnl[:, None] * (2 * kept_wins - wins[:, None])
+               - loss_pnl[:, None] * (2 * kept_losses - losses[:, None]))
+    # Mismo n por configuración: comparar sumas equivale a comparar medias
+    hits = np.count_nonzero(flipped >= observed[:, None] - 1e-9, axis=1)
+    return (hits + 1) / (n_resamples + 1)
+
+
+def drawdown_permutation_percentile(counts: np.ndarray, wins: np.ndarray, win_pnl: np.ndarray,
+                                    loss_pnl: np.ndarray, observed: np.ndarray,
+                                    n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    % de órdenes aleatorios de los mismos trades con drawdown <= al observado.
+    Un orden uniforme se construye posición a posición: ganado con probabilidad
+    ganados restantes / trades restantes.
+    """
+    remaining = np.repeat(wins[:, None], n_resamples, axis=1)
+
+    def next_wins(position):
+        slots = np.maximum(counts - position, 1)[:, None]
+        won = rng.random(remaining.shape) * slots < remaining
+        remaining[...] -= won
+        return won
+
+    _, _, drawdown = _equity_walk(next_wins, win_pnl, loss_pnl, counts, n_resamples)
+    return np.count_nonzero(drawdown <= observed[:, None] + 1e-9, axis=1) / n_resamples * 100
+
+
+def _interval(values: np.ndarray, bounds) -> tuple:
+    low, high = np.percentile(values, bounds)
+    return float(low), float(high)
+
+
+def analyze_sequences(sequences: Sequence[np.ndarray], payout_rates: Sequence[float],
+                      amounts: Optional[Sequence[float]] = None, n_resamples: int = 10_000,
+                      confidence: float = 0.95, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Análisis de robustez de varias secuencias ganado/perdido (stake fijo) a la vez:
+    los remuestreos de todas las configuraciones se generan en las mismas matrices.
+    """
+    analyses = [{'total_trades': 0} for _ in sequences]
+    rows = [i for i, won in enumerate(sequences) if len(won)]
+    if not rows:
+        return analyses
+
+    amounts = amounts if amounts is not None else [1.0] * len(sequences)
+    counts = np.array([len(sequences[i]) for i in rows], dtype=np.int64)
+    wins = np.array([int(np.count_nonzero(sequences[i])) for i in rows], dtype=np.int64)
+    win_pnl = np.array([amounts[i] * payout_rates[i] for i in rows], dtype=np.float64)
+    loss_pnl = np.array([amounts[i] for i in rows], dtype=np.float64)
+    observed_drawdown = np.array([max_drawdown(outcome_pnl(sequences[i], payout_rates[i],
+                                                           amounts[i])) for i in rows])
+
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2 * 100
+    bounds = (alpha, 100 - alpha)
+    boot = bootstrap_metrics(counts, wins, win_pnl, loss_pnl, n_resamples, rng)
+    sign_flip = sign_flip_pvalue(counts, wins, win_pnl, loss_pnl, n_resamples, rng)
+    percentiles = drawdown_permutation_percentile(counts, wins, win_pnl, loss_pnl,
+                                                  observed_drawdown, n_resamples, rng)
+
+    for row, i in enumerate(rows):
+        n, n_wins = int(counts[row]), int(wins[row])
+        break_even = 1 / (1 + payout_rates[i]) * 100
+        analyses[i] = {
+            'total_trades': n,
+            'win_rate': n_wins / n * 100,
+            'total_pnl': float(outcome_pnl(sequences[i], payout_rates[i], amounts[i]).sum()),
+            'max_drawdown': float(observed_drawdown[row]),
+            'win_rate_ci': _interval(boot['win_rate'][row], bounds),
+            'total_pnl_ci': _interval(boot['total_pnl'][row], bounds),
+            'max_drawdown_ci': _interval(boot['max_drawdown'][row], bounds),
+            'break_even_win_rate': break_even,
+            'p_value_break_even': binomial_tail(n_wins, n, break_even / 100),
+            'p_value_sign_flip': float(sign_flip[row]),
+            'drawdown_percentile': float(percentiles[row]),
+            'prob_positive_pnl': float(np.mean(boot['total_pnl'][row] > 0) * 100),
+        }
+    return analyses
+
+
+def analyze_trades(trade_log: Sequence[Dict], payout_rate: float, amount: float = 1.0,
+                   n_resamples: int = 10_000, confidence: float = 0.95,
+                   seed: Optional[int] = None) -> Dict:
+    """Análisis de robustez completo de una secuencia de trades"""
+    won, _ = trade_arrays(trade_log)
+    return analyze_sequences([won], [payout_rate], [amount], n_resamples, confidence, seed)[0]
+
+
+def analyze_configurations(data_feed, results: List, n_resamples: int = 10_000,
+                           confidence: float = 0.95, seed: Optional[int] = None,
+                           backtest_kwargs: Optional[Dict] = None) -> List[Dict]:
+    """
+    Analizar los OptimizedResult dados a partir de la secuencia ganado/perdido que
+    guardó la búsqueda (result.outcomes). Solo se re-ejecuta el backtest de los
+    que no la traen (p. ej. resultados de workers distribuidos).
+    """
+    from default import BinaryOptionsStrategy, run_single_backtest
+    from repricing import outcome_array
+
+    sequences, payouts, amounts, analyzed = [], [], [], []
+    for result in results:
+        params = dict(result.parameters, debug=False, **(backtest_kwargs or {}))
+        payout = params.get('payout_rate', BinaryOptionsStrategy.params.payout_rate)
+        amount = params.get('trade_amount', BinaryOptionsStrategy.params.trade_amount)
+
+        outcomes = getattr(result, 'outcomes', None)
+        if outcomes is not None and len(outcomes) == result.total_trades:
+            won = outcome_array(outcomes)
+        else:
+            backtest = run_single_backtest(data_feed, **params)
+            if not backtest:
+                continue
+            won, _ = trade_arrays(backtest['trade_log'])
+
+        sequences.append(won)
+        payouts.append(payout)
+        amounts.append(amount)
+        analyzed.append(result)
+
+    analyses = analyze_sequences(sequences, payouts, amounts, n_resamples, confidence, seed)
+    for analysis, result in zip(analyses, analyzed):
+        analysis['combination_id'] = result.combination_id
+        analysis['parameters'] = result.parameters
+    return analyses
+
+
+def print_robustness_report(analyses: List[Dict], n_resamples: int):
+    """Mostrar los intervalos de confianza y p-valores de cada configuración"""
+    print("\n" + "=" * 80)
+    print(f"🎲 ANÁLISIS DE ROBUSTEZ ({n_resamples:,} remuestreos por configuración)")
+    print("=" * 80)
+
+    for analysis in analyses:
+        if not analysis.get('total_trades'):
+            continue
+        wr_lo, wr_hi = analysis['win_rate_ci']
+        pnl_lo, pnl_hi = analysis['total_pnl_ci']
+        dd_lo, dd_hi = analysis['max_drawdown_ci']
+        p_value = analysis['p_value_break_even']
+        verdict = "✅ significativo" if p_value < 0.05 else "⚠️ compatible con suerte"
+
+        print(f"\n#{analysis['combination_id']} - {analysis['total_trades']} trades")
+        print(f"   🎯 Win Rate: {analysis['win_rate']:.1f}% "
+              f"(IC: {wr_lo:.1f}% - {wr_hi:.1f}%) | equilibrio: {analysis['break_even_win_rate']:.1f}%")
+        print(f"   💰 P&L: ${analysis['total_pnl']:.2f} (IC: ${pnl_lo:.2f} - ${pnl_hi:.2f}) | "
+              f"P(P&L > 0): {analysis['prob_positive_pnl']:.1f}%")
+        print(f"   📉 Max DD: ${analysis['max_drawdown']:.2f} (IC: ${dd_lo:.2f} - ${dd_hi:.2f}) | "
+              f"percentil por orden: {analysis['drawdown_percentile']:.0f}%")
+        print(f"   🧪 p-valor vs equilibrio: {p_value:.4f} | "
+              f"sign-flip: {analysis['p_value_sign_flip']:.4f} | {verdict}")
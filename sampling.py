@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sampling.py - Muestreo de baja discrepancia (Sobol / hipercubo latino) del espacio de parámetros
+
+Con un presupuesto de 200 de 20.000 combinaciones, barajar la grilla deja
+zonas repetidas y huecos. Aquí cada combinación es un punto del cubo [0, 1)^d
+que se proyecta sobre la lista discreta de valores de cada parámetro (o sobre
+su rango continuo si se define como tupla (min, max)):
+
+- 'sobol': secuencia de Sobol (números de dirección de Joe y Kuo). Cualquier
+  prefijo de 2^k puntos reparte por igual cada valor de cada parámetro, y la
+  secuencia se puede continuar en lotes sin repetir puntos.
+- 'lhs': hipercubo latino; cada lote estratifica cada parámetro por separado.
+- 'random': muestreo uniforme (referencia).
+
+coverage_stats() resume qué tan parejo quedó el muestreo: cobertura de valores
+por parámetro, desbalance entre valores y cobertura de pares de valores.
+"""
+
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SAMPLING_METHODS = ('random', 'sobol', 'lhs')
+
+SOBOL_BITS = 32
+
+# Números de dirección de Joe y Kuo (new-joe-kuo-6.21201), dimensiones 2 a 21:
+# (grado s, coeficientes a, m_1..m_s). La dimensión 1 es la secuencia de van der Corput.
+SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+
+MAX_SOBOL_DIMENSIONS = len(SOBOL_DIRECTIONS) + 1
+
+
+def sobol_direction_vectors(dimensions: int) -> np.ndarray:
+    """Matriz (dimensions, SOBOL_BITS) de vectores de dirección v_k = m_k << (bits - k)"""
+    if dimensions > MAX_SOBOL_DIMENSIONS:
+        raise ValueError(f"Sobol admite hasta {MAX_SOBOL_DIMENSIONS} parámetros "
+                         f"(recibidos {dimensions})")
+    vectors = np.zeros((dimensions, SOBOL_BITS), dtype=np.uint64)
+    vectors[0] = [1 << (SOBOL_BITS - 1 - k) for k in range(SOBOL_BITS)]
+
+    for dim in range(1, dimensions):
+        degree, coeffs, initial = SOBOL_DIRECTIONS[dim - 1]
+        m = list(initial)
+        for k in range(degree, SOBOL_BITS):
+            value = m[k - degree] ^ (m[k - degree] << degree)
+            for j in range(1, degree):
+                if (coeffs >> (degree - 1 - j)) & 1:
+                    value ^= m[k - j] << j
+            m.append(value)
+        vectors[dim] = [m[k] << (SOBOL_BITS - 1 - k) for k in range(SOBOL_BITS)]
+    return vectors
+
+
+class SobolSequence:
+    """
+    Secuencia de Sobol sin estado por punto: el punto i se obtiene directamente de
+    su código Gray, así que los lotes consecutivos continúan la misma secuencia.
+    shift_seed aplica un desplazamiento digital aleatorio (XOR), que conserva la
+    equidistribución y evita que todas las búsquedas empiecen por la misma esquina.
+    """
+
+    def __init__(self, dimensions: int, shift_seed: Optional[int] = None):
+        self.dimensions = dimensions
+        self.vectors = sobol_direction_vectors(dimensions)
+        if shift_seed is None:
+            self.shift = np.zeros(dimensions, dtype=np.uint64)
+        else:
+            rng = np.random.default_rng(shift_seed)
+            self.shift = rng.integers(0, 1 << SOBOL_BITS, size=dimensions, dtype=np.uint64)
+        self.position = 0
+
+    def points(self, start: int, count: int) -> np.ndarray:
+        """Puntos start..start+count-1 en [0, 1)^d"""
+        index = np.arange(start, start + count, dtype=np.uint64)
+        gray = index ^ (index >> np.uint64(1))
+        bits = np.zeros((count, self.dimensions), dtype=np.uint64)
+        for k in range(SOBOL_BITS):
+            mask = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+            bits[mask] ^= self.vectors[:, k]
+        return (bits ^ self.shift).astype(np.float64) / float(1 << SOBOL_BITS)
+
+    def draw(self, count: int) -> np.ndarray:
+        """Siguientes count puntos de la secuencia"""
+        sample = self.points(self.position, count)
+        self.position += count
+        return sample
+
+
+def latin_hypercube(count: int, dimensions: int, rng: np.random.Generator) -> np.ndarray:
+    """count puntos con exactamente uno por estrato 1/count en cada dimensión"""
+    strata = np.argsort(rng.random((dimensions, count)), axis=1).T
+    return (strata + rng.random((count, dimensions))) / count
+
+
+def _is_continuous(values) -> bool:
+    return isinstance(values, tuple) and len(values) == 2 and \
+        all(isinstance(v, float) for v in values)
+
+
+def _native(value):
+    """Valores numpy a tipos nativos (mismo criterio que _convert_value)"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+
+class ParameterSampler:
+    """
+    Lotes de combinaciones de parámetros sin repetir entre lotes.
+    param_ranges: {nombre: [valores]} o {nombre: (min, max)} con floats para rangos continuos.
+    """
+
+    def __init__(self, param_ranges: Dict, method: str = 'sobol', seed: Optional[int] = None):
+        if method not in SAMPLING_METHODS:
+            raise ValueError(f"Método de muestreo desconocido: {method} "
+                             f"(opciones: {', '.join(SAMPLING_METHODS)})")
+        self.param_ranges = param_ranges
+        self.keys = list(param_ranges)
+        self.method = method
+        self.rng = np.random.default_rng(seed)
+        self.sobol = SobolSequence(len(self.keys), shift_seed=seed) if method == 'sobol' else None
+        self.issued = set()
+
+        self.total = 1
+        for values in param_ranges.values():
+            self.total = None if self.total is None or _is_continuous(values) \
+                else self.total * len(values)
+
+    def _unit_points(self, count: int) -> np.ndarray:
+        if self.method == 'sobol':
+            return self.sobol.draw(count)
+        if self.method == 'lhs':
+            return latin_hypercube(count, len(self.keys), self.rng)
+        return self.rng.random((count, len(self.keys)))
+
+    def to_params(self, point: Sequence[float]) -> Dict:
+        """Proyectar un punto de [0, 1)^d sobre los valores de cada parámetro"""
+        params = {}
+        for key, u in zip(self.keys, point):
+            values = self.param_ranges[key]
+            if _is_continuous(values):
+                low, high = values
+                params[key] = float(low + u * (high - low))
+            else:
+                params[key] = _native(values[min(int(u * len(values)), len(values) - 1)])
+        return params
+
+    def next_batch(self, count: int, exclude: Iterable[Dict] = ()) -> List[Dict]:
+        """
+        Siguientes count combinaciones únicas (ni repetidas ni en exclude).
+        Retorna menos si la grilla discreta se agota.
+        """
+        for params in exclude:
+            self.issued.add(param_key(params))
+
+        batch = []
+        draws = 0
+        # Tope de puntos por lote: en grillas pequeñas casi todos los puntos colisionan
+        max_draws = 64 * max(count, 1) + 4 * (self.total or 0)
+        while len(batch) < count and draws < max_draws:
+            if self.total is not None and len(self.issued) >= self.total:
+                break
+            wanted = count - len(batch)
+            for point in self._unit_points(wanted):
+                draws += 1
+                params = self.to_params(point)
+                key = param_key(params)
+                if key in self.issued:
+                    continue
+                self.issued.add(key)
+                batch.append(params)
+                if len(batch) >= count:
+                    break
+        return batch
+
+
+def param_key(params: Dict) -> Tuple:
+    return tuple(sorted(params.items()))
+
+
+def _value_codes(param_sets: List[Dict], key: str, values, bins: int) -> Tuple[np.ndarray, int]:
+    """Código de valor (o bin, en rangos continuos) de cada combinación"""
+    column = [params[key] for params in param_sets]
+    if _is_continuous(values):
+        low, high = values
+        codes = np.clip(((np.asarray(column, dtype=float) - low) / (high - low) * bins)
+                        .astype(int), 0, bins - 1)
+        return codes, bins
+    lookup = {value: i for i, value in enumerate(values)}
+    return np.array([lookup.get(v, -1) for v in column], dtype=int), len(values)
+
+
+def coverage_stats(param_sets: List[Dict], param_ranges: Dict, bins: int = 10) -> Dict:
+    """
+    Qué tan parejo cubre el muestreo el espacio:
+    - value_coverage: % de valores de cada parámetro que aparecen al menos una vez
+    - imbalance: max/min de apariciones por valor (1.0 = perfectamente parejo)
+    - pair_coverage / triple_coverage: % de combinaciones de valores cubiertas para
+      cada par / trío de parámetros
+    """
+    keys = [key for key in param_ranges if all(key in p for p in param_sets)]
+    if not param_sets or not keys:
+        return {'samples': len(param_sets)}
+
+    codes, sizes, per_param = {}, {}, {}
+    for key in keys:
+        codes[key], sizes[key] = _value_codes(param_sets, key, param_ranges[key], bins)
+        counts = np.bincount(codes[key][codes[key] >= 0], minlength=sizes[key])
+        per_param[key] = {
+            'value_coverage': float(np.count_nonzero(counts) / sizes[key] * 100),
+            'imbalance': float(counts.max() / counts.min()) if counts.min() > 0 else float('inf'),
+        }
+
+    return {
+        'samples': len(param_sets),
+        'value_coverage': float(np.mean([p['value_coverage'] for p in per_param.values()])),
+        'max_imbalance': float(max(p['imbalance'] for p in per_param.values())),
+        'pair_coverage': _tuple_coverage(codes, sizes, keys, 2, len(param_sets)),
+        'triple_coverage': _tuple_coverage(codes, sizes, keys, 3, len(param_sets)),
+        'per_param': per_param,
+    }
+
+
+def _tuple_coverage(codes: Dict, sizes: Dict, keys: List[str], strength: int,
+                    samples: int) -> float:
+    """% de combinaciones de valores de cada grupo de `strength` parámetros que aparecen"""
+    covered = possible = 0
+    for group in combinations(keys, strength):
+        joint = np.zeros(samples, dtype=np.int64)
+        cells = 1
+        for key in group:
+            joint = joint * sizes[key] + codes[key]
+            cells *= sizes[key]
+        covered += len(np.unique(joint))
+        # Con menos muestras que celdas, el máximo alcanzable es una celda por muestra
+        possible += min(cells, samples)
+    return float(covered / possible * 100) if possible else 100.0
+
+
+def print_coverage(stats: Dict, method: str):
+    """Resumen de cobertura del muestreo"""
+    if 'value_coverage' not in stats:
+        return
+    imbalance = stats['max_imbalance']
+    imbalance_str = f"{imbalance:.2f}" if imbalance != float('inf') else "∞"
+    print(f"🧭 Cobertura ({method}, {stats['samples']} combinaciones): "
+          f"valores {stats['value_coverage']:.1f}% | "
+          f"pares {stats['pair_coverage']:.1f}% | tríos {stats['triple_coverage']:.1f}% | "
+          f"desbalance máx {imbalance_str}")
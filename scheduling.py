@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scheduling.py - Planificación de combinaciones por localidad de indicadores
+
+run_optimized_search recorre las combinaciones en orden aleatorio: dos
+combinaciones seguidas casi nunca comparten EMA, SuperTrend, ADX o RSI, así que
+cada backtest vuelve a calcular sus cuatro indicadores. Aquí las combinaciones
+se agrupan por la configuración del indicador más caro (SuperTrend: period,
+multiplier) y dentro de cada grupo se ordenan por ADX, EMA y RSI. Cada grupo se
+ejecuta como una flota (fleet.FleetRunner): un solo Cerebro en el que cada
+configuración de indicador se calcula una vez y la comparten las demás
+estrategias del grupo. Los grupos de SuperTrend consecutivos se juntan en la
+misma flota hasta max_group_size estrategias; un SuperTrend solo se reparte
+entre flotas si por sí solo supera ese tamaño.
+
+Con varios procesos, los grupos completos se reparten entre los workers (el más
+grande primero), así que cada SuperTrend se calcula en un único proceso. Al
+final se reporta el tiempo de cada grupo y la eficiencia del cache de
+indicadores, comparada con flotas de los mismos tamaños en el orden original.
+
+Uso:
+    python scheduling.py --data EURUSD5.csv --combinations 200 --workers 4
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from default import BinaryOptionsStrategy
+from fleet import INDICATORS_PER_STRATEGY, FleetRunner
+from genetic_search import feed_from_spec, feed_spec
+from shearch import OptimizedParameterSearch
+
+# Parámetros de cada indicador, del más caro (exterior) al más barato
+INDICATOR_KEYS = (
+    ('supertrend', ('st_period', 'st_multiplier')),
+    ('adx', ('adx_period',)),
+    ('ema', ('ema1_period',)),
+    ('rsi', ('rsi_period',)),
+)
+
+# Tope de estrategias por flota (memoria de un Cerebro con muchas estrategias)
+DEFAULT_MAX_GROUP_SIZE = 48
+
+# Estado de cada proceso del pool (lo crea _init_worker)
+_WORKER_SEARCH: Optional[OptimizedParameterSearch] = None
+
+
+def indicator_key(params: Dict, indicator: str) -> Tuple:
+    """Valores que identifican el indicador (con los defaults de la estrategia)"""
+    names = dict(INDICATOR_KEYS)[indicator]
+    return tuple(params.get(name, getattr(BinaryOptionsStrategy.params, name)) for name in names)
+
+
+def locality_key(params: Dict) -> Tuple:
+    return tuple(indicator_key(params, indicator) for indicator, _ in INDICATOR_KEYS)
+
+
+def distinct_indicators(param_sets: Sequence[Dict]) -> int:
+    """Indicadores que crea una flota con estas combinaciones (uno por configuración distinta)"""
+    return sum(len({indicator_key(params, indicator) for params in param_sets})
+               for indicator, _ in INDICATOR_KEYS)
+
+
+class ScheduleGroup:
+    """Combinaciones que se ejecutan juntas en una flota (SuperTrend completos)"""
+    __slots__ = ['keys', 'items', 'stats']
+
+    def __init__(self, keys: List[Tuple], items: List[Tuple[int, Dict]]):
+        self.keys = keys    # SuperTrend (period, multiplier) del grupo, en orden
+        self.items = items  # [(combination_id, params)] en orden de localidad
+        self.stats: Dict = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def label(self) -> str:
+        extra = f" +{len(self.keys) - 1}" if len(self.keys) > 1 else ""
+        return f"ST{self.keys[0]}{extra}"
+
+
+def build_groups(param_sets: Sequence[Dict],
+                 max_group_size: int = DEFAULT_MAX_GROUP_SIZE) -> List[ScheduleGroup]:
+    """
+    Ordenar por SuperTrend, ADX, EMA y RSI y empaquetar los SuperTrend completos
+    en grupos de hasta max_group_size combinaciones (uno mayor se parte en tramos
+    consecutivos, que conservan la localidad de ADX/EMA/RSI).
+    combination_id = posición + 1 en param_sets, igual que run_optimized_search.
+    """
+    ordered = sorted(enumerate(param_sets, 1), key=lambda item: locality_key(item[1]))
+    by_supertrend: List[Tuple[Tuple, List]] = []
+    for combo_id, params in ordered:
+        key = indicator_key(params, 'supertrend')
+        if not by_supertrend or by_supertrend[-1][0] != key or \
+                len(by_supertrend[-1][1]) >= max_group_size:
+            by_supertrend.append((key, []))
+        by_supertrend[-1][1].append((combo_id, params))
+
+    groups: List[ScheduleGroup] = []
+    for key, items in by_supertrend:
+        if groups and len(groups[-1]) + len(items) <= max_group_size:
+            groups[-1].keys.append(key)
+            groups[-1].items.extend(items)
+        else:
+            groups.append(ScheduleGroup([key], list(items)))
+    return groups
+
+
+def run_group(search: OptimizedParameterSearch,
+              items: List[Tuple[int, Dict]]) -> Tuple[List[Optional[Dict]], Dict]:
+    """Ejecutar un grupo como flota: (resultados en el orden de items, estadísticas)"""
+    runner = FleetRunner(search.data_feed, exactbars=1 if search.low_memory else 0,
+                         strategy_class=search.strategy_class)
+    results = runner.run([search._lightweight_params(params) for _, params in items])
+    results = [search._finish_lightweight_result(result) for result in results]
+    stats = dict(runner.stats) or {'strategies': len(items), 'seconds': 0.0,
+                                   'indicators_requested': len(items) * INDICATORS_PER_STRATEGY,
+                                   'indicators_created': len(items) * INDICATORS_PER_STRATEGY}
+    return results, stats
+
+
+def _init_worker(spec: Tuple[str, object], search_kwargs: Dict):
+    """Initializer del pool: el feed se construye una vez por proceso"""
+    global _WORKER_SEARCH
+    _WORKER_SEARCH = OptimizedParameterSearch(feed_from_spec(spec), **search_kwargs)
+
+
+def _run_group_in_worker(items: List[Tuple[int, Dict]]) -> Tuple[List[Optional[Dict]], Dict, int]:
+    results, stats = run_group(_WORKER_SEARCH, items)
+    return results, stats, os.getpid()
+
+
+class ScheduledParameterSearch(OptimizedParameterSearch):
+    """Búsqueda de la grilla ejecutada en flotas agrupadas por indicador"""
+
+    def __init__(self, data_feed, max_top_results: int = 10, low_memory: bool = False,
+                 use_settlement_index: bool = False, fine_settlement=None,
+                 objectives: Tuple[str, ...] = (), strategy_class=None,
+                 outcome_store=None, stability_store=None):
+        super().__init__(data_feed, max_top_results=max_top_results, low_memory=low_memory,
+                         use_settlement_index=use_settlement_index,
+                         fine_settlement=fine_settlement, objectives=objectives,
+                         strategy_class=strategy_class, outcome_store=outcome_store,
+                         stability_store=stability_store)
+        self.groups: List[ScheduleGroup] = []
+        self._search_kwargs = {'low_memory': low_memory,
+                               'use_settlement_index': use_settlement_index,
+                               'fine_settlement': fine_settlement,
+                               'strategy_class': strategy_class}
+
+    def run_scheduled_search(self, max_combinations: int = 50, min_trades: int = 10,
+                             min_win_rate: float = 50.0, workers: Optional[int] = 1,
+                             max_group_size: int = DEFAULT_MAX_GROUP_SIZE,
+                             verbose: bool = False, telemetry=None,
+                             sampling: str = 'random', seed: Optional[int] = None) -> Dict:
+        """
+        Igual que run_optimized_search (mismas combinaciones e ids), pero en flotas
+        agrupadas por indicador. workers: procesos (None = CPUs, 1 = sin pool).
+        """
+        print("\n" + "=" * 60)
+        print("🗂️ BÚSQUEDA PLANIFICADA POR INDICADORES")
+        print("=" * 60)
+
+        param_sets = self.generate_smart_combinations(max_combinations, sampling, seed)
+        if not param_sets:
+            print("❌ No se pudieron generar combinaciones")
+            return {}
+
+        workers = workers or os.cpu_count() or 1
+        if workers > 1:
+            # Al menos un grupo por proceso
+            max_group_size = min(max_group_size, -(-len(param_sets) // workers))
+        groups = self.groups = build_groups(param_sets, max_group_size)
+        print(f"🧪 {len(param_sets)} combinaciones en {len(groups)} grupos "
+              f"(SuperTrend distintos: {len({k for g in groups for k in g.keys})}) | "
+              f"Procesos: {workers}")
+        print(f"📈 Filtros: Min trades={min_trades}, Min win rate={min_win_rate}%")
+        if telemetry:
+            telemetry.start(total=len(param_sets), min_trades=min_trades,
+                            min_win_rate=min_win_rate, mode='scheduled')
+
+        start_time = time.perf_counter()
+        early_stop_count = done = 0
+        for group, results, stats in self._execute(groups, workers):
+            group.stats = stats
+            done += len(group)
+            per_combo = stats['seconds'] / max(len(group), 1)
+            for (combo_id, params), result in zip(group.items, results):
+                self.total_tested += 1
+                status, score = 'error', None
+                if result:
+                    self._store_result(combo_id, params, result)
+                    opt_result = self._register_result(result, params, combo_id,
+                                                       min_trades, min_win_rate)
+                    if opt_result is None:
+                        early_stop_count += 1
+                        status = 'early_stop'
+                    else:
+                        status, score = 'valid', opt_result.score()
+                if telemetry:
+                    telemetry.record(per_combo, status, bars=self._bars_processed(), score=score)
+            if verbose:
+                print(f"  🗂️ {group.label}: {len(group)} combinaciones en "
+                      f"{stats['seconds']:.1f}s")
+            print(f"⚡ Progreso: {done / len(param_sets) * 100:.0f}% | "
+                  f"Válidos: {self.valid_count}/{done}")
+
+        if telemetry:
+            telemetry.close()
+
+        elapsed = time.perf_counter() - start_time
+        print(f"\n✅ Búsqueda completada en {elapsed:.1f} segundos")
+        print(f"📊 Combinaciones válidas: {self.valid_count}/{len(param_sets)}")
+        print(f"⏭️ Descartadas por evaluación temprana: {early_stop_count}")
+        print_schedule_report(groups, param_sets, elapsed, verbose)
+
+        if self.valid_count > 0:
+            return self._show_optimized_results()
+        print("❌ No se encontraron configuraciones válidas")
+        return {}
+
+    def _execute(self, groups: List[ScheduleGroup], workers: int):
+        """(grupo, resultados, estadísticas) a medida que termina cada grupo"""
+        if workers <= 1:
+            for group in groups:
+                results, stats = run_group(self, group.items)
+                stats['worker'] = os.getpid()
+                yield group, results, stats
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(feed_spec(self.data_feed),
+                                           self._search_kwargs)) as executor:
+            # El grupo más grande primero: reparto greedy entre los procesos libres
+            futures = {executor.submit(_run_group_in_worker, group.items): group
+                       for group in sorted(groups, key=len, reverse=True)}
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    results, stats, pid = future.result()
+                except Exception as e:
+                    print(f"❌ Error en el grupo {group.label}: {e}")
+                    results, stats, pid = [None] * len(group), {'seconds': 0.0}, None
+                stats['worker'] = pid
+                yield group, results, stats
+
+
+def schedule_stats(groups: List[ScheduleGroup], param_sets: Sequence[Dict]) -> Dict:
+    """Eficiencia del cache de indicadores frente a flotas sin agrupar"""
+    requested = len(param_sets) * INDICATORS_PER_STRATEGY
+    created = sum(g.stats.get('indicators_created', 0) for g in groups)
+    # Flotas de los mismos tamaños en el orden original (aleatorio)
+    unscheduled, start = 0, 0
+    for group in groups:
+        unscheduled += distinct_indicators(param_sets[start:start + len(group)])
+        start += len(group)
+    workers = {g.stats.get('worker') for g in groups if g.stats.get('worker') is not None}
+    return {
+        'groups': len(groups),
+        'indicators_requested': requested,
+        'indicators_created': created,
+        'reuse_pct': (1 - created / requested) * 100 if requested else 0.0,
+        'unscheduled_created': unscheduled,
+        'unscheduled_reuse_pct': (1 - unscheduled / requested) * 100 if requested else 0.0,
+        'workers': len(workers),
+        'group_seconds': sum(g.stats.get('seconds', 0.0) for g in groups),
+    }
+
+
+def print_schedule_report(groups: List[ScheduleGroup], param_sets: Sequence[Dict],
+                          elapsed: float, verbose: bool = False):
+    stats = schedule_stats(groups, param_sets)
+    print("\n" + "=" * 80)
+    print("🗂️ PLANIFICACIÓN POR INDICADORES")
+    print("=" * 80)
+    print(f"📦 Grupos: {stats['groups']} | procesos usados: {stats['workers']} | "
+          f"tiempo de flotas: {stats['group_seconds']:.1f}s (pared: {elapsed:.1f}s)")
+    print(f"♻️ Indicadores creados: {stats['indicators_created']}/"
+          f"{stats['indicators_requested']} (reutilización {stats['reuse_pct']:.0f}%) | "
+          f"sin agrupar: {stats['unscheduled_created']} "
+          f"({stats['unscheduled_reuse_pct']:.0f}%)")
+
+    ranked = sorted(groups, key=lambda g: g.stats.get('seconds', 0.0), reverse=True)
+    for group in ranked if verbose else ranked[:5]:
+        s = group.stats
+        requested = s.get('indicators_requested', 0)
+        reuse = (1 - s.get('indicators_created', 0) / requested) * 100 if requested else 0.0
+        print(f"   {group.label:<18} {len(group):3d} combinaciones | "
+              f"{s.get('seconds', 0.0):6.1f}s | "
+              f"{len(group) / s['seconds'] if s.get('seconds') else 0.0:5.1f} comb/s | "
+              f"reutilización {reuse:3.0f}%")
+
+
+def main(argv=None):
+    from default import load_data
+
+    parser = argparse.ArgumentParser(description="Búsqueda de parámetros en flotas por indicador")
+    parser.add_argument('--data', default='EURUSD5.csv')
+    parser.add_argument('--combinations', type=int, default=50)
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--min-win-rate', type=float, default=50.0)
+    parser.add_argument('--workers', type=int, default=1, help="Procesos (0 = CPUs)")
+    parser.add_argument('--group-size', type=int, default=DEFAULT_MAX_GROUP_SIZE)
+    parser.add_argument('--sampling', choices=('random', 'sobol', 'lhs'), default='random')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    data_feed = load_data(args.data)
+    if data_feed is None:
+        return 1
+    search = ScheduledParameterSearch(data_feed)
+    results = search.run_scheduled_search(
+        max_combinations=args.combinations, min_trades=args.min_trades,
+        min_win_rate=args.min_win_rate, workers=args.workers or None,
+        max_group_size=args.group_size, verbose=args.verbose,
+        sampling=args.sampling, seed=args.seed)
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
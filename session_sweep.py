@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+session_sweep.py - Barrido de ventanas de sesión sin un backtest por ventana
+
+trading_start_hour / trading_end_hour / timezone_offset / enable_time_filter no
+están en define_parameter_ranges porque cada ventana multiplica la grilla. Pero
+las señales no dependen del horario: la sesión solo decide qué velas con señal
+se convierten en trades, junto con el tope diario y el espaciado mínimo.
+
+1. Un backtest de candidatos (sin filtro horario, sin tope diario y sin
+   espaciado) registra cada vela con señal: hora de entrada y de expiración,
+   resultado y P&L (SessionCandidates).
+2. Los candidatos se resumen en tablas por (día UTC, hora UTC de entrada, hora
+   local de expiración) con trades, ganados y P&L. La hora local de entrada sale
+   de la hora UTC, así que una ventana [inicio, fin) es una máscara sobre las
+   dos últimas dimensiones y todas las ventanas se evalúan con un producto de
+   matrices por tabla.
+3. Dependencias:
+   - Tope diario (por fecha UTC, como daily_trades): en cada día se aceptan los
+     primeros max_trades_per_day candidatos de la ventana. Las horas anteriores
+     a la que alcanza el tope suman sus celdas completas, las posteriores no
+     suman y solo la hora donde se alcanza se resuelve candidato por candidato.
+   - Espaciado: solo bloquea si dos candidatos de la ventana quedan a menos de
+     min_time_between_trades (pares precalculados). Esas ventanas se re-simulan
+     exactamente sobre los candidatos, con el orden de chequeos de
+     BinaryOptionsStrategy.next.
+
+El max drawdown depende del orden de liquidación y no sale de las tablas: se
+calcula re-simulando solo las ventanas que se muestran (window_detail). Los
+resultados coinciden con un backtest directo con enable_time_filter=True
+(verify_windows lo comprueba). Solo importa la hora local, así que se barren
+inicio y fin con el timezone_offset de la configuración.
+
+Uso:
+    python session_sweep.py --data EURUSD5.csv --verify 3
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from default import BinaryOptionsStrategy, run_single_backtest
+
+HOURS = 24
+# Duración mínima de las ventanas barridas (horas)
+MIN_SESSION_HOURS = 2
+# Tope y espaciado que dejan pasar todas las velas con señal
+UNLIMITED_TRADES = 10 ** 9
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_DAY = 86_400 * NS_PER_SECOND
+NS_PER_HOUR = 3_600 * NS_PER_SECOND
+
+
+def _param(params: Dict, name: str):
+    return params.get(name, getattr(BinaryOptionsStrategy.params, name))
+
+
+def session_windows(min_hours: int = MIN_SESSION_HOURS) -> List[Tuple[int, int]]:
+    """Ventanas [inicio, fin) en hora local; fin = 24 llega hasta la medianoche"""
+    return [(start, end) for start in range(HOURS) for end in range(start + min_hours, HOURS + 1)]
+
+
+def _valid_hours(windows: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """(ventanas, 24) bool: hora local dentro de [inicio, fin), como is_trading_time"""
+    hours = np.arange(HOURS)
+    starts = np.array([w[0] for w in windows])[:, None]
+    ends = np.array([w[1] for w in windows])[:, None]
+    return (starts <= hours) & (hours < ends)
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Índices de los rangos [start, end) concatenados y el número de rango de cada uno"""
+    lengths = ends - starts
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owner] + offsets, owner
+
+
+class SessionCandidates:
+    """
+    Velas con señal de una configuración, en orden de entrada, y sus tablas por
+    (día UTC, hora UTC de entrada, hora local de expiración).
+    """
+
+    def __init__(self, trade_log: Sequence[Dict], params: Dict):
+        self.params = dict(params)
+        self.offset = int(_param(params, 'timezone_offset'))
+        self.max_trades_per_day = int(_param(params, 'max_trades_per_day'))
+        self.spacing_ns = int(float(_param(params, 'min_time_between_trades')) * 60 * NS_PER_SECOND)
+        expiry_ns = int(_param(params, 'expiry_minutes')) * 60 * NS_PER_SECOND
+
+        entry = np.array([np.datetime64(t['entry_time'], 'ns') for t in trade_log],
+                         dtype='datetime64[ns]').view(np.int64)
+        order = np.argsort(entry, kind='stable')
+        self.entry_ns = entry[order]
+        # trade_log está en orden de liquidación: índices (en orden de entrada) para la equity
+        self.settlement = np.argsort(order, kind='stable')
+        self.won = np.array([t['result'] == 'WIN' for t in trade_log], dtype=bool)[order]
+        self.pnl = np.array([t['pnl'] for t in trade_log], dtype=np.float64)[order]
+        self.entry_day = self.entry_ns // NS_PER_DAY  # fecha UTC, como daily_trades
+        self.entry_utc_hour = (self.entry_ns % NS_PER_DAY) // NS_PER_HOUR
+        self.entry_hour = (self.entry_utc_hour + self.offset) % HOURS
+        self.expiry_hour = (((self.entry_ns + expiry_ns) % NS_PER_DAY) // NS_PER_HOUR +
+                            self.offset) % HOURS
+
+        # Balde (día, hora UTC de entrada), no decreciente en orden de entrada
+        first_day = int(self.entry_day[0]) if len(self.entry_ns) else 0
+        self.days = int(self.entry_day[-1]) - first_day + 1 if len(self.entry_ns) else 0
+        self.bucket = (self.entry_day - first_day) * HOURS + self.entry_utc_hour
+        self.tables = self._tables()
+        self.spacing_pairs = self._spacing_pairs()
+
+    def __len__(self):
+        return len(self.entry_ns)
+
+    def _tables(self) -> Dict[str, np.ndarray]:
+        """(día * 24 + hora UTC de entrada, hora local de expiración): trades, ganados, P&L"""
+        cell = self.bucket * HOURS + self.expiry_hour
+        size = self.days * HOURS * HOURS
+        shape = (self.days * HOURS, HOURS)
+        return {
+            'trades': np.bincount(cell, minlength=size).reshape(shape).astype(np.float64),
+            'wins': np.bincount(cell[self.won], minlength=size).reshape(shape).astype(np.float64),
+            'pnl': np.bincount(cell, weights=self.pnl, minlength=size).reshape(shape),
+        }
+
+    def _spacing_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Pares (anterior, posterior) de candidatos a menos de min_time_between_trades"""
+        n = len(self.entry_ns)
+        first = np.searchsorted(self.entry_ns, self.entry_ns - self.spacing_ns, side='right')
+        behind = np.arange(n) - first
+        earlier, later = [], []
+        for lag in range(1, int(behind.max(initial=0)) + 1):
+            rows = np.flatnonzero(behind >= lag)
+            earlier.append(rows - lag)
+            later.append(rows)
+        if not later:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(earlier), np.concatenate(later)
+
+    def _inside(self, valid: np.ndarray) -> np.ndarray:
+        """Candidatos con entrada y expiración dentro de las horas válidas (bool[24])"""
+        return valid[..., self.entry_hour] & valid[..., self.expiry_hour]
+
+    def replay(self, valid: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Simulación exacta sobre los candidatos con el orden de chequeos de next():
+        horario de entrada, tope diario, espaciado y horario de expiración.
+        valid: bool[24] de horas locales permitidas (None = sin filtro horario).
+        """
+        n = len(self.entry_ns)
+        accepted = np.zeros(n, dtype=bool)
+        daily: Dict[int, int] = {}
+        last = -1
+        entry_ns, entry_day = self.entry_ns, self.entry_day
+        for i in range(n):
+            if valid is not None and not valid[self.entry_hour[i]]:
+                continue
+            day = int(entry_day[i])
+            if daily.get(day, 0) >= self.max_trades_per_day:
+                continue
+            if last >= 0 and entry_ns[i] - entry_ns[last] < self.spacing_ns:
+                continue
+            if valid is not None and not valid[self.expiry_hour[i]]:
+                continue  # Trade cancelado: no cuenta para el tope ni el espaciado
+            accepted[i] = True
+            daily[day] = daily.get(day, 0) + 1
+            last = i
+        return accepted
+
+    def metrics(self, accepted: np.ndarray) -> Dict:
+        """Métricas de una máscara de aceptados, con la equity en orden de liquidación"""
+        pnl = np.where(accepted, self.pnl, 0.0)[self.settlement]
+        equity = np.cumsum(pnl)
+        drawdown = 0.0
+        if len(equity):
+            drawdown = float((np.maximum(np.maximum.accumulate(equity), 0.0) - equity).max())
+        trades = int(accepted.sum())
+        wins = int((accepted & self.won).sum())
+        return {
+            'total_trades': trades,
+            'winning_trades': wins,
+            'win_rate': wins / trades * 100 if trades else 0.0,
+            'total_pnl': float(pnl.sum()),
+            'max_drawdown': drawdown,
+        }
+
+    def spacing_binds(self, valid: np.ndarray) -> np.ndarray:
+        """(ventanas,) bool: dos candidatos de la ventana a menos del espaciado"""
+        earlier, later = self.spacing_pairs
+        if not len(later):
+            return np.zeros(len(valid), dtype=bool)
+        inside = self._inside(valid)
+        return (inside[:, earlier] & inside[:, later]).any(axis=1)
+
+    def _table_totals(self, valid: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Trades, ganados y P&L de cada ventana desde las tablas, aplicando el tope
+        diario (exacto cuando el espaciado no bloquea dentro de la ventana)
+        """
+        windows = len(valid)
+        cap = self.max_trades_per_day
+        # Hora UTC de entrada válida en cada ventana: (ventanas, 24)
+        entry_ok = valid[:, (np.arange(HOURS) + self.offset) % HOURS]
+        expiry = valid.T.astype(np.float64)                              # (24, ventanas)
+
+        def per_bucket(table: np.ndarray) -> np.ndarray:
+            # (días, 24 horas UTC, ventanas): celdas con expiración válida y entrada válida
+            sums = (table @ expiry).reshape(self.days, HOURS, windows)
+            return sums * entry_ok.T[None, :, :]
+
+        counts = per_bucket(self.tables['trades'])
+        after = np.cumsum(counts, axis=1)
+        before = after - counts
+        full = after <= cap
+        totals = {key: (per_bucket(self.tables[key]) * full).sum(axis=(0, 1))
+                  for key in ('trades', 'wins', 'pnl')}
+
+        # La hora en que se alcanza el tope: solo los primeros candidatos que caben
+        partial = (before < cap) & (after > cap)
+        bucket_starts = np.searchsorted(self.bucket, np.arange(self.days * HOURS), side='left')
+        bucket_ends = np.searchsorted(self.bucket, np.arange(self.days * HOURS), side='right')
+        for row in np.flatnonzero(partial.any(axis=(0, 1))):
+            day, hour = np.nonzero(partial[:, :, row])
+            buckets = day * HOURS + hour
+            index, owner = _ranges(bucket_starts[buckets], bucket_ends[buckets])
+            inside = self._inside(valid[row])[index]
+            rank = np.cumsum(inside)
+            segment_start = np.concatenate([[0], rank])[np.searchsorted(owner, owner, side='left')]
+            room = (cap - before[day, hour, row])[owner]
+            taken = index[inside & (rank - segment_start <= room)]
+            totals['trades'][row] += len(taken)
+            totals['wins'][row] += self.won[taken].sum()
+            totals['pnl'][row] += self.pnl[taken].sum()
+        return totals
+
+    def sweep(self, windows: Sequence[Tuple[int, int]]) -> List[Dict]:
+        """
+        Trades, ganados, win rate y P&L de cada ventana; 'method' indica 'tabla'
+        o 'resimulada' (el espaciado bloquea dentro de la ventana)
+        """
+        if not windows:
+            return []
+        valid = _valid_hours(windows)
+        totals = self._table_totals(valid)
+        spacing = self.spacing_binds(valid)
+
+        results = []
+        for row, (start, end) in enumerate(windows):
+            if spacing[row]:
+                metrics = self.metrics(self.replay(valid[row]))
+                trades, wins, pnl = (metrics['total_trades'], metrics['winning_trades'],
+                                     metrics['total_pnl'])
+            else:
+                trades = int(round(totals['trades'][row]))
+                wins = int(round(totals['wins'][row]))
+                pnl = float(totals['pnl'][row])
+            results.append({
+                'trading_start_hour': start,
+                'trading_end_hour': end,
+                'timezone_offset': self.offset,
+                'method': 'resimulada' if spacing[row] else 'tabla',
+                'total_trades': trades,
+                'winning_trades': wins,
+                'win_rate': wins / trades * 100 if trades else 0.0,
+                'total_pnl': pnl,
+            })
+        return results
+
+    def window_detail(self, window: Dict) -> Dict:
+        """Re-simulación exacta de una ventana del barrido (incluye max_drawdown)"""
+        valid = _valid_hours([(window['trading_start_hour'], window['trading_end_hour'])])[0]
+        return self.metrics(self.replay(valid))
+
+
+def record_candidates(data_feed, params: Dict, search=None,
+                      strategy_class=None) -> Optional[SessionCandidates]:
+    """
+    Backtest de candidatos: la configuración sin filtro horario, sin tope diario y
+    sin espaciado. search (OptimizedParameterSearch) aporta índice de liquidación,
+    precios finos y clase de estrategia, como en la búsqueda.
+    """
+    run_params = search._lightweight_params(params) if search is not None else dict(params)
+    run_params.update(keep_trade_log=True, debug=False, enable_time_filter=False,
+                      max_trades_per_day=UNLIMITED_TRADES, min_time_between_trades=0)
+    if search is not None:
+        strategy_class = search.strategy_class
+        exactbars = 1 if search.low_memory else 0
+    else:
+        exactbars = 0
+    result = run_single_backtest(data_feed, exactbars=exactbars, strategy_class=strategy_class,
+                                 **run_params)
+    if result is None:
+        return None
+    return SessionCandidates(result.get('trade_log', []), params)
+
+
+def verify_windows(data_feed, candidates: SessionCandidates, results: List[Dict],
+                   count: int = 3, strategy_class=None) -> List[Dict]:
+    """
+    Comparar ventanas con un backtest directo (enable_time_filter=True): las
+    re-simuladas primero y luego las mejores por P&L. Se comparan los totales del
+    barrido y el max drawdown de window_detail.
+    """
+    ordered = sorted(results, key=lambda r: (r['method'] != 'resimulada', -r['total_pnl']))
+    checks = []
+    for window in ordered[:count]:
+        params = dict(candidates.params, enable_time_filter=True, debug=False,
+                      trading_start_hour=window['trading_start_hour'],
+                      trading_end_hour=window['trading_end_hour'],
+                      timezone_offset=window['timezone_offset'])
+        direct = run_single_backtest(data_feed, strategy_class=strategy_class, **params) or {}
+        detail = candidates.window_detail(window)
+        match = (direct.get('total_trades', 0) == window['total_trades'] and
+                 direct.get('winning_trades', 0) == window['winning_trades'] and
+                 abs(direct.get('total_pnl', 0.0) - window['total_pnl']) < 1e-6 and
+                 abs(direct.get('max_drawdown', 0.0) - detail['max_drawdown']) < 1e-6)
+        checks.append({'window': (window['trading_start_hour'], window['trading_end_hour']),
+                       'method': window['method'], 'match': match,
+                       'direct_trades': direct.get('total_trades', 0),
+                       'direct_pnl': direct.get('total_pnl', 0.0)})
+    return checks
+
+
+def print_session_sweep(candidates: SessionCandidates, results: List[Dict], elapsed: float,
+                        top: int = 5, min_trades: int = 1):
+    replayed = sum(r['method'] == 'resimulada' for r in results)
+    print(f"🕐 {len(results)} ventanas sobre {len(candidates)} velas con señal en "
+          f"{elapsed * 1000:.0f} ms | por tabla: {len(results) - replayed} | "
+          f"re-simuladas: {replayed} (tope {candidates.max_trades_per_day}/día, "
+          f"espaciado {candidates.spacing_ns // (60 * NS_PER_SECOND)} min)")
+    eligible = [r for r in results if r['total_trades'] >= min_trades]
+    for r in sorted(eligible, key=lambda r: r['total_pnl'], reverse=True)[:top]:
+        detail = candidates.window_detail(r)
+        print(f"   {r['trading_start_hour']:02d}-{r['trading_end_hour']:02d}h "
+              f"(UTC{r['timezone_offset']:+d}): P&L ${r['total_pnl']:8.2f} | "
+              f"WR {r['win_rate']:5.1f}% | trades {r['total_trades']:4d} | "
+              f"Max DD ${detail['max_drawdown']:6.2f} | {r['method']}")
+
+
+def sweep_sessions(data_feed, params: Dict, windows: Optional[Sequence[Tuple[int, int]]] = None,
+                   search=None, strategy_class=None) -> Tuple[Optional[SessionCandidates], List[Dict]]:
+    """Registrar candidatos y barrer las ventanas (todas las de MIN_SESSION_HOURS o más)"""
+    candidates = record_candidates(data_feed, params, search, strategy_class)
+    if candidates is None:
+        return None, []
+    return candidates, candidates.sweep(windows or session_windows())
+
+
+def main(argv=None):
+    from default import load_data
+
+    parser = argparse.ArgumentParser(description="Barrido de ventanas de sesión por tablas horarias")
+    parser.add_argument('--data', default='EURUSD5.csv')
+    parser.add_argument('--min-hours', type=int, default=MIN_SESSION_HOURS)
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--verify', type=int, default=0, metavar='N',
+                        help="Comparar N ventanas con backtests directos")
+    args = parser.parse_args(argv)
+
+    data_feed = load_data(args.data)
+    if data_feed is None:
+        return 1
+
+    start = time.perf_counter()
+    candidates = record_candidates(data_feed, {})
+    if candidates is None:
+        return 1
+    recorded = time.perf_counter() - start
+    print(f"⏱️ Backtest de candidatos: {recorded:.1f}s")
+
+    start = time.perf_counter()
+    results = candidates.sweep(session_windows(args.min_hours))
+    print_session_sweep(candidates, results, time.perf_counter() - start, args.top,
+                        args.min_trades)
+
+    if args.verify:
+        checks = verify_windows(data_feed, candidates, results, args.verify)
+        for check in checks:
+            icon = '✅' if check['match'] else '❌'
+            print(f"   {icon} {check['window'][0]:02d}-{check['window'][1]:02d}h "
+                  f"({check['method']}): directo {check['direct_trades']} trades, "
+                  f"${check['direct_pnl']:.2f}")
+        if not all(check['match'] for check in checks):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+settlement.py - Índice de liquidación precalculado por (dataset, expiry_minutes)
+
+Para cada barra de entrada i, index[i] es la posición de la primera barra con
+timestamp >= timestamp[i] + expiry. Es exactamente la barra en la que
+BinaryOptionsStrategy liquida hoy el trade (current_time >= expiry_time), con
+huecos, fines de semana y barras faltantes incluidos, pero calculado una sola
+vez con searchsorted sobre timestamps int64 en lugar de comparar datetimes en
+cada barra. Si no existe tal barra, el valor es len(timestamps) (el trade
+queda sin liquidar, igual que en el backtest).
+"""
+
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+
+def feed_timestamps(data_feed) -> np.ndarray:
+    """Timestamps int64 (ns) de un feed respaldado por un DataFrame (PandasData)"""
+    dataframe = getattr(getattr(data_feed, 'p', None), 'dataname', None)
+    index = getattr(dataframe, 'index', None)
+    if index is None:
+        raise ValueError("El feed no tiene un DataFrame con índice de fechas "
+                         "(el índice de liquidación requiere PandasData)")
+    # La resolución del índice depende de la versión de pandas: normalizar a ns
+    return np.asarray(index.values, dtype='datetime64[ns]').view(np.int64)
+
+
+def feed_close(data_feed) -> np.ndarray:
+    """Precios de cierre de un feed PandasData como array float64"""
+    return data_feed.p.dataname['close'].to_numpy(dtype=np.float64)
+
+
+def build_settlement_index(timestamps: np.ndarray, expiry_minutes: float) -> np.ndarray:
+    """Índice de la primera barra en o después de entrada + expiry (vectorizado)"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if timestamps.size > 1 and np.any(np.diff(timestamps) < 0):
+        raise ValueError("Los timestamps deben estar ordenados de forma ascendente")
+    # Misma conversión que enter_binary_trade: timedelta(minutes=int(expiry_minutes))
+    targets = timestamps + int(expiry_minutes) * NS_PER_MINUTE
+    return np.searchsorted(timestamps, targets, side='left').astype(np.int64)
+
+
+class SettlementIndexCache:
+    """Cache de índices de liquidación por (dataset, expiry_minutes)"""
+
+    def __init__(self):
+        self._timestamps: Dict[Hashable, np.ndarray] = {}
+        self._indexes: Dict[Tuple[Hashable, int], np.ndarray] = {}
+
+    @staticmethod
+    def _dataset_key(data_feed) -> Hashable:
+        return id(data_feed)
+
+    def timestamps(self, data_feed) -> np.ndarray:
+        key = self._dataset_key(data_feed)
+        if key not in self._timestamps:
+            self._timestamps[key] = feed_timestamps(data_feed)
+        return self._timestamps[key]
+
+    def get(self, data_feed, expiry_minutes: float) -> np.ndarray:
+        key = (self._dataset_key(data_feed), int(expiry_minutes))
+        if key not in self._indexes:
+            self._indexes[key] = build_settlement_index(self.timestamps(data_feed),
+                                                        expiry_minutes)
+        return self._indexes[key]
+
+    def clear(self):
+        self._timestamps.clear()
+        self._indexes.clear()
+
+
+def settle_vectorized(close: np.ndarray, entry_bars: np.ndarray, exit_bars: np.ndarray,
+                      is_call: np.ndarray, payout_rate: float,
+                      amount: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Liquidar un lote de trades leyendo el precio de salida directamente.
+    Retorna (settled, won, pnl); los trades sin barra de salida no se liquidan.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    entry_bars = np.asarray(entry_bars, dtype=np.int64)
+    exit_bars = np.asarray(exit_bars, dtype=np.int64)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    settled = exit_bars < close.size
+    entry_price = close[entry_bars]
+    exit_price = close[np.minimum(exit_bars, close.size - 1)]
+
+    won = np.where(is_call, exit_price > entry_price, exit_price < entry_price) & settled
+    pnl = np.where(won, amount * payout_rate, -amount)
+    pnl = np.where(settled, pnl, 0.0)
+    return settled, won, pnl
+
+
+
+
+class FineSettlementPrices:
+    """
+    Precios de liquidación de alta resolución (M1 o ticks) para estrategias que
+    generan señales sobre velas más gruesas.
+
+    Las velas se etiquetan por su apertura, así que el precio de entrada (cierre
+    de la vela de señal) corresponde al instante entrada + signal_bar_minutes, y la
+    expiración real es ese instante + expiry. El precio de salida es el cierre de
+    la primera vela fina que cierra en o después de ese instante (para ticks,
+    bar_minutes=0: el primer tick en o después). Con datos finos iguales a los de
+    la señal el resultado coincide con la liquidación sobre la propia vela.
+
+    Los arrays pueden estar mapeados en memoria (np.load(mmap_mode='r')): cada
+    trade cuesta una búsqueda binaria, sin trabajo por barra en la resolución fina.
+    """
+
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray,
+                 bar_minutes: float = 0, signal_bar_minutes: float = 0):
+        if len(timestamps) != len(prices):
+            raise ValueError("timestamps y prices deben tener la misma longitud")
+        self.timestamps = timestamps
+        self.prices = prices
+        self.bar_minutes = bar_minutes
+        self.signal_bar_minutes = signal_bar_minutes
+        self._offset_ns = int((signal_bar_minutes - bar_minutes) * NS_PER_MINUTE)
+
+    @classmethod
+    def from_file(cls, filename: str, signal_bar_minutes: float,
+                  bar_minutes: Optional[float] = None,
+                  datetime_format: Optional[str] = None) -> 'FineSettlementPrices':
+        """Abrir un archivo M1 a través del cache binario, mapeado en memoria"""
+        from data_cache import load_arrays
+
+        arrays, _ = load_arrays(filename, datetime_format=datetime_format, mmap=True)
+        if bar_minutes is None:
+            bar_minutes = infer_bar_minutes(arrays['datetime'])
+        return cls(arrays['datetime'], arrays['close'], bar_minutes, signal_bar_minutes)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def lookup(self, expiry_time) -> Optional[Tuple[object, float]]:
+        """
+        (etiqueta, precio) de la vela fina que liquida un trade cuya expiración,
+        en etiquetas de la vela de señal, es expiry_time. None si no hay datos.
+        """
+        target = np.datetime64(expiry_time, 'ns').astype(np.int64) + self._offset_ns
+        position = int(np.searchsorted(self.timestamps, target, side='left'))
+        if position >= len(self.timestamps):
+            return None
+        exit_time = np.datetime64(int(self.timestamps[position]), 'ns').astype('datetime64[us]')
+        return exit_time.item(), float(self.prices[position])
+
+
+def infer_bar_minutes(timestamps: np.ndarray) -> float:
+    """Duración de vela = diferencia más frecuente entre timestamps consecutivos"""
+    deltas = np.diff(np.asarray(timestamps[:100_000], dtype=np.int64))
+    deltas = deltas[deltas > 0]
+    if len(deltas) == 0:
+        return 0
+    values, counts = np.unique(deltas, return_counts=True)
+    return float(values[np.argmax(counts)]) / NS_PER_MINUTE
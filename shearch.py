@@ -14,6 +14,7 @@ from datetime import datetime
 import json
 import random
 import heapq
+import time
 from typing import Dict, List, Tuple, Optional
 
 # Importar componentes de default.py
@@ -23,11 +24,16 @@ from default import (
     load_data,
     run_single_backtest
 )
+from sampling import SAMPLING_METHODS, ParameterSampler, coverage_stats, print_coverage
+from settlement import SettlementIndexCache
+from stability import DailyRecord, StabilityStore, feed_day_range, stability_score
 
 class OptimizedResult:
     """Clase ligera para almacenar solo métricas esenciales"""
     __slots__ = ['win_rate', 'total_pnl', 'profit_factor', 'total_trades', 
-                 'winning_trades', 'losing_trades', 'parameters', 'combination_id']
+                 'winning_trades', 'losing_trades', 'max_drawdown', 'max_losing_streak',
+                 'expectancy', 'worst_day_pnl', 'stability', 'outcomes', 'parameters',
+                 'combination_id']
     
     def __init__(self, result_dict: Dict, parameters: Dict, combo_id: int):
         self.win_rate = result_dict.get('win_rate', 0)
@@ -36,6 +42,17 @@ class OptimizedResult:
         self.total_trades = result_dict.get('total_trades', 0)
         self.winning_trades = result_dict.get('winning_trades', 0)
         self.losing_trades = result_dict.get('losing_trades', 0)
+        # Métricas de riesgo calculadas en streaming por BinaryOptionsAnalyzer
+        self.max_drawdown = result_dict.get('max_drawdown', 0)
+        self.max_losing_streak = result_dict.get('max_losing_streak', 0)
+        self.expectancy = result_dict.get('expectancy', 0)
+        self.worst_day_pnl = result_dict.get('worst_day_pnl', 0)
+        # % de ventanas de 30 días rentables (stability.stability_score); None si
+        # la búsqueda no la calcula (sin objetivo 'stability' ni stability_store)
+        self.stability = result_dict.get('stability')
+        # Secuencia ganado/perdido (1 byte por trade): robustness.py la remuestrea
+        # sin repetir el backtest. None si el resultado no la trae (workers remotos)
+        self.outcomes = result_dict.get('outcomes')
         self.parameters = parameters.copy()
         self.combination_id = combo_id
     
@@ -48,6 +65,11 @@ class OptimizedResult:
             'total_trades': self.total_trades,
             'winning_trades': self.winning_trades,
             'losing_trades': self.losing_trades,
+            'max_drawdown': self.max_drawdown,
+            'max_losing_streak': self.max_losing_streak,
+            'expectancy': self.expectancy,
+            'worst_day_pnl': self.worst_day_pnl,
+            'stability': self.stability,
             'parameters': self.parameters,
             'combination_id': self.combination_id
         }
@@ -65,69 +87,111 @@ class OptimizedResult:
                 weight_pf * norm_pf)
 
 
+# Objetivos de ranking adicionales: valor a maximizar para cada resultado
+OBJECTIVES = {
+    'drawdown': lambda r: -r.max_drawdown,          # menor drawdown primero
+    'losing_streak': lambda r: -r.max_losing_streak,
+    'expectancy': lambda r: r.expectancy,
+    'worst_day': lambda r: r.worst_day_pnl,
+    'stability': lambda r: r.stability,
+}
+
+
 class TopResultsTracker:
     """Mantiene solo los TOP N mejores resultados eficientemente"""
     
-    def __init__(self, max_results: int = 10):
+    def __init__(self, max_results: int = 10, objectives: Tuple[str, ...] = ()):
         self.max_results = max_results
         self.results_by_winrate = []  # Min heap invertido (negativo)
         self.results_by_pnl = []      # Min heap invertido
         self.results_by_score = []    # Min heap invertido
         self.all_ids = set()          # Para evitar duplicados
         
+        # Heaps de objetivos adicionales (ver OBJECTIVES)
+        unknown = [name for name in objectives if name not in OBJECTIVES]
+        if unknown:
+            raise ValueError(f"Objetivos desconocidos: {unknown}")
+        self.results_by_objective = {name: [] for name in objectives}
+    
+    def _push(self, heap: List, value: float, result: OptimizedResult):
+        """Mantener en el heap los max_results mayores valores"""
+        # El combination_id desempata: OptimizedResult no es comparable
+        entry = (value, -result.combination_id, result)
+        if len(heap) < self.max_results:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+        
     def add_result(self, result: OptimizedResult):
         """Agregar resultado si está entre los mejores"""
         if result.combination_id in self.all_ids:
             return
         
-        score = result.score()
+        # Mantener top por win rate, P&L y score combinado
+        self._push(self.results_by_winrate, result.win_rate, result)
+        self._push(self.results_by_pnl, result.total_pnl, result)
+        self._push(self.results_by_score, result.score(), result)
         
-        # Mantener top por win rate
-        if len(self.results_by_winrate) < self.max_results:
-            heapq.heappush(self.results_by_winrate, (-result.win_rate, result))
-        elif result.win_rate > -self.results_by_winrate[0][0]:
-            heapq.heapreplace(self.results_by_winrate, (-result.win_rate, result))
-        
-        # Mantener top por P&L
-        if len(self.results_by_pnl) < self.max_results:
-            heapq.heappush(self.results_by_pnl, (-result.total_pnl, result))
-        elif result.total_pnl > -self.results_by_pnl[0][0]:
-            heapq.heapreplace(self.results_by_pnl, (-result.total_pnl, result))
-        
-        # Mantener top por score combinado
-        if len(self.results_by_score) < self.max_results:
-            heapq.heappush(self.results_by_score, (-score, result))
-        elif score > -self.results_by_score[0][0]:
-            heapq.heapreplace(self.results_by_score, (-score, result))
+        for name, heap in self.results_by_objective.items():
+            self._push(heap, OBJECTIVES[name](result), result)
         
         self.all_ids.add(result.combination_id)
     
+    @staticmethod
+    def _ranked(heap: List) -> List[OptimizedResult]:
+        return [entry[-1] for entry in sorted(heap, reverse=True)]
+    
     def get_top_results(self) -> Dict[str, List[OptimizedResult]]:
         """Obtener los mejores resultados organizados"""
-        return {
-            'by_winrate': sorted([r for _, r in self.results_by_winrate], 
-                                key=lambda x: x.win_rate, reverse=True),
-            'by_pnl': sorted([r for _, r in self.results_by_pnl], 
-                           key=lambda x: x.total_pnl, reverse=True),
-            'by_score': sorted([r for _, r in self.results_by_score], 
-                             key=lambda x: x.score(), reverse=True)
+        top = {
+            'by_winrate': self._ranked(self.results_by_winrate),
+            'by_pnl': self._ranked(self.results_by_pnl),
+            'by_score': self._ranked(self.results_by_score)
         }
+        for name, heap in self.results_by_objective.items():
+            top[f'by_{name}'] = self._ranked(heap)
+        return top
     
     def get_absolute_best(self) -> Optional[OptimizedResult]:
         """Obtener el mejor resultado por score combinado"""
         if self.results_by_score:
-            return max([r for _, r in self.results_by_score], key=lambda x: x.score())
+            return max(self.results_by_score)[-1]
         return None
 
 
 class OptimizedParameterSearch:
     """Optimizador de parámetros con mejor rendimiento"""
     
-    def __init__(self, data_feed, max_top_results: int = 10):
+    def __init__(self, data_feed, max_top_results: int = 10, low_memory: bool = False,
+                 use_settlement_index: bool = False, fine_settlement=None,
+                 objectives: Tuple[str, ...] = (), strategy_class=None,
+                 outcome_store=None, stability_store=None):
         self.data_feed = data_feed
-        self.tracker = TopResultsTracker(max_top_results)
+        self.tracker = TopResultsTracker(max_top_results, objectives)
+        self.low_memory = low_memory  # exactbars=1: buffers acotados al lookback
+        # Índice de liquidación por expiry_minutes, calculado una vez (requiere PandasData)
+        self.settlement_cache = SettlementIndexCache() if use_settlement_index else None
+        if self.settlement_cache is not None and data_feed is not None and \
+                not hasattr(getattr(data_feed.p, 'dataname', None), 'columns'):
+            print("⚠️ El índice de liquidación requiere PandasData: se liquida por fecha")
+            self.settlement_cache = None
+        # Precios de salida desde M1/ticks (settlement.FineSettlementPrices)
+        self.fine_settlement = fine_settlement
+        # None = BinaryOptionsStrategy (VectorizedBinaryOptionsStrategy: mismos trades, ~1.2x)
+        self.strategy_class = strategy_class
+        # repricing.OutcomeStore opcional: guarda la secuencia ganado/perdido de cada
+        # combinación para re-valorar payouts y stakes sin repetir la búsqueda
+        self.outcome_store = outcome_store
+        # stability.StabilityStore opcional: arrays diarios de cada combinación
+        self.stability_store = stability_store
+        # Calendario del feed para el objetivo 'stability'; el score solo se calcula
+        # si se rankea por estabilidad o se guardan los arrays diarios
+        self.day_range = feed_day_range(data_feed)
+        self.compute_stability = 'stability' in objectives or stability_store is not None
         self.valid_count = 0
         self.total_tested = 0
+        self.sampler: Optional[ParameterSampler] = None  # Para extender en lotes
+        self.issued_combinations: List[Dict] = []
         
     def define_parameter_ranges(self) -> Dict:
         """Definir rangos de parámetros optimizados"""
@@ -148,11 +212,15 @@ class OptimizedParameterSearch:
         }
         return param_ranges
     
-    def generate_smart_combinations(self, max_combinations: int = 100) -> List[Dict]:
+    def generate_smart_combinations(self, max_combinations: int = 100,
+                                    sampling: str = 'random',
+                                    seed: Optional[int] = None) -> List[Dict]:
         """
-        Generar combinaciones inteligentes priorizando valores prometedores
+        Generar combinaciones inteligentes priorizando valores prometedores.
+        sampling: 'random' (grilla barajada), 'sobol' o 'lhs' (ver sampling.py)
         """
         param_ranges = self.define_parameter_ranges()
+        self.sampler = None
         
         # Calcular total de combinaciones
         total_combinations = 1
@@ -174,10 +242,11 @@ class OptimizedParameterSearch:
                 param_sets.append(param_set)
         else:
             # Muestreo estratificado inteligente
-            print(f"🎯 Usando muestreo estratificado de {max_combinations} combinaciones")
+            print(f"🎯 Usando muestreo estratificado ({sampling}) de {max_combinations} combinaciones")
             
             # Semilla para reproducibilidad opcional
-            seed = int(datetime.now().timestamp() * 1000) % 2**32
+            if seed is None:
+                seed = int(datetime.now().timestamp() * 1000) % 2**32
             random.seed(seed)
             np.random.seed(seed)
             
@@ -186,19 +255,41 @@ class OptimizedParameterSearch:
             # Generar combinaciones base prometedoras
             base_combinations = self._generate_promising_base()
             
-            # Completar con variaciones aleatorias
+            # Completar con variaciones aleatorias o de baja discrepancia
             remaining = max_combinations - len(base_combinations)
             if remaining > 0:
-                random_combinations = self._generate_random_combinations(
-                    param_ranges, remaining, exclude=base_combinations
-                )
-                param_sets = base_combinations + random_combinations
+                if sampling == 'random':
+                    sampled = self._generate_random_combinations(
+                        param_ranges, remaining, exclude=base_combinations
+                    )
+                else:
+                    self.sampler = ParameterSampler(param_ranges, sampling, seed)
+                    sampled = self.sampler.next_batch(remaining, exclude=base_combinations)
+                param_sets = base_combinations + sampled
             else:
                 param_sets = base_combinations[:max_combinations]
+            
+            print_coverage(coverage_stats(param_sets, param_ranges), sampling)
         
+        self.issued_combinations = list(param_sets)
         print(f"✅ Generadas {len(param_sets)} combinaciones únicas")
         return param_sets
     
+    def extend_combinations(self, count: int, sampling: str = 'sobol',
+                            seed: Optional[int] = None) -> List[Dict]:
+        """
+        Siguiente lote de combinaciones sin repetir ninguna de las ya generadas.
+        Con Sobol el lote continúa la misma secuencia, así que el conjunto acumulado
+        sigue cubriendo la grilla de forma pareja.
+        """
+        param_ranges = self.define_parameter_ranges()
+        if self.sampler is None or self.sampler.method != sampling:
+            self.sampler = ParameterSampler(param_ranges, sampling, seed)
+        batch = self.sampler.next_batch(count, exclude=self.issued_combinations)
+        self.issued_combinations.extend(batch)
+        print_coverage(coverage_stats(self.issued_combinations, param_ranges), sampling)
+        return batch
+    
     def _generate_promising_base(self) -> List[Dict]:
         """Generar combinaciones base que suelen funcionar bien"""
         promising_sets = [
@@ -264,16 +355,21 @@ class OptimizedParameterSearch:
     def run_optimized_search(self, max_combinations: int = 50, 
                            min_trades: int = 10, 
                            min_win_rate: float = 50.0,
-                           verbose: bool = False) -> Dict:
+                           verbose: bool = False,
+                           telemetry=None,
+                           sampling: str = 'random',
+                           seed: Optional[int] = None) -> Dict:
         """
-        Ejecutar búsqueda optimizada con evaluación temprana
+        Ejecutar búsqueda optimizada con evaluación temprana.
+        telemetry: TelemetrySink opcional (ver telemetry.py) para eventos JSON periódicos
+        sampling: 'random', 'sobol' o 'lhs' para completar las combinaciones base
         """
         print("\n" + "="*60)
         print("🚀 BÚSQUEDA OPTIMIZADA DE PARÁMETROS")
         print("="*60)
         
         # Generar combinaciones inteligentes
-        param_sets = self.generate_smart_combinations(max_combinations)
+        param_sets = self.generate_smart_combinations(max_combinations, sampling, seed)
         total_sets = len(param_sets)
         
         if total_sets == 0:
@@ -288,6 +384,10 @@ class OptimizedParameterSearch:
         progress_points = [max(1, int(total_sets * p / 10)) for p in range(1, 11)]
         early_stop_count = 0
         
+        if telemetry:
+            telemetry.start(total=total_sets, min_trades=min_trades,
+                            min_win_rate=min_win_rate)
+        
         for i, params in enumerate(param_sets):
             self.total_tested += 1
             
@@ -301,25 +401,23 @@ class OptimizedParameterSearch:
                       f"Válidos: {self.valid_count}/{i+1} | "
                       f"Vel: {rate:.1f}/s | ETA: {eta:.0f}s")
             
+            combo_start = time.perf_counter()
+            status, score = 'error', None
             try:
                 # Ejecutar backtest (sin almacenar trades)
                 result = self._run_lightweight_backtest(params)
+                status = 'empty'
                 
                 if result:
-                    # Evaluación temprana
-                    if result['total_trades'] < min_trades:
-                        early_stop_count += 1
-                        continue
-                    
-                    if result['win_rate'] < min_win_rate:
+                    self._store_result(i + 1, params, result)
+                    opt_result = self._register_result(result, params, i + 1,
+                                                       min_trades, min_win_rate)
+                    if opt_result is None:
                         early_stop_count += 1
+                        status = 'early_stop'
                         continue
                     
-                    # Si pasa los filtros, crear resultado optimizado
-                    opt_result = OptimizedResult(result, params, i + 1)
-                    self.tracker.add_result(opt_result)
-                    self.valid_count += 1
-                    
+                    status, score = 'valid', opt_result.score()
                     if verbose and self.valid_count <= 3:
                         print(f"  ✅ #{i+1} válido: WR={opt_result.win_rate:.1f}%, "
                               f"P&L=${opt_result.total_pnl:.2f}")
@@ -328,6 +426,13 @@ class OptimizedParameterSearch:
                 if verbose:
                     print(f"  ❌ Error en #{i+1}: {str(e)}")
                 continue
+            finally:
+                if telemetry:
+                    telemetry.record(time.perf_counter() - combo_start, status,
+                                     bars=self._bars_processed(), score=score)
+        
+        if telemetry:
+            telemetry.close()
         
         # Estadísticas finales
         elapsed_total = (datetime.now() - start_time).total_seconds()
@@ -342,17 +447,69 @@ class OptimizedParameterSearch:
             print("❌ No se encontraron configuraciones válidas")
             return {}
     
+    def _register_result(self, result: Dict, params: Dict, combo_id: int,
+                         min_trades: int, min_win_rate: float) -> Optional[OptimizedResult]:
+        """
+        Aplicar la evaluación temprana y registrar el resultado en el tracker.
+        Retorna None si el resultado fue descartado por los filtros.
+        """
+        if result['total_trades'] < min_trades:
+            return None
+        
+        if result['win_rate'] < min_win_rate:
+            return None
+        
+        if self.compute_stability:
+            result['stability'] = stability_score(DailyRecord.from_result(result), self.day_range)
+        
+        # Si pasa los filtros, crear resultado optimizado
+        opt_result = OptimizedResult(result, params, combo_id)
+        self.tracker.add_result(opt_result)
+        self.valid_count += 1
+        return opt_result
+    
+    def _store_result(self, combo_id: int, params: Dict, result: Dict):
+        """Guardar outcomes y arrays diarios de la combinación (si hay stores)"""
+        if self.outcome_store is not None:
+            self.outcome_store.add(combo_id, params, result.get('outcomes', b''))
+        if self.stability_store is not None:
+            self.stability_store.add(combo_id, params, result)
+    
+    def _bars_processed(self) -> int:
+        """Barras recorridas por el último backtest (para la telemetría)"""
+        try:
+            return len(self.data_feed)
+        except TypeError:
+            return 0
+    
     def _run_lightweight_backtest(self, params: Dict) -> Optional[Dict]:
         """
         Ejecutar backtest sin almacenar trades individuales
         """
+        # Ejecutar backtest normal (la optimización está en no procesar después)
+        result = run_single_backtest(self.data_feed, 
+                                     exactbars=1 if self.low_memory else 0,
+                                     strategy_class=self.strategy_class,
+                                     **self._lightweight_params(params))
+        return self._finish_lightweight_result(result)
+    
+    def _lightweight_params(self, params: Dict) -> Dict:
+        """Parámetros de la estrategia para un backtest ligero (también los usa la flota)"""
         # Agregar flag para no guardar trades
         lightweight_params = params.copy()
         lightweight_params['debug'] = False  # Desactivar debug
+        lightweight_params['keep_trade_log'] = False  # Métricas en streaming
         
-        # Ejecutar backtest normal (la optimización está en no procesar después)
-        result = run_single_backtest(self.data_feed, **lightweight_params)
+        if self.settlement_cache is not None:
+            lightweight_params['settlement_index'] = self.settlement_cache.get(
+                self.data_feed, lightweight_params.get('expiry_minutes',
+                                       BinaryOptionsStrategy.params.expiry_minutes))
         
+        if self.fine_settlement is not None:
+            lightweight_params['fine_settlement'] = self.fine_settlement
+        return lightweight_params
+    
+    def _finish_lightweight_result(self, result: Optional[Dict]) -> Optional[Dict]:
         # Si hay resultado, eliminar el trade_log para ahorrar memoria
         if result and 'trade_log' in result:
             del result['trade_log']
@@ -395,6 +552,20 @@ class OptimizedParameterSearch:
                   f"P&L: ${result.total_pnl:.2f} | "
                   f"Trades: {result.total_trades}")
         
+        # Objetivos adicionales (drawdown, rachas, expectativa...)
+        for name in self.tracker.results_by_objective:
+            print(f"\n🎯 TOP 5 POR {name.upper()}:")
+            print("-" * 60)
+            for i, result in enumerate(top_results[f'by_{name}'][:5]):
+                stability = f"Estabilidad: {result.stability:.0f}% | " \
+                    if result.stability is not None else ""
+                print(f"{i+1}. Max DD: ${result.max_drawdown:.2f} | "
+                      f"Racha perdedora: {result.max_losing_streak} | "
+                      f"Expectativa: ${result.expectancy:.3f} | "
+                      f"{stability}"
+                      f"WR: {result.win_rate:.1f}% | "
+                      f"P&L: ${result.total_pnl:.2f}")
+        
         # Mejor configuración absoluta
         if best_overall:
             print("\n" + "="*80)
@@ -404,9 +575,8 @@ class OptimizedParameterSearch:
         
         return {
             'best_overall': best_overall.to_dict() if best_overall else None,
-            'top_by_winrate': [r.to_dict() for r in top_results['by_winrate'][:5]],
-            'top_by_pnl': [r.to_dict() for r in top_results['by_pnl'][:5]],
-            'top_by_score': [r.to_dict() for r in top_results['by_score'][:5]]
+            **{f'top_{key}': [r.to_dict() for r in ranked[:5]]
+               for key, ranked in top_results.items()}
         }
     
     def _show_detailed_result(self, result: OptimizedResult):
@@ -421,6 +591,12 @@ class OptimizedParameterSearch:
         
         pf_str = f"{result.profit_factor:.2f}" if result.profit_factor != float('inf') else "∞"
         print(f"   ⚖️ Profit Factor: {pf_str}")
+        print(f"   📉 Max Drawdown: ${result.max_drawdown:.2f}")
+        print(f"   🔻 Racha perdedora máxima: {result.max_losing_streak}")
+        print(f"   🧮 Expectativa por trade: ${result.expectancy:.3f}")
+        print(f"   📅 Peor día: ${result.worst_day_pnl:.2f}")
+        if result.stability is not None:
+            print(f"   📆 Ventanas de 30 días rentables: {result.stability:.0f}%")
         
         print(f"\n🔧 PARÁMETROS ÓPTIMOS:")
         params = result.parameters
@@ -438,6 +614,66 @@ class OptimizedParameterSearch:
         print(f"   🛡️ Max Trades/Day: {params['max_trades_per_day']}")
         print(f"   ⏳ Min Time Between: {params['min_time_between_trades']} min")
     
+    def run_robustness_analysis(self, top_n: int = 5, n_resamples: int = 10000,
+                                seed: Optional[int] = None) -> List[Dict]:
+        """Bootstrap y tests de permutación sobre los top-N por score combinado"""
+        from robustness import analyze_configurations, print_robustness_report
+        
+        top = self.tracker.get_top_results()['by_score'][:top_n]
+        if not top:
+            print("❌ No hay resultados para analizar")
+            return []
+        
+        backtest_kwargs = {}
+        if self.fine_settlement is not None:
+            backtest_kwargs['fine_settlement'] = self.fine_settlement
+        
+        start_time = time.perf_counter()
+        analyses = analyze_configurations(self.data_feed, top, n_resamples=n_resamples,
+                                          seed=seed, backtest_kwargs=backtest_kwargs)
+        print_robustness_report(analyses, n_resamples)
+        print(f"\n⏱️ Robustez calculada en {time.perf_counter() - start_time:.1f} segundos")
+        return analyses
+    
+    def run_stability_analysis(self, top_n: int = 5) -> Dict:
+        """Ventanas móviles 30/90/180 días de los top-N por score (requiere stability_store)"""
+        from stability import print_stability_report
+        
+        if self.stability_store is None or not len(self.stability_store):
+            print("❌ No hay arrays diarios registrados (stability_store)")
+            return {}
+        
+        top = self.tracker.get_top_results()['by_score'][:top_n]
+        start_time = time.perf_counter()
+        print_stability_report(self.stability_store, [r.combination_id for r in top])
+        print(f"\n⏱️ Estabilidad calculada en {time.perf_counter() - start_time:.2f} segundos")
+        return self.stability_store.rank_stability()
+
+    def run_session_sweep(self, top_n: int = 3, min_hours: Optional[int] = None,
+                          min_trades: int = 10) -> Dict[int, List[Dict]]:
+        """Ventanas de sesión de los top-N por score: un backtest de candidatos por combinación"""
+        from session_sweep import (MIN_SESSION_HOURS, print_session_sweep, session_windows,
+                                   sweep_sessions)
+
+        top = self.tracker.get_top_results()['by_score'][:top_n]
+        if not top:
+            print("❌ No hay resultados para analizar")
+            return {}
+
+        windows = session_windows(min_hours or MIN_SESSION_HOURS)
+        sweeps = {}
+        print(f"\n🕐 BARRIDO DE SESIONES ({len(windows)} ventanas por combinación)")
+        for result in top:
+            start_time = time.perf_counter()
+            candidates, sweep = sweep_sessions(self.data_feed, result.parameters, windows, search=self)
+            if candidates is None:
+                continue
+            print(f"\n#{result.combination_id}:")
+            print_session_sweep(candidates, sweep, time.perf_counter() - start_time,
+                                min_trades=min_trades)
+            sweeps[result.combination_id] = sweep
+        return sweeps
+
     def save_optimized_results(self, results: Dict, filename: Optional[str] = None):
         """Guardar solo los mejores resultados"""
         if not results:
@@ -502,24 +738,59 @@ def main():
         verbose_input = input("🔍 ¿Modo verbose? (y/N): ").strip().lower()
         verbose = verbose_input in ['y', 'yes', 'sí', 'si']
         
+        telemetry_target = input("📡 Telemetría (archivo .jsonl o udp://host:puerto, vacío = no): ").strip()
+        
+        sampling = input(f"🧭 Muestreo ({'/'.join(SAMPLING_METHODS)}, default random): ").strip().lower()
+        if sampling not in SAMPLING_METHODS:
+            sampling = 'random'
+        
+        stability_input = input("📆 ¿Rankear también por estabilidad en ventanas de 30 días? (y/N): ").strip().lower()
+        stability = stability_input in ['y', 'yes', 'sí', 'si']
+        
     except ValueError:
         max_combinations = 50
         min_trades = 10
         min_win_rate = 50.0
         max_top = 10
         verbose = False
+        telemetry_target = ''
+        sampling = 'random'
+        stability = False
         print("⚠️ Usando valores por defecto")
     
     # 4. Ejecutar búsqueda optimizada
-    optimizer = OptimizedParameterSearch(data_feed, max_top_results=max_top)
+    from telemetry import open_telemetry
+    
+    search_kwargs = {}
+    if stability:
+        search_kwargs = dict(objectives=('stability',),
+                             stability_store=StabilityStore(feed_day_range(data_feed)))
+    optimizer = OptimizedParameterSearch(data_feed, max_top_results=max_top, **search_kwargs)
     results = optimizer.run_optimized_search(
         max_combinations=max_combinations,
         min_trades=min_trades,
         min_win_rate=min_win_rate,
-        verbose=verbose
+        verbose=verbose,
+        telemetry=open_telemetry(telemetry_target),
+        sampling=sampling
     )
     
-    # 5. Guardar resultados si hay
+    # 5. Análisis de robustez opcional
+    if results:
+        robust_choice = input(f"\n🎲 ¿Análisis de robustez del top 5? (y/N): ").strip().lower()
+        if robust_choice in ['y', 'yes', 'sí', 'si']:
+            optimizer.run_robustness_analysis(top_n=5)
+        
+        if stability:
+            stability_choice = input(f"\n📆 ¿Estabilidad en ventanas de 30/90/180 días? (y/N): ").strip().lower()
+            if stability_choice in ['y', 'yes', 'sí', 'si']:
+                optimizer.run_stability_analysis(top_n=5)
+
+        session_choice = input(f"\n🕐 ¿Barrido de ventanas de sesión del top 3? (y/N): ").strip().lower()
+        if session_choice in ['y', 'yes', 'sí', 'si']:
+            optimizer.run_session_sweep(top_n=3)
+
+    # 6. Guardar resultados si hay
     if results:
         save_choice = input(f"\n💾 ¿Guardar resultados? (y/N): ").strip().lower()
         if save_choice in ['y', 'yes', 'sí', 'si']:
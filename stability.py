@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+stability.py - Estabilidad de parámetros en ventanas móviles (30/90/180 días)
+
+BinaryOptionsAnalyzer acumula por día de liquidación el P&L, los trades y los
+ganados. Con esos arrays diarios compactos (DailyRecord) y sumas prefijas, el
+P&L y el win rate de TODAS las ventanas móviles de w días salen en O(días),
+sin repetir backtests por ventana:
+
+    suma(ventana [t, t+w)) = P[t+w] - P[t]     con P = cumsum con 0 inicial
+
+- rolling_stats(): P&L medio/mínimo, % de ventanas rentables y win rate por ventana
+- stability_score(): % de ventanas de 30 días con P&L positivo (objetivo 'stability'
+  de TopResultsTracker)
+- StabilityStore: los arrays de todas las combinaciones evaluadas, alineados al
+  mismo calendario, con estadísticas de estabilidad del ranking entre períodos
+
+Uso:
+    store = StabilityStore(feed_day_range(data_feed))
+    optimizer = OptimizedParameterSearch(data_feed, stability_store=store)
+    optimizer.run_optimized_search(200)
+    optimizer.run_stability_analysis()
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Ventanas (días de calendario) del análisis y ventana del objetivo 'stability'
+STABILITY_WINDOWS = (30, 90, 180)
+STABILITY_WINDOW = 30
+
+
+class DailyRecord:
+    """P&L, trades y ganados por día de calendario, desde first_day (ordinal)"""
+    __slots__ = ['first_day', 'pnl', 'trades', 'wins']
+
+    def __init__(self, first_day: int, pnl: np.ndarray, trades: np.ndarray, wins: np.ndarray):
+        self.first_day = first_day
+        self.pnl = pnl
+        self.trades = trades
+        self.wins = wins
+
+    @property
+    def last_day(self) -> int:
+        return self.first_day + len(self.pnl) - 1
+
+    @classmethod
+    def from_result(cls, result: Dict) -> 'DailyRecord':
+        """Arrays contiguos a partir de daily_pnl / daily_trades / daily_wins del analizador"""
+        daily_pnl = result.get('daily_pnl') or {}
+        if not daily_pnl:
+            return cls(0, np.zeros(0), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+        daily_trades = result.get('daily_trades') or {}
+        daily_wins = result.get('daily_wins') or {}
+
+        ordinals = {day: _ordinal(day) for day in daily_pnl}
+        first = min(ordinals.values())
+        size = max(ordinals.values()) - first + 1
+        pnl = np.zeros(size)
+        trades = np.zeros(size, dtype=np.int32)
+        wins = np.zeros(size, dtype=np.int32)
+        for day, ordinal in ordinals.items():
+            pnl[ordinal - first] = daily_pnl[day]
+            trades[ordinal - first] = daily_trades.get(day, 0)
+            wins[ordinal - first] = daily_wins.get(day, 0)
+        return cls(first, pnl, trades, wins)
+
+    def aligned(self, first_day: int, last_day: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(pnl, trades, wins) sobre el calendario first_day..last_day (días sin trades = 0)"""
+        size = last_day - first_day + 1
+        arrays = (np.zeros(size), np.zeros(size, dtype=np.int32), np.zeros(size, dtype=np.int32))
+        if not len(self.pnl):
+            return arrays
+        lo = max(self.first_day, first_day)
+        hi = min(self.last_day, last_day)
+        if lo <= hi:
+            for target, source in zip(arrays, (self.pnl, self.trades, self.wins)):
+                target[lo - first_day:hi - first_day + 1] = \
+                    source[lo - self.first_day:hi - self.first_day + 1]
+        return arrays
+
+
+def _ordinal(day) -> int:
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
+
+
+def feed_day_range(data_feed) -> Optional[Tuple[int, int]]:
+    """Primer y último día (ordinales) de un PandasData; None si no se puede saber"""
+    frame = getattr(getattr(data_feed, 'p', None), 'dataname', None)
+    if not hasattr(frame, 'columns'):
+        return None  # Feed en streaming (GenericCSVData): dataname es la ruta del CSV
+    index = frame.index
+    if index is None or not len(index) or not hasattr(index[0], 'toordinal'):
+        return None
+    return index[0].toordinal(), index[-1].toordinal()
+
+
+def window_sums(values: np.ndarray, window: int, step: int = 1) -> np.ndarray:
+    """
+    Sumas de las ventanas de `window` días sobre el último eje, cada `step` días.
+    Con menos días que la ventana, una sola ventana con todo el período.
+    """
+    values = np.asarray(values)
+    days = values.shape[-1]
+    prefix = np.concatenate([np.zeros(values.shape[:-1] + (1,), dtype=values.dtype),
+                             np.cumsum(values, axis=-1)], axis=-1)
+    if days < window:
+        return prefix[..., -1:] - prefix[..., :1]
+    starts = np.arange(0, days - window + 1, step)
+    return prefix[..., starts + window] - prefix[..., starts]
+
+
+def rolling_stats(pnl: np.ndarray, trades: np.ndarray, wins: np.ndarray,
+                  window: int, step: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Estadísticas de las ventanas móviles sobre el último eje (una fila por
+    combinación si los arrays son 2D). El win rate ignora ventanas sin trades.
+    """
+    pnl_w = window_sums(pnl, window, step)
+    trades_w = window_sums(trades, window, step)
+    wins_w = window_sums(wins, window, step)
+    active = trades_w > 0
+    active_count = active.sum(axis=-1)
+    win_rate_w = wins_w / np.maximum(trades_w, 1) * 100
+    return {
+        'windows': np.full(pnl_w.shape[:-1], pnl_w.shape[-1]),
+        'pnl_mean': pnl_w.mean(axis=-1),
+        'pnl_min': pnl_w.min(axis=-1),
+        'pnl_std': pnl_w.std(axis=-1),
+        'profitable_pct': (pnl_w > 0).mean(axis=-1) * 100,
+        'win_rate_mean': np.where(active_count > 0, np.where(active, win_rate_w, 0.0).sum(axis=-1)
+                                  / np.maximum(active_count, 1), np.nan),
+        'win_rate_min': np.where(active_count > 0,
+                                 np.where(active, win_rate_w, np.inf).min(axis=-1), np.nan),
+    }
+
+
+def stability_score(record: DailyRecord, day_range: Optional[Tuple[int, int]] = None,
+                    window: int = STABILITY_WINDOW) -> float:
+    """
+    % de ventanas móviles de `window` días con P&L positivo. El calendario es el
+    del feed (day_range) para no premiar a quien solo operó en una racha corta.
+    """
+    if not len(record.pnl):
+        return 0.0
+    first, last = day_range if day_range else (record.first_day, record.last_day)
+    pnl, trades, wins = record.aligned(min(first, record.first_day), max(last, record.last_day))
+    return float(rolling_stats(pnl, trades, wins, window)['profitable_pct'])
+
+
+def _percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """Rank percentil por columna (1.0 = mejor, 0.0 = peor) sobre el eje 0"""
+    count = values.shape[0]
+    if count < 2:
+        return np.ones_like(values, dtype=float)
+    order = np.argsort(np.argsort(values, axis=0, kind='stable'), axis=0, kind='stable')
+    return order / (count - 1)
+
+
+class StabilityStore:
+    """Arrays diarios de todas las combinaciones evaluadas"""
+
+    def __init__(self, day_range: Optional[Tuple[int, int]] = None):
+        self.day_range = day_range
+        self.ids: List[int] = []
+        self.params: List[Dict] = []
+        self.records: List[DailyRecord] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, combo_id: int, params: Dict, result: Dict):
+        self.ids.append(int(combo_id))
+        self.params.append(dict(params))
+        self.records.append(DailyRecord.from_result(result))
+
+    def calendar(self) -> Tuple[int, int]:
+        """Calendario común: el del feed, ampliado a los días con liquidaciones"""
+        days = [(r.first_day, r.last_day) for r in self.records if len(r.pnl)]
+        if self.day_range:
+            days.append(self.day_range)
+        if not days:
+            return 0, 0
+        return min(d[0] for d in days), max(d[1] for d in days)
+
+    def matrices(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(pnl, trades, wins) de forma (combinaciones, días)"""
+        first, last = self.calendar()
+        size = last - first + 1
+        pnl = np.zeros((len(self.records), size))
+        trades = np.zeros((len(self.records), size), dtype=np.int32)
+        wins = np.zeros((len(self.records), size), dtype=np.int32)
+        for row, record in enumerate(self.records):
+            pnl[row], trades[row], wins[row] = record.aligned(first, last)
+        return pnl, trades, wins
+
+    def rolling(self, windows: Sequence[int] = STABILITY_WINDOWS) -> Dict[int, Dict[str, np.ndarray]]:
+        """rolling_stats de cada ventana para todas las combinaciones"""
+        pnl, trades, wins = self.matrices()
+        return {window: rolling_stats(pnl, trades, wins, window) for window in windows}
+
+    def rank_stability(self, window: int = STABILITY_WINDOW) -> Dict[str, np.ndarray]:
+        """
+        Ranking por P&L en períodos consecutivos de `window` días (sin solapamiento):
+        - rank_mean / rank_worst / rank_std: rank percentil de cada combinación
+        - persistence: correlación de rangos (Spearman) entre períodos consecutivos,
+          promedio de toda la población (cerca de 0 = el ranking es azar)
+        """
+        pnl, _, _ = self.matrices()
+        period_pnl = window_sums(pnl, window, step=window)
+        ranks = _percentile_ranks(period_pnl)
+        periods = ranks.shape[1]
+        correlations = [np.corrcoef(ranks[:, i], ranks[:, i + 1])[0, 1]
+                        for i in range(periods - 1)
+                        if ranks[:, i].std() > 0 and ranks[:, i + 1].std() > 0]
+        return {
+            'periods': periods,
+            'rank_mean': ranks.mean(axis=1),
+            'rank_worst': ranks.min(axis=1),
+            'rank_std': ranks.std(axis=1),
+            'persistence': float(np.mean(correlations)) if correlations else float('nan'),
+        }
+
+    def row(self, combo_id: int) -> int:
+        return self.ids.index(combo_id)
+
+
+def print_stability_report(store: StabilityStore, combo_ids: Sequence[int],
+                           windows: Sequence[int] = STABILITY_WINDOWS,
+                           rank_window: int = STABILITY_WINDOW):
+    """Estabilidad de las combinaciones indicadas frente a toda la población"""
+    if not len(store):
+        print("❌ No hay combinaciones registradas")
+        return
+    first, last = store.calendar()
+    rolling = store.rolling(windows)
+    ranks = store.rank_stability(rank_window)
+
+    print("\n" + "=" * 80)
+    print(f"📆 ESTABILIDAD EN VENTANAS MÓVILES ({len(store)} combinaciones, "
+          f"{last - first + 1} días)")
+    print("=" * 80)
+    persistence = ranks['persistence']
+    persistence_str = f"{persistence:.2f}" if persistence == persistence else "n/d"
+    print(f"🔁 Persistencia del ranking entre períodos de {rank_window} días: "
+          f"{persistence_str} ({ranks['periods']} períodos)")
+
+    for combo_id in combo_ids:
+        if combo_id not in store.ids:
+            continue
+        row = store.row(combo_id)
+        print(f"\n#{combo_id}: rank medio {ranks['rank_mean'][row]:.0%} | "
+              f"peor {ranks['rank_worst'][row]:.0%} | desvío {ranks['rank_std'][row]:.2f}")
+        for window in windows:
+            stats = rolling[window]
+            win_rate_min = stats['win_rate_min'][row]
+            win_rate_str = f"{win_rate_min:.1f}%" if win_rate_min == win_rate_min else "n/d"
+            print(f"   {window:>3}d: {stats['windows'][row]:4d} ventanas | "
+                  f"rentables {stats['profitable_pct'][row]:5.1f}% | "
+                  f"P&L medio ${stats['pnl_mean'][row]:7.2f} | "
+                  f"peor ${stats['pnl_min'][row]:7.2f} | WR mín {win_rate_str}")
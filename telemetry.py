@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+telemetry.py - Telemetría estructurada (JSON por líneas) para búsquedas largas
+
+Cada evento es un objeto JSON en una línea, enviado a un archivo o a un socket
+UDP local, para poder seguirlo en vivo (tail -f, netcat, un script de gráficos).
+
+Eventos:
+    start     al comenzar (total de combinaciones)
+    progress  cada `interval` segundos: velocidad, válidos/descartados, mejor score, RSS
+    end       al terminar, con el histograma completo de duraciones
+"""
+
+import json
+import os
+import socket
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Límites superiores (segundos) de los buckets del histograma de duraciones
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def current_rss_mb() -> float:
+    """Memoria residente actual del proceso en MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # Fuera de Linux solo tenemos el pico (ru_maxrss)
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    except ImportError:
+        return 0.0
+
+
+class DurationHistogram:
+    """Histograma de duraciones por combinación con buckets fijos"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # último = desbordamiento
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def to_dict(self) -> Dict:
+        labels = [f"le_{b:g}" for b in self.buckets] + ['inf']
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min,
+            'max': self.max,
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class TelemetrySink:
+    """Emite eventos de telemetría de una búsqueda a un archivo o UDP"""
+
+    def __init__(self, path: Optional[str] = None, udp_address: Optional[tuple] = None,
+                 interval: float = 10.0, worker_id: Optional[str] = None):
+        if not path and not udp_address:
+            raise ValueError("Se requiere un archivo o una dirección UDP")
+
+        self.interval = interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.file = open(path, 'a', encoding='utf-8', buffering=1) if path else None
+        self.udp_address = udp_address
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if udp_address else None
+
+        self.histogram = DurationHistogram()
+        self.counts = {'valid': 0, 'early_stop': 0, 'empty': 0, 'error': 0}
+        self.tested = 0
+        self.total = None
+        self.bars = 0
+        self.best_score = None
+
+        self.start_time = time.monotonic()
+        self._last_emit = self.start_time
+        self._last_tested = 0
+        self._last_bars = 0
+
+    def _emit(self, event: str, **fields):
+        payload = {'ts': time.time(), 'event': event, 'worker': self.worker_id}
+        payload.update(fields)
+        line = json.dumps(payload, default=str)
+        if self.file:
+            self.file.write(line + '\n')
+        if self.sock:
+            try:
+                self.sock.sendto(line.encode('utf-8'), self.udp_address)
+            except OSError:
+                pass  # La telemetría nunca debe interrumpir la búsqueda
+
+    def start(self, total: Optional[int] = None, **fields):
+        self.total = total
+        self._emit('start', total=total, rss_mb=round(current_rss_mb(), 1), **fields)
+
+    def record(self, duration: float, status: str, bars: int = 0,
+               score: Optional[float] = None):
+        """Registrar una combinación evaluada (status: valid/early_stop/empty/error)"""
+        self.tested += 1
+        self.counts[status] = self.counts.get(status, 0) + 1
+        self.histogram.add(duration)
+        self.bars += bars
+        if score is not None and (self.best_score is None or score > self.best_score):
+            self.best_score = score
+
+        if time.monotonic() - self._last_emit >= self.interval:
+            self.emit_progress()
+
+    def _snapshot(self) -> Dict:
+        now = time.monotonic()
+        window = now - self._last_emit
+        elapsed = now - self.start_time
+        snapshot = {
+            'elapsed': round(elapsed, 3),
+            'tested': self.tested,
+            'total': self.total,
+            'valid': self.counts.get('valid', 0),
+            'early_stopped': self.counts.get('early_stop', 0),
+            'empty': self.counts.get('empty', 0),
+            'errors': self.counts.get('error', 0),
+            'combos_per_sec': (self.tested - self._last_tested) / window if window > 0 else 0.0,
+            'bars_per_sec': (self.bars - self._last_bars) / window if window > 0 else 0.0,
+            'avg_combos_per_sec': self.tested / elapsed if elapsed > 0 else 0.0,
+            'best_score': self.best_score,
+            'rss_mb': round(current_rss_mb(), 1),
+        }
+        self._last_emit = now
+        self._last_tested = self.tested
+        self._last_bars = self.bars
+        return snapshot
+
+    def emit_progress(self):
+        self._emit('progress', **self._snapshot())
+
+    def close(self):
+        """Emitir el evento final y liberar recursos"""
+        self._emit('end', histogram=self.histogram.to_dict(), **self._snapshot())
+        if self.file:
+            self.file.close()
+            self.file = None
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+
+def open_telemetry(target: Optional[str], interval: float = 10.0,
+                   worker_id: Optional[str] = None) -> Optional[TelemetrySink]:
+    """
+    Crear un sink a partir de un destino en texto:
+        'udp://127.0.0.1:9999'  -> socket UDP
+        'ruta/archivo.jsonl'    -> archivo (se agregan líneas)
+    """
+    if not target:
+        return None
+    if target.startswith('udp://'):
+        host, _, port = target[len('udp://'):].rpartition(':')
+        return TelemetrySink(udp_address=(host or '127.0.0.1', int(port)),
+                             interval=interval, worker_id=worker_id)
+    return TelemetrySink(path=target, interval=interval, worker_id=worker_id)
+
+
+def read_events(path: str) -> List[Dict]:
+    """Leer un archivo de telemetría (útil para graficar o inspeccionar)"""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
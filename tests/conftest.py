@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de los módulos numéricos (casos verificados a mano).
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+# Los módulos del proyecto viven en la raíz del repositorio (sin paquete)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
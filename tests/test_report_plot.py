@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Reducción de series para el gráfico: min/max por columna, LTTB y marcadores (report_plot.py)"""
+
+import numpy as np
+
+from report_plot import aggregate_trades, equity_from_trade_log, lttb_indices, minmax_indices
+
+
+def test_minmax_short_series_is_kept_whole():
+    assert minmax_indices(np.array([3.0, 1.0, 2.0, 5.0]), 2).tolist() == [0, 1, 2, 3]
+
+
+def test_minmax_keeps_min_and_max_of_each_column():
+    # Columnas [5 1 9 3] y [2 8 0 4]: mínimos en 1 y 6, máximos en 2 y 5, más los extremos
+    values = np.array([5, 1, 9, 3, 2, 8, 0, 4], dtype=float)
+    assert minmax_indices(values, 2).tolist() == [0, 1, 2, 5, 6, 7]
+
+
+def test_minmax_pads_the_last_column_with_the_last_value():
+    # 10 barras en 3 columnas de 4: la última es [6 0] + relleno con 0
+    values = np.array([5, 1, 9, 3, 2, 8, 4, 7, 6, 0], dtype=float)
+    assert minmax_indices(values, 3).tolist() == [0, 1, 2, 4, 5, 8, 9]
+
+
+def test_minmax_never_loses_a_spike():
+    values = np.zeros(10_000)
+    values[4321] = 50.0
+    values[777] = -50.0
+    idx = minmax_indices(values, 100)
+    assert 4321 in idx and 777 in idx
+    assert len(idx) <= 2 * 100 + 2
+
+
+def test_lttb_small_threshold_or_short_series_is_kept_whole():
+    x = np.arange(5, dtype=float)
+    assert lttb_indices(x, x, 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb_indices(x, x, 2).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_lttb_three_points_picks_the_peak():
+    # Un solo bucket (1, 2, 3) entre (0, 0) y (4, 0): el triángulo más grande es el pico
+    x = np.arange(5, dtype=float)
+    y = np.array([0.0, 0.0, 5.0, 0.0, 0.0])
+    assert lttb_indices(x, y, 3).tolist() == [0, 2, 4]
+
+
+def test_lttb_keeps_endpoints_spike_and_order():
+    x = np.arange(100, dtype=float)
+    y = np.zeros(100)
+    y[50] = 10.0
+    idx = lttb_indices(x, y, 10)
+    assert len(idx) == 10
+    assert idx[0] == 0 and idx[-1] == 99
+    assert np.all(np.diff(idx) > 0)
+    assert 50 in idx
+
+
+def test_equity_is_cumulative_in_expiry_order():
+    trades = [
+        {'expiry_time': np.datetime64('2024-01-01T00:20'), 'pnl': -1.0},
+        {'expiry_time': np.datetime64('2024-01-01T00:10'), 'pnl': 0.8},
+        {'expiry_time': np.datetime64('2024-01-01T00:30'), 'pnl': 0.8},
+    ]
+    times, equity = equity_from_trade_log(trades)
+    assert np.all(np.diff(times) > 0)
+    assert np.allclose(equity, [0.8, -0.2, 0.6])
+
+
+def test_trades_in_the_same_column_are_aggregated_by_type():
+    start = np.datetime64('2024-01-01T00:00', 'ns').astype(np.int64)
+    end = start + 100 * 60 * 1_000_000_000
+
+    def trade(minute, kind, result, price):
+        return {'entry_time': np.datetime64('2024-01-01T00:00') + np.timedelta64(minute, 'm'),
+                'entry_price': price, 'type': kind, 'result': result}
+
+    # 10 columnas de 10 minutos: dos CALL y un PUT en la primera, un CALL en la última
+    log = [trade(1, 'CALL', 'WIN', 1.0), trade(3, 'CALL', 'LOSS', 2.0),
+           trade(5, 'PUT', 'WIN', 1.5), trade(95, 'CALL', 'WIN', 3.0)]
+    markers = aggregate_trades(log, int(start), int(end), 10)
+    summary = [(m['type'], m['count'], m['wins'], m['price']) for m in markers]
+    assert summary == [('PUT', 1, 1, 1.5), ('CALL', 2, 1, 1.5), ('CALL', 1, 1, 3.0)]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Re-valoración de payouts y stakes sobre secuencias ganado/perdido (repricing.py)"""
+
+import numpy as np
+import pytest
+
+import repricing
+from repricing import (
+    OutcomeStore,
+    break_even_payout,
+    loss_streak_before,
+    outcome_array,
+    parse_grid,
+    reprice_compounding,
+    reprice_fixed,
+    reprice_martingale,
+)
+
+W, L = 1, 0
+
+
+def test_outcome_array_from_bytes_and_lists():
+    assert outcome_array(b'\x01\x00\x01').tolist() == [True, False, True]
+    assert outcome_array([1, 0]).tolist() == [True, False]
+
+
+def test_loss_streak_resets_after_a_win():
+    assert loss_streak_before([L, L, W, L, W, W]).tolist() == [0, 1, 2, 0, 1, 0]
+
+
+def test_loss_streak_with_four_losses_and_max_steps_four():
+    # Tras 4 pérdidas seguidas el ciclo vuelve a la base (0), la quinta arranca de nuevo
+    won = np.array([L, L, L, L, L, W, L], dtype=bool)
+    assert loss_streak_before(won, max_steps=4).tolist() == [0, 1, 2, 3, 0, 1, 0]
+
+
+def test_loss_streak_rejects_non_positive_max_steps():
+    with pytest.raises(ValueError):
+        loss_streak_before([L, W], max_steps=0)
+
+
+def test_martingale_four_losses_then_win():
+    # Stakes 1, 2, 4, 8 y vuelta a 1: -1 -2 -4 -8 +0.8
+    metrics = reprice_martingale([L, L, L, L, W], payouts=[0.8], base_stakes=[1.0],
+                                 multipliers=[2.0], max_steps=4, balance=100.0)
+    assert metrics['total_pnl'][0, 0, 0] == pytest.approx(-14.2)
+    assert metrics['max_drawdown'][0, 0, 0] == pytest.approx(15.0)
+    assert metrics['max_stake'][0, 0, 0] == 8.0
+    assert metrics['min_balance'][0, 0, 0] == pytest.approx(85.0)
+
+
+def test_martingale_recovers_on_fourth_trade():
+    # Stakes 1, 2, 4, 8: la ganancia de 8 * 0.8 = 6.4 cubre casi todo
+    metrics = reprice_martingale([L, L, L, W], payouts=[0.8], max_steps=4)
+    assert metrics['total_pnl'][0, 0, 0] == pytest.approx(-0.6)
+
+
+def test_fixed_stake_grid():
+    metrics = reprice_fixed([W, L, W], payouts=[0.8, 0.5], stakes=[1.0, 2.0])
+    # payout 0.8: equity 0.8, -0.2, 0.6 -> drawdown 1.0 desde el pico 0.8
+    assert np.allclose(metrics['total_pnl'], [[0.6, 1.2], [0.0, 0.0]])
+    assert metrics['max_drawdown'][0].tolist() == pytest.approx([1.0, 2.0])
+    assert metrics['max_stake'][1].tolist() == [1.0, 2.0]
+
+
+def test_compounding_uses_balance_before_each_trade():
+    # 10% de 100 gana 0.8 -> 108; 10% de 108 pierde -> 97.2
+    metrics = reprice_compounding([W, L], payouts=[0.8], fractions=[0.1], balance=100.0)
+    assert metrics['final_balance'][0, 0] == pytest.approx(97.2)
+    assert metrics['max_stake'][0, 0] == pytest.approx(10.8)
+
+
+def test_break_even_payout():
+    assert break_even_payout([W, L, W, L, L]) == pytest.approx(1.5)
+    assert break_even_payout([L, L]) == float('inf')
+
+
+def test_store_chunked_repricing_matches_single_sequences(monkeypatch):
+    rng = np.random.default_rng(3)
+    store = OutcomeStore()
+    for combo_id in range(7):
+        store.add(combo_id, {'id': combo_id}, (rng.random(rng.integers(1, 40)) < 0.5))
+    payouts = [0.7, 0.85]
+
+    # Bloques de una o dos configuraciones
+    monkeypatch.setattr(repricing, 'REPRICE_CHUNK_ELEMENTS', 100)
+    chunked = store.reprice_fixed(payouts, stake=2.0)
+    for row, sequence in enumerate(store.sequences):
+        single = reprice_fixed(sequence, payouts, stakes=[2.0])
+        for key in ('total_pnl', 'max_drawdown', 'final_balance', 'min_balance', 'ruined'):
+            assert chunked[key][:, row].tolist() == pytest.approx(single[key][:, 0].tolist())
+
+
+def test_store_save_load_roundtrip(tmp_path):
+    store = OutcomeStore()
+    store.add(5, {'a': 1}, [W, L, L])
+    store.add(9, {'a': 2}, [])
+    filename = str(tmp_path / 'outcomes.npz')
+    store.save(filename)
+    loaded = OutcomeStore.load(filename)
+    assert loaded.ids == [5, 9]
+    assert loaded.params == [{'a': 1}, {'a': 2}]
+    assert [seq.tolist() for seq in loaded.sequences] == [[True, False, False], []]
+
+
+def test_parse_grid():
+    assert parse_grid('0.6:0.7:0.05') == [0.6, 0.65, 0.7]
+    assert parse_grid('0.7, 0.8') == [0.7, 0.8]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Muestreo Sobol / hipercubo latino de la grilla de parámetros (sampling.py)"""
+
+import numpy as np
+import pytest
+
+from sampling import (
+    MAX_SOBOL_DIMENSIONS,
+    ParameterSampler,
+    SobolSequence,
+    coverage_stats,
+    latin_hypercube,
+    param_key,
+    sobol_direction_vectors,
+)
+
+
+def test_sobol_known_prefix():
+    # Primeros 8 puntos (orden de código Gray, sin desplazamiento) con los números
+    # de dirección de Joe y Kuo: dimensión 1 = van der Corput
+    expected = np.array([
+        [0.0, 0.0, 0.0, 0.0],
+        [0.5, 0.5, 0.5, 0.5],
+        [0.75, 0.25, 0.25, 0.25],
+        [0.25, 0.75, 0.75, 0.75],
+        [0.375, 0.375, 0.625, 0.875],
+        [0.875, 0.875, 0.125, 0.375],
+        [0.625, 0.125, 0.875, 0.625],
+        [0.125, 0.625, 0.375, 0.125],
+    ])
+    assert np.array_equal(SobolSequence(4).points(0, 8), expected)
+
+
+def test_sobol_last_dimension_prefix():
+    # Dimensión 21 (grado 7, a = 4, m = 1 3 7 13 13 15 69)
+    points = SobolSequence(MAX_SOBOL_DIMENSIONS).points(1, 5)[:, -1]
+    assert points.tolist() == [0.5, 0.25, 0.75, 0.125, 0.625]
+
+
+def test_direction_vectors_start_with_initial_m():
+    vectors = sobol_direction_vectors(3)
+    top = 1 << 31
+    # v_k = m_k / 2^k: dimensión 2 tiene m = 1, 3, 5, 15...
+    assert vectors[1, :4].tolist() == [top, 3 * top // 2, 5 * top // 4, 15 * top // 8]
+
+
+def test_too_many_dimensions_is_rejected():
+    with pytest.raises(ValueError):
+        sobol_direction_vectors(MAX_SOBOL_DIMENSIONS + 1)
+
+
+def test_batches_continue_the_same_sequence():
+    sequence = SobolSequence(3, shift_seed=7)
+    batches = np.vstack([sequence.draw(3), sequence.draw(5)])
+    assert np.array_equal(batches, SobolSequence(3, shift_seed=7).points(0, 8))
+
+
+@pytest.mark.parametrize('shift_seed', [None, 11])
+def test_power_of_two_prefix_balances_every_value(shift_seed):
+    # 16 puntos sobre 4 valores por parámetro: cada valor exactamente 4 veces
+    points = SobolSequence(5, shift_seed=shift_seed).points(0, 16)
+    codes = np.floor(points * 4).astype(int)
+    for column in codes.T:
+        assert np.bincount(column, minlength=4).tolist() == [4, 4, 4, 4]
+
+
+def test_latin_hypercube_one_point_per_stratum():
+    points = latin_hypercube(10, 3, np.random.default_rng(0))
+    assert points.shape == (10, 3)
+    for column in points.T:
+        assert sorted(np.floor(column * 10).astype(int).tolist()) == list(range(10))
+
+
+def test_sampler_exhausts_small_grid_without_repeats():
+    ranges = {'a': [1, 2, 3], 'b': [10, 20]}
+    sampler = ParameterSampler(ranges, 'sobol', seed=3)
+    first = sampler.next_batch(4)
+    rest = sampler.next_batch(10)
+    keys = [param_key(p) for p in first + rest]
+    assert len(first) == 4 and len(rest) == 2
+    assert len(set(keys)) == 6
+
+
+def test_sampler_skips_excluded_and_maps_continuous_ranges():
+    ranges = {'a': [1, 2], 'x': (0.0, 2.0)}
+    sampler = ParameterSampler(ranges, 'lhs', seed=1)
+    batch = sampler.next_batch(5, exclude=[{'a': 1, 'x': 0.5}])
+    assert all(0.0 <= p['x'] < 2.0 and p['a'] in (1, 2) for p in batch)
+    assert {'a': 1, 'x': 0.5} not in batch
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        ParameterSampler({'a': [1]}, 'grid')
+
+
+def test_coverage_stats_on_full_grid():
+    ranges = {'a': [1, 2], 'b': [1, 2, 3]}
+    grid = [{'a': a, 'b': b} for a in ranges['a'] for b in ranges['b']]
+    stats = coverage_stats(grid, ranges)
+    assert stats['value_coverage'] == 100.0
+    assert stats['max_imbalance'] == 1.0
+    assert stats['pair_coverage'] == 100.0
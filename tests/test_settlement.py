@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Índice de liquidación precalculado y precios de liquidación finos (settlement.py)"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from settlement import (
+    FineSettlementPrices,
+    SettlementIndexCache,
+    build_settlement_index,
+    infer_bar_minutes,
+    settle_vectorized,
+)
+
+
+def minutes(*values):
+    """Timestamps int64 (ns) a partir de minutos desde 2024-01-01 00:00"""
+    base = np.datetime64('2024-01-01T00:00', 'ns').astype(np.int64)
+    return base + np.array(values, dtype=np.int64) * 60 * 1_000_000_000
+
+
+def test_bar_exactly_at_expiry_settles_on_that_bar():
+    # Velas de 5 minutos, expiry 15: la barra 0 liquida en la barra con 00:15
+    index = build_settlement_index(minutes(0, 5, 10, 15, 20, 25), 15)
+    assert index.tolist() == [3, 4, 5, 6, 6, 6]
+
+
+def test_gap_settles_on_first_bar_after_expiry():
+    # Faltan 15 y 20: los trades de 0 y 5 liquidan en la barra de 25 (la de 10, justo en ella)
+    index = build_settlement_index(minutes(0, 5, 10, 25, 30), 15)
+    assert index.tolist() == [3, 3, 3, 5, 5]
+
+
+def test_no_bar_after_expiry_returns_length():
+    timestamps = minutes(0, 5, 10)
+    assert build_settlement_index(timestamps, 60).tolist() == [3, 3, 3]
+
+
+def test_fractional_expiry_is_truncated_like_the_strategy():
+    # enter_binary_trade usa timedelta(minutes=int(expiry_minutes))
+    timestamps = minutes(0, 5, 10, 15)
+    assert build_settlement_index(timestamps, 5.9).tolist() == \
+        build_settlement_index(timestamps, 5).tolist()
+
+
+def test_unsorted_timestamps_are_rejected():
+    with pytest.raises(ValueError):
+        build_settlement_index(minutes(0, 10, 5), 5)
+
+
+def test_cache_reuses_index_per_expiry():
+    class Feed:
+        pass
+
+    cache = SettlementIndexCache()
+    feed = Feed()
+    cache._timestamps[id(feed)] = minutes(0, 5, 10, 15)
+    first = cache.get(feed, 5)
+    assert cache.get(feed, 5) is first
+    assert cache.get(feed, 10).tolist() == [2, 3, 4, 4]
+
+
+def test_settle_vectorized_wins_losses_ties_and_unsettled():
+    close = np.array([1.0, 1.1, 0.9, 1.0, 1.2])
+    entry = np.array([0, 0, 0, 3])
+    exit_ = np.array([1, 2, 3, 5])  # el último no tiene barra de salida
+    is_call = np.array([True, False, True, True])
+    settled, won, pnl = settle_vectorized(close, entry, exit_, is_call, payout_rate=0.8)
+    assert settled.tolist() == [True, True, True, False]
+    # CALL sube: gana; PUT baja: gana; CALL con el mismo precio: pierde
+    assert won.tolist() == [True, True, False, False]
+    assert pnl.tolist() == pytest.approx([0.8, 0.8, -1.0, 0.0])
+
+
+# ----------------------------------------------------------------------
+# FineSettlementPrices: señal en velas de 5 minutos, salida desde M1 / ticks
+# ----------------------------------------------------------------------
+
+def m1_prices(missing=()):
+    """Velas M1 de 00:00 a 00:40; el precio de cada vela es su minuto (fácil de leer)"""
+    labels = [m for m in range(41) if m not in missing]
+    return FineSettlementPrices(minutes(*labels), np.array(labels, dtype=float),
+                                bar_minutes=1, signal_bar_minutes=5)
+
+
+def test_m1_exit_is_the_bar_closing_at_real_expiry():
+    # Entrada en la vela 00:00 (cierra 00:05), expiry 15 -> expiración real 00:20:
+    # la vela M1 que cierra a las 00:20 es la etiquetada 00:19
+    exit_time, price = m1_prices().lookup(datetime(2024, 1, 1, 0, 15))
+    assert exit_time == datetime(2024, 1, 1, 0, 19)
+    assert price == 19.0
+
+
+def test_missing_m1_bar_uses_the_next_one():
+    exit_time, price = m1_prices(missing=(19,)).lookup(datetime(2024, 1, 1, 0, 15))
+    assert exit_time == datetime(2024, 1, 1, 0, 20)
+    assert price == 20.0
+
+
+def test_no_fine_data_after_expiry_returns_none():
+    assert m1_prices().lookup(datetime(2024, 1, 1, 0, 40)) is None
+
+
+def test_ticks_use_first_tick_at_or_after_real_expiry():
+    second = 1_000_000_000
+    ticks = minutes(19, 20, 20) + np.array([59 * second, 0, second // 2])
+    prices = FineSettlementPrices(ticks, np.array([1.1, 1.2, 1.3]), bar_minutes=0,
+                                  signal_bar_minutes=5)
+    exit_time, price = prices.lookup(datetime(2024, 1, 1, 0, 15))
+    assert exit_time == datetime(2024, 1, 1, 0, 20)
+    assert price == 1.2
+
+
+def test_fine_data_equal_to_signal_bars_matches_bar_settlement():
+    timestamps = minutes(0, 5, 10, 15, 20)
+    close = np.array([1.0, 1.1, 1.2, 1.3, 1.4])
+    prices = FineSettlementPrices(timestamps, close, bar_minutes=5, signal_bar_minutes=5)
+    exit_bar = build_settlement_index(timestamps, 15)[0]
+    assert prices.lookup(datetime(2024, 1, 1, 0, 15)) == (datetime(2024, 1, 1, 0, 15),
+                                                          close[exit_bar])
+
+
+def test_mismatched_lengths_are_rejected():
+    with pytest.raises(ValueError):
+        FineSettlementPrices(minutes(0, 1), np.array([1.0]))
+
+
+def test_infer_bar_minutes_ignores_gaps():
+    assert infer_bar_minutes(minutes(0, 1, 2, 3, 10, 11)) == 1.0
+    assert infer_bar_minutes(minutes(0)) == 0
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+timeframes.py - Pirámide de temporalidades a partir de un único archivo base
+
+El archivo base (M1 o M5) se carga una vez a través del cache binario
+(data_cache.py). Las temporalidades superiores se construyen con agregación
+OHLCV vectorizada en NumPy y se guardan en el mismo directorio de cache:
+
+    EURUSD1.csv.cache/          base
+    EURUSD1.csv.cache/tf_15m/   M15
+    EURUSD1.csv.cache/tf_60m/   H1
+
+Cuando el archivo base crece, cada temporalidad se reconstruye solo desde su
+última vela (que podía estar incompleta) en adelante.
+
+Uso:
+    pyramid = TimeframePyramid("EURUSD1.csv", timeframes=(5, 15, 60))
+    result = run_single_backtest(pyramid.feed(15))
+    optimizer = OptimizedParameterSearch(pyramid.feed(60))
+"""
+
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from data_cache import (
+    COLUMNS,
+    arrays_to_feed,
+    arrays_to_frame,
+    load_arrays,
+    read_cache,
+    read_meta,
+    write_cache,
+    cache_dir_for,
+)
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+
+def resample_ohlcv(arrays: Dict[str, np.ndarray], minutes: int) -> Dict[str, np.ndarray]:
+    """
+    Agregar velas a una temporalidad mayor (etiqueta = inicio del intervalo,
+    igual que pandas resample con label='left').
+    """
+    timestamps = np.asarray(arrays['datetime'], dtype=np.int64)
+    if len(timestamps) == 0:
+        return {column: np.asarray(arrays[column])[:0] for column in ('datetime',) + COLUMNS}
+
+    step = int(minutes) * NS_PER_MINUTE
+    buckets = timestamps - np.mod(timestamps, step)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(timestamps)])) - 1
+
+    return {
+        'datetime': buckets[starts],
+        'open': np.asarray(arrays['open'])[starts],
+        'high': np.maximum.reduceat(np.asarray(arrays['high']), starts),
+        'low': np.minimum.reduceat(np.asarray(arrays['low']), starts),
+        'close': np.asarray(arrays['close'])[ends],
+        'volume': np.add.reduceat(np.asarray(arrays['volume']), starts),
+    }
+
+
+class TimeframePyramid:
+    """Base cargada una vez + temporalidades superiores cacheadas en disco"""
+
+    def __init__(self, base_file: str, timeframes: Iterable[int] = (15, 60),
+                 base_minutes: Optional[int] = None,
+                 datetime_format: Optional[str] = None):
+        self.base_file = base_file
+        self.cache_dir = cache_dir_for(base_file)
+        self.base, self.base_meta = load_arrays(base_file, datetime_format=datetime_format)
+        self.base_minutes = base_minutes or self._infer_base_minutes()
+        self.frames: Dict[int, Dict[str, np.ndarray]] = {self.base_minutes: self.base}
+        self._feeds = {}
+
+        for minutes in sorted(set(timeframes)):
+            if minutes % self.base_minutes != 0:
+                raise ValueError(f"M{minutes} no es múltiplo de la base M{self.base_minutes}")
+            if minutes != self.base_minutes:
+                self.frames[minutes] = self._build(minutes)
+
+    def _infer_base_minutes(self) -> int:
+        """Temporalidad base = diferencia más frecuente entre velas"""
+        deltas = np.diff(np.asarray(self.base['datetime'], dtype=np.int64))
+        deltas = deltas[deltas > 0]
+        if len(deltas) == 0:
+            return 1
+        values, counts = np.unique(deltas, return_counts=True)
+        return max(1, int(values[np.argmax(counts)] // NS_PER_MINUTE))
+
+    def _tf_dir(self, minutes: int) -> str:
+        return os.path.join(self.cache_dir, f"tf_{minutes}m")
+
+    def _build(self, minutes: int) -> Dict[str, np.ndarray]:
+        """Cargar del cache, extender incrementalmente o reconstruir"""
+        tf_dir = self._tf_dir(minutes)
+        meta = read_meta(tf_dir)
+        base_ts = np.asarray(self.base['datetime'], dtype=np.int64)
+        base_rows = len(base_ts)
+
+        if meta and meta.get('base_first') == (int(base_ts[0]) if base_rows else None):
+            cached_rows = meta.get('base_rows', 0)
+            if cached_rows == base_rows and meta.get('base_last') == int(base_ts[-1]):
+                return read_cache(tf_dir)
+
+            # La base solo creció por el final: rehacer desde la última vela cacheada
+            if 0 < cached_rows < base_rows and int(base_ts[cached_rows - 1]) == meta.get('base_last'):
+                cached = read_cache(tf_dir)
+                last_bucket = int(cached['datetime'][-1])
+                cut = int(np.searchsorted(base_ts, last_bucket, side='left'))
+                tail = resample_ohlcv({c: np.asarray(v)[cut:] for c, v in self.base.items()},
+                                      minutes)
+                arrays = {column: np.concatenate([np.asarray(cached[column])[:-1], tail[column]])
+                          for column in cached}
+                self._save(minutes, arrays)
+                print(f"➕ M{minutes}: {base_rows - cached_rows} velas base nuevas incorporadas")
+                return arrays
+
+        arrays = resample_ohlcv(self.base, minutes)
+        self._save(minutes, arrays)
+        print(f"🧱 M{minutes}: {len(arrays['datetime'])} velas construidas desde la base")
+        return arrays
+
+    def _save(self, minutes: int, arrays: Dict[str, np.ndarray]):
+        base_ts = np.asarray(self.base['datetime'], dtype=np.int64)
+        write_cache(arrays, self._tf_dir(minutes), {
+            'minutes': minutes,
+            'base_rows': int(len(base_ts)),
+            'base_first': int(base_ts[0]) if len(base_ts) else None,
+            'base_last': int(base_ts[-1]) if len(base_ts) else None,
+        })
+
+    @property
+    def timeframes(self):
+        return sorted(self.frames)
+
+    def arrays(self, minutes: int) -> Dict[str, np.ndarray]:
+        if minutes not in self.frames:
+            raise KeyError(f"M{minutes} no está en la pirámide: {self.timeframes}")
+        return self.frames[minutes]
+
+    def frame(self, minutes: int):
+        """DataFrame de una temporalidad (mismo formato que load_data)"""
+        return arrays_to_frame(self.arrays(minutes))
+
+    def feed(self, minutes: int):
+        """Feed de backtrader para run_single_backtest / OptimizedParameterSearch"""
+        if minutes not in self._feeds:
+            self._feeds[minutes] = arrays_to_feed(self.arrays(minutes))
+        return self._feeds[minutes]